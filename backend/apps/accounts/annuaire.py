@@ -0,0 +1,78 @@
+"""
+Annuaire des membres (sélecteurs de destinataires, listes de membres des applications).
+
+Lignes compactes (id, nom, miniature de la photo, rôle, cellule), recherche et filtres
+côté serveur, pagination par curseur. La version de l'annuaire — nombre de membres et
+dernière modification d'un compte — sert d'ETag : tant qu'aucun compte n'a changé, les
+clients reçoivent 304 sans que la page soit relue ni sérialisée.
+"""
+import hashlib
+import json
+
+from django.db.models import Count, Max, Q
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from .models import CustomUser
+
+MOTS_MAX = 5
+
+
+class AnnuaireCursorPagination(CursorPagination):
+    """Membres par ordre alphabétique, 50 par page."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('first_name', 'last_name', 'id')
+
+
+class MembresAdminPagination(PageNumberPagination):
+    """Table des membres de l'administration."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+def version_membres():
+    """(nombre de comptes, dernière modification) : une requête d'agrégat (index sur date_modification)."""
+    agg = CustomUser.objects.aggregate(n=Count('pk'), m=Max('date_modification'))
+    return [agg['n'], agg['m'].isoformat() if agg['m'] else None]
+
+
+def etag_membres(request, *cles):
+    """ETag d'une réponse construite à partir des comptes : version, requête, `cles`."""
+    brut = json.dumps([version_membres(), request.get_full_path(), *cles], default=str)
+    return quote_etag(hashlib.sha1(brut.encode('utf-8')).hexdigest())
+
+
+def reponse_non_modifiee(request, etag):
+    """Réponse 304 si le client a déjà la version `etag`, sinon None."""
+    return get_conditional_response(request, etag=etag)
+
+
+def marquer(response, etag):
+    response['ETag'] = etag
+    # Propre à l'utilisateur connecté ; revalidation (304) à chaque affichage
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class VersionMembresMixin:
+    """Liste (ListAPIView) servie avec l'ETag de la version des membres ; 304 si inchangée."""
+
+    def list(self, request, *args, **kwargs):
+        etag = etag_membres(request)
+        non_modifiee = reponse_non_modifiee(request, etag)
+        if non_modifiee is not None:
+            return non_modifiee
+        return marquer(super().list(request, *args, **kwargs), etag)
+
+
+def rechercher_membres(qs, q):
+    """Filtre `qs` : chaque mot de `q` dans le prénom, le nom ou l'identifiant."""
+    for mot in (q or '').split()[:MOTS_MAX]:
+        qs = qs.filter(
+            Q(first_name__icontains=mot) | Q(last_name__icontains=mot) | Q(username__icontains=mot)
+        )
+    return qs
@@ -5,3 +5,6 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.accounts'
     verbose_name = 'Comptes utilisateurs'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (cache des identités invalidé à chaque écriture)
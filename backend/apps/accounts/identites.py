@@ -0,0 +1,188 @@
+"""
+Identités d'affichage des membres, par id : nom, initiales, URL de la photo et de sa
+miniature, photo_updated_at. Les sérialiseurs et exports affichent ainsi les personnes
+liées (responsable, membre d'une présence, d'un versement...) sans jointure sur
+accounts_customuser.
+
+Lecture à trois niveaux :
+- mémoire du processus, IDENTITES_DUREE_LOCALE secondes ;
+- cache Django (CACHES, partagé entre les processus avec REDIS_URL), IDENTITES_DUREE secondes ;
+- base : une requête pour tous les ids manquants (get_many).
+
+Un compte enregistré ou supprimé est retiré des deux caches (signals.py) ; les autres
+processus le relisent au plus tard après IDENTITES_DUREE_LOCALE secondes.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import serializers
+from rest_framework.fields import get_attribute
+
+from utils.images import chemin_derive, est_image
+
+from .models import CustomUser
+
+# Champs du compte dont dépend l'identité (les autres enregistrements ne l'invalident pas)
+CHAMPS = ('first_name', 'last_name', 'photo', 'photo_updated_at')
+PREFIXE = 'identite:v2:'  # v2 : chemins des dérivés avec l'extension de l'original
+LOCALE_MAX = 20000
+
+_locale = {}  # id -> (expiration, identité)
+_verrou = threading.Lock()
+
+
+def duree():
+    return getattr(settings, 'IDENTITES_DUREE', 300)
+
+
+def duree_locale():
+    return getattr(settings, 'IDENTITES_DUREE_LOCALE', 30)
+
+
+def _cle(pk):
+    return f'{PREFIXE}{pk}'
+
+
+def construire(pk, first_name, last_name, photo, photo_updated_at):
+    """Identité d'un compte à partir de ses colonnes (nom identique à get_full_name())."""
+    storage = CustomUser._meta.get_field('photo').storage
+    return {
+        'id': pk,
+        'nom': f'{first_name} {last_name}'.strip(),
+        'initiales': ''.join(p[0] for p in (first_name.strip(), last_name.strip()) if p).upper(),
+        'photo': storage.url(photo) if photo else None,
+        'photo_thumb': storage.url(chemin_derive(photo, 'thumb')) if photo and est_image(photo) else None,
+        # Même format que les dates des réponses de l'API
+        'photo_updated_at': serializers.DateTimeField().to_representation(photo_updated_at) if photo_updated_at else None,
+    }
+
+
+def get_many(ids):
+    """{id: identité} des comptes `ids` (ids inconnus absents du résultat)."""
+    ids = {int(pk) for pk in ids if pk is not None}
+    if not ids:
+        return {}
+    identites = {}
+    maintenant = time.monotonic()
+    with _verrou:
+        for pk in ids:
+            entree = _locale.get(pk)
+            if entree is not None and entree[0] > maintenant:
+                identites[pk] = entree[1]
+    manquants = ids - identites.keys()
+    if not manquants:
+        return identites
+
+    nouvelles = {
+        int(cle[len(PREFIXE):]): identite
+        for cle, identite in cache.get_many([_cle(pk) for pk in manquants]).items()
+    }
+    manquants -= nouvelles.keys()
+    if manquants:
+        lues = {
+            ligne[0]: construire(*ligne)
+            for ligne in CustomUser.objects.filter(pk__in=manquants).values_list('pk', *CHAMPS)
+        }
+        cache.set_many({_cle(pk): identite for pk, identite in lues.items()}, duree())
+        nouvelles.update(lues)
+
+    expiration = maintenant + duree_locale()
+    with _verrou:
+        if len(_locale) + len(nouvelles) > LOCALE_MAX:
+            _locale.clear()
+        for pk, identite in nouvelles.items():
+            _locale[pk] = (expiration, identite)
+    identites.update(nouvelles)
+    return identites
+
+
+def get(pk):
+    """Identité du compte `pk`, ou None."""
+    if pk is None:
+        return None
+    return get_many([pk]).get(int(pk))
+
+
+def nom(pk, defaut=None):
+    identite = get(pk)
+    return identite['nom'] if identite else defaut
+
+
+def invalider(*pks):
+    """Retire les comptes `pks` du cache du processus et du cache partagé."""
+    with _verrou:
+        for pk in pks:
+            _locale.pop(pk, None)
+    cache.delete_many([_cle(pk) for pk in pks])
+
+
+def vider_cache_local():
+    with _verrou:
+        _locale.clear()
+
+
+# ───────────────────────────────── Sérialiseurs ─────────────────────────────
+
+def precharger(noeud, cle, ids_de):
+    """
+    Identités de tous les éléments sérialisés par la racine de `noeud` (champ ou
+    sérialiseur), lues en une fois : `ids_de(objet)` donne les ids d'un élément, `cle`
+    évite de recommencer pour chaque élément. Retourne {id: identité} ; vide si `noeud`
+    n'est pas sérialisé directement par la racine (liste imbriquée : lecture à l'unité).
+    """
+    racine = noeud.root
+    serialiseur = noeud if isinstance(noeud, serializers.BaseSerializer) else noeud.parent
+    if racine.instance is None:
+        return {}
+    if isinstance(racine, serializers.ListSerializer):
+        if serialiseur is not racine.child:
+            return {}
+        objets = racine.instance
+    elif serialiseur is racine:
+        objets = [racine.instance]
+    else:
+        return {}
+    memo = racine.__dict__.setdefault('_identites', {'cles': set(), 'identites': {}})
+    if cle not in memo['cles']:
+        memo['cles'].add(cle)
+        ids = set()
+        for objet in objets:
+            ids.update(ids_de(objet))
+        memo['identites'].update(get_many(ids - memo['identites'].keys()))
+    return memo['identites']
+
+
+class IdentiteField(serializers.ReadOnlyField):
+    """
+    Identité du compte d'id `source` (ex. source='membre_id'), ou seulement sa clé `cle`
+    ('nom', 'photo_thumb'...). Une lecture pour toute la liste sérialisée. URL des photos
+    absolues si la requête est dans le contexte (comme ImageField).
+    """
+    URLS = ('photo', 'photo_thumb')
+
+    def __init__(self, cle=None, **kwargs):
+        self.cle = cle
+        super().__init__(**kwargs)
+
+    def _ids(self, objet):
+        try:
+            return [get_attribute(objet, self.source_attrs)]
+        except (AttributeError, KeyError):
+            return []
+
+    def to_representation(self, pk):
+        identites = precharger(self, self.source, self._ids)
+        identite = identites.get(pk) if pk in identites else get(pk)
+        if identite is None:
+            return None
+        if self.cle:
+            return self._absolue(self.cle, identite[self.cle])
+        return {k: self._absolue(k, v) for k, v in identite.items()}
+
+    def _absolue(self, cle, valeur):
+        request = self.context.get('request')
+        if request is None or cle not in self.URLS or not valeur:
+            return valeur
+        return request.build_absolute_uri(valeur)
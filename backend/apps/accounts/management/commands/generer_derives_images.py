@@ -0,0 +1,41 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from utils.images import DerivesMixin, chemin_derive, est_image, generer_et_enregistrer
+
+
+class Command(BaseCommand):
+    help = "Génère les images dérivées (thumb / medium / large) des images déjà déposées"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Régénère aussi les dérivés existants')
+
+    def handle(self, *args, **options):
+        nb_generes = nb_ignores = nb_echecs = 0
+        for modele in apps.get_models():
+            champs = [f for f in modele._meta.get_fields() if isinstance(f, DerivesMixin)]
+            for champ in champs:
+                lignes = (
+                    modele.objects.exclude(**{f'{champ.name}__isnull': True}).exclude(**{champ.name: ''})
+                    .values_list(champ.name, champ.largeur_field or champ.name).distinct().iterator()
+                )
+                for nom, largeur in lignes:
+                    if not est_image(nom):
+                        continue
+                    # À jour : dérivés présents et largeur de l'original connue
+                    a_jour = largeur if champ.largeur_field else True
+                    if not options['force'] and a_jour and champ.storage.exists(chemin_derive(nom, 'thumb')):
+                        nb_ignores += 1
+                        continue
+                    try:
+                        generer_et_enregistrer(modele, champ, nom)
+                        nb_generes += 1
+                    except Exception as e:
+                        nb_echecs += 1
+                        self.stderr.write(f'{modele._meta.label}.{champ.name} {nom} : {e}')
+                    if options['verbosity'] > 1:
+                        self.stdout.write(nom)
+        self.stdout.write(self.style.SUCCESS(
+            f'{nb_generes} image(s) traitée(s), {nb_ignores} déjà à jour, {nb_echecs} en échec.'
+        ))
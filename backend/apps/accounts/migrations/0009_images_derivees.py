@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:19
+
+from django.db import migrations
+import utils.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_customuser_cellule_groupe_sanguin_niveaux'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='photo',
+            field=utils.images.ImageDeriveeField(blank=True, null=True, upload_to='photos_membres/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_images_derivees'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True, db_index=True, help_text="Version de l'annuaire (ETag)"),
+        ),
+    ]
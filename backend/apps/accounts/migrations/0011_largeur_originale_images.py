@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:57
+
+from django.db import migrations, models
+import utils.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_customuser_date_modification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='photo_largeur',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)", null=True),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='photo',
+            field=utils.images.ImageDeriveeField(blank=True, largeur_field='photo_largeur', null=True, upload_to='photos_membres/'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from utils.images import ImageDeriveeField
 
 class CustomUser(AbstractUser):
     ROLE_CHOICES = [
@@ -55,9 +56,11 @@ class CustomUser(AbstractUser):
     adresse = models.TextField(blank=True)
     # Augmenter max_length pour accepter les rôles spécialisés (jusqu'à 21 caractères)
     role = models.CharField(max_length=32, choices=ROLE_CHOICES, default='membre')
-    photo = models.ImageField(upload_to='photos_membres/', null=True, blank=True)
+    photo = ImageDeriveeField(upload_to='photos_membres/', null=True, blank=True, largeur_field='photo_largeur')
+    photo_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)")
     photo_updated_at = models.DateTimeField(null=True, blank=True, help_text='Mis à jour à chaque changement de photo (cache bust)')
     date_inscription = models.DateTimeField(auto_now_add=True)
+    date_modification = models.DateTimeField(auto_now=True, db_index=True, help_text="Version de l'annuaire (ETag)")
     est_actif = models.BooleanField(default=True)
     numero_wave = models.CharField(max_length=50, blank=True)
     numero_carte = models.CharField(max_length=50, blank=True)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from utils.images import DeriveField
 from .models import ProfilComplementaire, Badge, AttributionBadge
 
 User = get_user_model()
@@ -7,6 +8,8 @@ User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
     role_display = serializers.CharField(source='get_role_display', read_only=True)
+    photo_thumb = DeriveField(source='photo')
+    photo_srcset = DeriveField(source='photo', taille='srcset')
     password = serializers.CharField(
         write_only=True,
         required=False,
@@ -54,7 +57,7 @@ class UserSerializer(serializers.ModelSerializer):
             'id', 'username', 'email', 'first_name', 'last_name',
             'telephone', 'adresse', 'sexe', 'profession', 'categorie',
             'cellule', 'groupe_sanguin', 'niveau_alquran', 'niveau_majalis',
-            'role', 'role_display', 'photo', 'password',
+            'role', 'role_display', 'photo', 'photo_thumb', 'photo_srcset', 'password',
             'date_inscription', 'est_actif', 'numero_wave', 'numero_carte',
             'specialite', 'biographie',
             'cotisations_payees', 'chapitres_lus', 'evenements_participes',
@@ -110,6 +113,8 @@ class UserCreateSerializer(serializers.ModelSerializer):
 class UserMeSerializer(serializers.ModelSerializer):
     role_display = serializers.CharField(source='get_role_display', read_only=True)
     categorie = serializers.CharField(required=False, allow_blank=True, allow_null=True, read_only=False)
+    photo_thumb = DeriveField(source='photo')
+    photo_srcset = DeriveField(source='photo', taille='srcset')
 
     def validate_categorie(self, value):
         """Normaliser et valider la catégorie"""
@@ -155,7 +160,7 @@ class UserMeSerializer(serializers.ModelSerializer):
             'id', 'username', 'email', 'first_name', 'last_name',
             'telephone', 'adresse', 'sexe', 'profession', 'categorie',
             'cellule', 'groupe_sanguin', 'niveau_alquran', 'niveau_majalis',
-            'role', 'role_display', 'photo',
+            'role', 'role_display', 'photo', 'photo_thumb', 'photo_srcset',
             'photo_updated_at',
             'date_inscription', 'est_actif', 'numero_wave', 'numero_carte',
             'specialite', 'biographie',
@@ -167,6 +172,20 @@ class UserMeSerializer(serializers.ModelSerializer):
         ]
 
 
+class MembreAnnuaireSerializer(serializers.ModelSerializer):
+    """Ligne compacte de l'annuaire des membres."""
+    nom = serializers.SerializerMethodField()
+    photo_thumb = DeriveField(source='photo')
+    role_display = serializers.CharField(source='get_role_display', read_only=True)
+
+    class Meta:
+        model = User
+        fields = ['id', 'nom', 'photo_thumb', 'role', 'role_display', 'cellule']
+
+    def get_nom(self, obj):
+        return obj.get_full_name() or obj.username
+
+
 class BadgeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Badge
@@ -0,0 +1,30 @@
+"""
+Invalidation du cache des identités d'affichage (identites.py) à chaque enregistrement ou
+suppression de compte — y compris depuis l'admin. Invalidation immédiate, puis de nouveau
+en fin de transaction : une lecture concurrente ne garde pas l'ancienne identité.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import identites
+from .models import CustomUser
+
+
+def _invalider(pk):
+    identites.invalider(pk)
+    transaction.on_commit(lambda: identites.invalider(pk))
+
+
+@receiver(post_save, sender=CustomUser)
+def compte_enregistre(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    if created or raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(identites.CHAMPS):
+        return  # last_login, mot de passe... : identité inchangée
+    _invalider(instance.pk)
+
+
+@receiver(post_delete, sender=CustomUser)
+def compte_supprime(sender, instance, **kwargs):
+    _invalider(instance.pk)
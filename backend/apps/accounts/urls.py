@@ -11,6 +11,8 @@ urlpatterns = [
     path('me/change-password/', views.change_password),
     path('users/', views.UserList.as_view()),
     path('users/<int:pk>/', views.UserDetail.as_view()),
+    path('annuaire/', views.Annuaire.as_view()),
+    path('admin/membres/', views.MembresAdmin.as_view()),
     path('admin/statistiques/', views.stats_admin),
     path('me/badges/', views.mes_badges),
 ]
@@ -1,14 +1,19 @@
-from rest_framework import generics, status
+from rest_framework import filters, generics, status
 from rest_framework.decorators import api_view, permission_classes, parser_classes, authentication_classes
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
-from .serializers import UserSerializer, UserCreateSerializer, UserMeSerializer, BadgeSerializer, AttributionBadgeSerializer
+from .annuaire import AnnuaireCursorPagination, MembresAdminPagination, VersionMembresMixin, rechercher_membres
+from .serializers import (
+    UserSerializer, UserCreateSerializer, UserMeSerializer, BadgeSerializer, AttributionBadgeSerializer,
+    MembreAnnuaireSerializer,
+)
 from .models import AttributionBadge
 from .permissions import IsAdminRoleOrStaff
 
@@ -77,7 +82,7 @@ def me(request):
         if photo_file:
             from django.utils import timezone
             user.photo_updated_at = timezone.now()
-            user.save(update_fields=['photo_updated_at'])
+            user.save(update_fields=['photo_updated_at', 'date_modification'])
         # Recharger l'utilisateur pour avoir l'URL mise à jour
         user.refresh_from_db()
         return Response(UserMeSerializer(user, context={'request': request}).data)
@@ -118,6 +123,42 @@ class UserList(generics.ListAPIView):
     pagination_class = None  # Désactiver pagination pour afficher tous les membres
 
 
+class Annuaire(VersionMembresMixin, generics.ListAPIView):
+    """
+    Annuaire des membres actifs : lignes compactes, ?q= (prénom, nom, identifiant),
+    ?role= / ?cellule=, pagination par curseur. ETag (version de l'annuaire) : 304 si
+    aucun compte n'a changé.
+    """
+    serializer_class = MembreAnnuaireSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = AnnuaireCursorPagination
+    filterset_fields = ['role', 'cellule']
+
+    def get_queryset(self):
+        qs = User.objects.filter(is_active=True).only(
+            'id', 'first_name', 'last_name', 'username', 'photo', 'role', 'cellule'
+        )
+        return rechercher_membres(qs, self.request.query_params.get('q'))
+
+
+class MembresAdmin(VersionMembresMixin, generics.ListAPIView):
+    """
+    Table des membres de l'administration : profils complets, paginés (?page=, ?page_size=),
+    mêmes filtres que UserList, ?q= et ?ordering=. ETag comme l'annuaire.
+    """
+    serializer_class = UserSerializer
+    permission_classes = [IsAuthenticated, IsAdminRoleOrStaff]
+    pagination_class = MembresAdminPagination
+    filterset_fields = UserList.filterset_fields
+    filter_backends = [*api_settings.DEFAULT_FILTER_BACKENDS, filters.OrderingFilter]
+    ordering_fields = ['date_inscription', 'first_name', 'last_name', 'role', 'cellule']
+    ordering = ['-date_inscription', 'id']
+
+    def get_queryset(self):
+        qs = User.objects.filter(is_active=True)
+        return rechercher_membres(qs, self.request.query_params.get('q'))
+
+
 class UserDetail(generics.RetrieveUpdateDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -143,7 +184,8 @@ def stats_admin(request):
     if not request.user.is_staff and request.user.role != 'admin':
         return Response({'detail': 'Non autorisé'}, status=403)
     from apps.accounts.models import CustomUser
-    from apps.finance.models import CotisationMensuelle
+    from django.db.models import Count, Q
+    from apps.finance.stats import CotisationStats
     from apps.informations.models import Evenement
 
     now = timezone.now()
@@ -151,21 +193,22 @@ def stats_admin(request):
     mois = now.month
 
     # Aligné sur Gestion des membres : tous les utilisateurs actifs
-    membres_actifs = CustomUser.objects.filter(is_active=True, est_actif=True).count()
-    total_membres = CustomUser.objects.filter(is_active=True).count()
-    # Cotisations du mois courant
-    cotisations_total_ce_mois = CotisationMensuelle.objects.filter(annee=annee, mois=mois).count()
-    cotisations_payees_ce_mois = CotisationMensuelle.objects.filter(
-        annee=annee, mois=mois, statut='payee'
-    ).count()
+    membres = CustomUser.objects.filter(is_active=True).aggregate(
+        total=Count('id'), actifs=Count('id', filter=Q(est_actif=True)),
+    )
+    membres_actifs = membres['actifs']
+    total_membres = membres['total']
+    # Cotisations du mois courant et globales (toutes cotisations depuis le début) : une seule requête
+    stats = CotisationStats().totaux(ce_mois=Q(annee=annee, mois=mois))
+    cotisations_total_ce_mois = stats['ce_mois']['nb_total']
+    cotisations_payees_ce_mois = stats['ce_mois']['nb_payees']
     if cotisations_total_ce_mois > 0:
         taux_paiement_cotisations_ce_mois = (cotisations_payees_ce_mois / cotisations_total_ce_mois) * 100
     else:
         taux_paiement_cotisations_ce_mois = 0.0
 
-    # Global (toutes cotisations depuis le début)
-    cotisations_total_global = CotisationMensuelle.objects.all().count()
-    cotisations_payees_global = CotisationMensuelle.objects.filter(statut='payee').count()
+    cotisations_total_global = stats['nb_total']
+    cotisations_payees_global = stats['nb_payees']
     if cotisations_total_global > 0:
         taux_paiement_cotisations_global = (cotisations_payees_global / cotisations_total_global) * 100
     else:
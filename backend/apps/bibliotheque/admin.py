@@ -4,7 +4,9 @@ from .models import LivreNumerique
 
 @admin.register(LivreNumerique)
 class LivreNumeriqueAdmin(admin.ModelAdmin):
-    list_display = ('nom', 'categorie', 'ordre', 'date_ajout', 'telechargements', 'vues')
-    list_filter = ('categorie',)
+    list_display = ('nom', 'categorie', 'ordre', 'nombre_pages', 'date_ajout', 'telechargements', 'vues', 'ingestion_statut')
+    list_filter = ('categorie', 'ingestion_statut')
+    readonly_fields = ('nombre_pages', 'metadonnees', 'miniature', 'ingestion_statut', 'ingestion_erreur', 'date_ingestion')
+    exclude = ('texte',)
     search_fields = ('nom', 'description')
     ordering = ('categorie', 'ordre', 'nom')
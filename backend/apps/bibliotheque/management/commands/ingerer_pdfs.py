@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.ingestion_pdf import ingerer, relancer_echecs, reserver
+
+
+class Command(BaseCommand):
+    help = ("Ingère les PDF déposés (livres, documents) : nombre de pages, métadonnées, "
+            "texte et miniature de couverture")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Traite les PDF en attente puis s\'arrête (usage cron)')
+        parser.add_argument('--sleep', type=float, default=10,
+                            help='Attente en secondes lorsque la file est vide (défaut 10)')
+        parser.add_argument('--relancer', action='store_true',
+                            help='Remet d\'abord en file les PDF dont l\'ingestion a échoué')
+
+    def handle(self, *args, **options):
+        if options['relancer']:
+            self.stdout.write(f'{relancer_echecs()} PDF remis en file.')
+        nb_termines = nb_echecs = 0
+        try:
+            while True:
+                objet = reserver()
+                if objet is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                objet = ingerer(objet)
+                if objet.ingestion_statut == 'termine':
+                    nb_termines += 1
+                else:
+                    nb_echecs += 1
+                    self.stderr.write(f'{objet._meta.verbose_name} #{objet.pk} en échec : {objet.ingestion_erreur}')
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'{objet._meta.verbose_name} #{objet.pk} : {objet.nombre_pages} page(s), '
+                        f'miniature {"oui" if objet.miniature else "non"}'
+                    )
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'{nb_termines} PDF ingéré(s), {nb_echecs} en échec.'))
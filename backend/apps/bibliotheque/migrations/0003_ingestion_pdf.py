@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bibliotheque', '0002_alter_livrenumerique_pdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livrenumerique',
+            name='date_ingestion',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='livrenumerique',
+            name='ingestion_erreur',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='livrenumerique',
+            name='ingestion_statut',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('echec', 'Échec')], db_index=True, default='en_attente', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='livrenumerique',
+            name='metadonnees',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='livrenumerique',
+            name='miniature',
+            field=models.ImageField(blank=True, null=True, upload_to='miniatures/'),
+        ),
+        migrations.AddField(
+            model_name='livrenumerique',
+            name='nombre_pages',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='livrenumerique',
+            name='texte',
+            field=models.TextField(blank=True, help_text='Texte extrait du PDF (recherche)'),
+        ),
+    ]
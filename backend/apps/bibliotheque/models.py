@@ -2,6 +2,7 @@ import os
 import uuid
 from django.db import models
 from apps.accounts.models import CustomUser
+from utils.ingestion_pdf import PDFIngere
 
 
 def chemin_pdf_bibliotheque(instance, filename):
@@ -16,14 +17,19 @@ def chemin_pdf_bibliotheque(instance, filename):
     return f'bibliotheque/livres/{categorie}/{nom_safe}_{unique}{ext}'
 
 
-class LivreNumerique(models.Model):
-    """Livre numérique (PDF) classé par catégorie : ALQURAN ou QASSIDA. Les PDF sont sauvegardés de façon persistante."""
+class LivreNumerique(PDFIngere):
+    """
+    Livre numérique (PDF) classé par catégorie : ALQURAN ou QASSIDA. Les PDF sont sauvegardés de façon persistante.
+    Pages, métadonnées, texte et miniature sont renseignés par l'ingestion (utils/ingestion_pdf.py).
+    """
 
     CATEGORIE_CHOICES = [
         ('alquran', 'ALQURAN'),
         ('qassida', 'QASSIDA'),
     ]
 
+    champ_pdf = 'pdf'
+
     nom = models.CharField(max_length=200)
     pdf = models.FileField(upload_to=chemin_pdf_bibliotheque)
     categorie = models.CharField(max_length=20, choices=CATEGORIE_CHOICES)
@@ -1,26 +1,40 @@
 from rest_framework import serializers
+
+from apps.televersements.serializers import TeleversementField, TeleversementMixin
+from utils import compteurs
 from .models import LivreNumerique
 
 
-class LivreNumeriqueSerializer(serializers.ModelSerializer):
+class LivreNumeriqueSerializer(TeleversementMixin, serializers.ModelSerializer):
     categorie_display = serializers.CharField(source='get_categorie_display', read_only=True)
     pdf_url = serializers.SerializerMethodField()
+    miniature_url = serializers.SerializerMethodField()
     pdf = serializers.FileField(required=False, allow_null=True)
+    # PDF volumineux : id d'un téléversement par blocs terminé (apps/televersements)
+    pdf_televersement = TeleversementField(cible='livre')
 
     class Meta:
         model = LivreNumerique
         fields = [
-            'id', 'nom', 'pdf', 'pdf_url', 'categorie', 'categorie_display',
+            'id', 'nom', 'pdf', 'pdf_televersement', 'pdf_url', 'categorie', 'categorie_display',
             'description', 'ordre', 'date_ajout', 'telechargements', 'vues',
+            'nombre_pages', 'miniature_url', 'ingestion_statut',
         ]
-        read_only_fields = ['date_ajout', 'ajoute_par', 'telechargements', 'vues']
+        read_only_fields = ['date_ajout', 'ajoute_par', 'telechargements', 'vues', 'nombre_pages', 'ingestion_statut']
 
     def validate(self, data):
         # À la création, le PDF est obligatoire
-        if not self.instance and not data.get('pdf'):
+        if not self.instance and not data.get('pdf') and not data.get('pdf_televersement'):
             raise serializers.ValidationError({'pdf': 'Veuillez sélectionner un fichier PDF.'})
         return data
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Compteurs en direct : incréments pas encore écrits en base inclus
+        for champ in ('vues', 'telechargements'):
+            data[champ] = compteurs.valeur(instance, champ)
+        return data
+
     def get_pdf_url(self, obj):
         if not obj.pdf:
             return None
@@ -28,3 +42,12 @@ class LivreNumeriqueSerializer(serializers.ModelSerializer):
         if request:
             return request.build_absolute_uri(obj.pdf.url)
         return obj.pdf.url
+
+    def get_miniature_url(self, obj):
+        """Couverture générée par l'ingestion (quelques Ko), None tant qu'elle n'existe pas."""
+        if not obj.miniature:
+            return None
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(obj.miniature.url)
+        return obj.miniature.url
@@ -5,10 +5,11 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.http import FileResponse, Http404, HttpResponse
 from django.utils.encoding import smart_str
 
 from apps.accounts.permissions import IsAdminRoleOrStaff
+from utils import compteurs
+from utils.fichiers import premiere_requete, servir_fichier
 
 from .models import LivreNumerique
 from .serializers import LivreNumeriqueSerializer
@@ -48,41 +49,29 @@ class LivreNumeriqueViewSet(viewsets.ModelViewSet):
                 status=400,
             )
 
-    def _serve_pdf(self, livre, as_attachment=False):
-        """Sert le PDF via le storage (compatible FileSystem, S3, etc.)."""
-        if not livre.pdf or not livre.pdf.name:
-            raise Http404("Fichier non disponible.")
-        try:
-            with livre.pdf.storage.open(livre.pdf.name, 'rb') as f:
-                content = f.read()
-        except (FileNotFoundError, OSError) as e:
-            if getattr(e, 'errno', None) == 2 or 'No such file' in str(e):
-                raise Http404(
-                    "Fichier introuvable sur le serveur. En hébergement cloud, les fichiers peuvent être perdus après un redéploiement. Veuillez supprimer ce livre et le réajouter avec le PDF."
-                )
-            raise Http404(f"Fichier non accessible: {e!s}")
-        except Exception as e:
-            raise Http404(f"Fichier non accessible: {e!s}")
-        if not content:
-            raise Http404("Fichier vide.")
+    def _serve_pdf(self, request, livre, as_attachment=False):
+        """
+        Sert le PDF sans le charger en mémoire (utils/fichiers.py) : URL signée sur S3,
+        X-Accel-Redirect / X-Sendfile si configuré, sinon flux avec requêtes partielles (206).
+        """
         filename = smart_str(livre.nom or 'livre') + '.pdf'
-        resp = HttpResponse(content, content_type='application/pdf')
-        resp['Content-Disposition'] = ('attachment; filename="%s"' % filename) if as_attachment else ('inline; filename="%s"' % filename)
-        resp['Content-Length'] = len(content)
-        return resp
+        return servir_fichier(request, livre.pdf, filename, as_attachment=as_attachment)
 
     @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
     def lire(self, request, pk=None):
-        """Sert le PDF pour lecture (iframe ou nouvel onglet) et incrémente les vues."""
+        """
+        Sert le PDF pour lecture (iframe ou nouvel onglet) et incrémente les vues.
+        Les requêtes partielles suivantes d'une même lecture ne sont pas comptées.
+        """
         livre = self.get_object()
-        livre.vues += 1
-        livre.save(update_fields=['vues'])
-        return self._serve_pdf(livre, as_attachment=False)
+        if premiere_requete(request):
+            compteurs.incrementer(livre, 'vues')
+        return self._serve_pdf(request, livre, as_attachment=False)
 
     @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
     def telecharger(self, request, pk=None):
-        """Télécharge le PDF et incrémente le compteur."""
+        """Télécharge le PDF et incrémente le compteur (reprises de téléchargement non comptées)."""
         livre = self.get_object()
-        livre.telechargements += 1
-        livre.save(update_fields=['telechargements'])
-        return self._serve_pdf(livre, as_attachment=True)
+        if premiere_requete(request):
+            compteurs.incrementer(livre, 'telechargements')
+        return self._serve_pdf(request, livre, as_attachment=True)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Message, CategorieForum, SujetForum, ReponseForum, Notification
+from .models import Message, Conversation, CategorieForum, SujetForum, ReponseForum, Notification, EnvoiPush
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
@@ -18,3 +18,15 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ['utilisateur', 'titre', 'type_notification', 'est_lue', 'date_creation']
 
 admin.site.register(ReponseForum)
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ['proprietaire', 'contact', 'date_dernier_message', 'nb_non_lus']
+    raw_id_fields = ['proprietaire', 'contact', 'dernier_message']
+
+@admin.register(EnvoiPush)
+class EnvoiPushAdmin(admin.ModelAdmin):
+    list_display = ['telephone', 'contexte', 'statut', 'tentatives', 'prochaine_tentative', 'date_creation']
+    list_filter = ['statut', 'contexte']
+    search_fields = ['telephone', 'nom_destinataire', 'lot']
+    raw_id_fields = ['utilisateur']
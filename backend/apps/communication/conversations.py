@@ -0,0 +1,201 @@
+"""
+Résumé des conversations (boîte de réception) de la messagerie.
+
+Le dernier message et le nombre de non lus de chaque conversation sont stockés dans
+la table dénormalisée `Conversation` (une ligne par côté), mise à jour dans la même
+transaction que l'écriture du message. La boîte de réception est alors un simple
+parcours indexé de cette table, au lieu d'une agrégation sur toute la table `Message`.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import DateTimeField, Exists, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from rest_framework.pagination import CursorPagination
+
+from apps.accounts.models import CustomUser
+from utils.images import chemin_derive, est_image
+
+from .models import Conversation, Message
+from .serializers import MessageSerializer
+
+# Date plancher utilisée pour trier les contacts sans message (curseur stable)
+_DATE_PLANCHER = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class ConversationCursorPagination(CursorPagination):
+    """Pagination par curseur sur tous les contacts : conversations les plus récentes d'abord."""
+    page_size = 30
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-date_tri', 'first_name', 'last_name', 'id')
+
+
+class BoiteCursorPagination(CursorPagination):
+    """Pagination par curseur sur la table Conversation (parcours de l'index proprietaire/date)."""
+    page_size = 30
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-date_dernier_message', '-id')
+
+
+# ───────────────────────── Mise à jour à l'écriture ─────────────────────────
+# Ces fonctions doivent être appelées dans la transaction qui modifie le message.
+
+def _assurer_lignes(*paires):
+    Conversation.objects.bulk_create(
+        [Conversation(proprietaire_id=p, contact_id=c) for p, c in paires],
+        ignore_conflicts=True,
+    )
+
+
+def enregistrer_message(msg):
+    """Nouveau message : devient le dernier message des deux côtés, +1 non lu chez le destinataire."""
+    exp, dest = msg.expediteur_id, msg.destinataire_id
+    _assurer_lignes((exp, dest), (dest, exp))
+    Conversation.objects.filter(proprietaire_id=exp, contact_id=dest).update(
+        dernier_message=msg, date_dernier_message=msg.date_envoi,
+    )
+    Conversation.objects.filter(proprietaire_id=dest, contact_id=exp).update(
+        dernier_message=msg, date_dernier_message=msg.date_envoi, nb_non_lus=F('nb_non_lus') + 1,
+    )
+
+
+def message_lu(msg):
+    """Un message non archivé vient d'être lu par son destinataire : -1 non lu."""
+    if msg.est_archive_destinataire:
+        return
+    Conversation.objects.filter(proprietaire_id=msg.destinataire_id, contact_id=msg.expediteur_id).update(
+        nb_non_lus=Greatest(F('nb_non_lus') - 1, 0),
+    )
+
+
+def conversation_lue(proprietaire_id, contact_id):
+    """Tous les messages reçus de `contact_id` ont été lus."""
+    Conversation.objects.filter(proprietaire_id=proprietaire_id, contact_id=contact_id).update(nb_non_lus=0)
+
+
+def recalculer_conversation(proprietaire_id, contact_id):
+    """
+    Recalcule entièrement le côté `proprietaire_id` d'une conversation depuis la table Message
+    (archivage, suppression). Deux petites requêtes indexées sur la paire.
+    """
+    visibles = Message.objects.filter(
+        Q(expediteur_id=proprietaire_id, destinataire_id=contact_id, est_archive_expediteur=False) |
+        Q(expediteur_id=contact_id, destinataire_id=proprietaire_id, est_archive_destinataire=False)
+    )
+    dernier = visibles.order_by('-date_envoi', '-id').only('id', 'date_envoi').first()
+    nb_non_lus = visibles.filter(expediteur_id=contact_id, est_lu=False).count()
+    _assurer_lignes((proprietaire_id, contact_id))
+    Conversation.objects.filter(proprietaire_id=proprietaire_id, contact_id=contact_id).update(
+        dernier_message=dernier,
+        date_dernier_message=dernier.date_envoi if dernier else None,
+        nb_non_lus=nb_non_lus,
+    )
+
+
+# ─────────────────────────────── Lecture ────────────────────────────────────
+
+def contacts_avec_resume(user):
+    """
+    Queryset des membres actifs (hors `user`) annoté depuis la table Conversation :
+    - dernier_message_id / date_dernier_message : dernier message visible de la conversation
+    - nb_non_lus : messages reçus de ce contact non lus (non archivés)
+    - a_conversation : au moins un message échangé (archivé ou non)
+    - date_tri : date du dernier message, ou date plancher si aucun message
+    """
+    conv = Conversation.objects.filter(proprietaire=user, contact=OuterRef('pk'))
+    return (
+        CustomUser.objects.filter(is_active=True)
+        .exclude(id=user.id)
+        .annotate(
+            dernier_message_id=Subquery(conv.values('dernier_message_id')[:1]),
+            date_dernier_message=Subquery(conv.values('date_dernier_message')[:1]),
+            nb_non_lus=Coalesce(Subquery(conv.values('nb_non_lus')[:1], output_field=IntegerField()), 0),
+            a_conversation=Exists(conv),
+        )
+        .annotate(
+            date_tri=Coalesce(
+                F('date_dernier_message'), Value(_DATE_PLANCHER), output_field=DateTimeField()
+            ),
+        )
+    )
+
+
+def trier_contacts(qs):
+    """Ordre historique : messages récents d'abord, puis contacts déjà sollicités, puis par nom."""
+    return qs.order_by(
+        F('date_dernier_message').desc(nulls_last=True),
+        F('a_conversation').desc(),
+        'first_name',
+        'last_name',
+    )
+
+
+def boite_de_reception(user):
+    """Conversations ayant au moins un message visible, les plus récentes d'abord."""
+    return (
+        Conversation.objects.filter(
+            proprietaire=user, contact__is_active=True, date_dernier_message__isnull=False,
+        )
+        .select_related('contact')
+        .order_by('-date_dernier_message', '-id')
+    )
+
+
+def _nom_contact(contact):
+    return (
+        contact.get_full_name()
+        or f'{contact.first_name or ""} {contact.last_name or ""}'.strip()
+        or contact.email
+        or f'Utilisateur #{contact.id}'
+    )
+
+
+def _charger_messages(ids_messages):
+    """Derniers messages sérialisés, chargés en une seule requête."""
+    ids_messages = [i for i in ids_messages if i]
+    if not ids_messages:
+        return {}
+    msgs = list(Message.objects.filter(id__in=ids_messages))
+    return {m.id: data for m, data in zip(msgs, MessageSerializer(msgs, many=True).data)}
+
+
+def _ligne(contact, dernier_message, nb_non_lus, a_conversation):
+    photo = photo_thumb = None
+    photo_updated_at = None
+    if contact.photo:
+        # Chemin relatif du fichier (ex: photos_membres/xxx.jpg), l'URL est construite côté client
+        photo = str(contact.photo)
+        photo_thumb = chemin_derive(photo, 'thumb') if est_image(photo) else None
+        photo_updated_at = contact.photo_updated_at.isoformat() if contact.photo_updated_at else None
+    return {
+        'contact_id': contact.id,
+        'contact_name': _nom_contact(contact),
+        'contact_email': contact.email or '',
+        'contact_photo': photo,
+        'contact_photo_thumb': photo_thumb,
+        'contact_photo_updated_at': photo_updated_at,
+        'last_message': dernier_message,
+        'unread_count': nb_non_lus,
+        'has_conversation': a_conversation,
+    }
+
+
+def serialiser_conversations(contacts):
+    """Lignes de la boîte de réception pour des contacts annotés par `contacts_avec_resume`."""
+    contacts = list(contacts)
+    messages = _charger_messages(c.dernier_message_id for c in contacts)
+    return [
+        _ligne(c, messages.get(c.dernier_message_id), c.nb_non_lus, c.a_conversation)
+        for c in contacts
+    ]
+
+
+def serialiser_boite(conversations):
+    """Lignes de la boîte de réception pour des objets Conversation (même format)."""
+    conversations = list(conversations)
+    messages = _charger_messages(c.dernier_message_id for c in conversations)
+    return [
+        _ligne(c.contact, messages.get(c.dernier_message_id), c.nb_non_lus, True)
+        for c in conversations
+    ]
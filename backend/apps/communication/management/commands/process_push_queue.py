@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.communication.push import client_passerelle
+from apps.communication.push_queue import reserver_envois, traiter_envois
+
+
+class Command(BaseCommand):
+    help = "Traite la file des messages externes (WhatsApp / SMS) : envoi, reprises et échecs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Vide la file des envois dus puis s\'arrête (usage cron)')
+        parser.add_argument('--concurrency', type=int,
+                            default=getattr(settings, 'PUSH_QUEUE_CONCURRENCY', 4),
+                            help='Nombre maximal d\'appels simultanés à la passerelle')
+        parser.add_argument('--batch-size', type=int,
+                            default=getattr(settings, 'PUSH_GATEWAY_BATCH_SIZE', 200),
+                            help='Nombre d\'envois réservés par lot (un appel /send-batch par lot)')
+        parser.add_argument('--max-attempts', type=int,
+                            default=getattr(settings, 'PUSH_MAX_ATTEMPTS', 5),
+                            help='Nombre de tentatives avant échec définitif')
+        parser.add_argument('--sleep', type=float, default=5,
+                            help='Attente en secondes lorsque la file est vide (défaut 5)')
+
+    def handle(self, *args, **options):
+        taille_lot = max(1, options['batch_size'])
+        total = [0, 0, 0]
+        try:
+            while True:
+                envois = reserver_envois(taille_lot, options['concurrency'])
+                if not envois:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                resultat = traiter_envois(envois, options['concurrency'], options['max_attempts'])
+                total = [t + r for t, r in zip(total, resultat)]
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'{len(envois)} envoi(s) traités : {resultat[0]} envoyé(s), '
+                        f'{resultat[1]} reprogrammé(s), {resultat[2]} en échec.'
+                    )
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            f'{total[0]} envoyé(s), {total[1]} reprogrammé(s), {total[2]} en échec.'
+        ))
+        if options['verbosity'] > 1:
+            self.stdout.write(f'Client passerelle : {client_passerelle.stats()}')
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.communication.models import Conversation, Message
+
+
+class Command(BaseCommand):
+    help = "Reconstruit la table Conversation (boîte de réception) à partir des messages existants"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Nombre de messages lus / conversations écrites par lot (défaut 2000)')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+
+        # (proprietaire, contact) -> [dernier_message_id, date_dernier_message, nb_non_lus]
+        resume = {}
+
+        def _voir(proprietaire, contact, msg_id=None, date=None, non_lu=False):
+            ligne = resume.setdefault((proprietaire, contact), [None, None, 0])
+            if msg_id is not None and (ligne[1] is None or (date, msg_id) > (ligne[1], ligne[0])):
+                ligne[0], ligne[1] = msg_id, date
+            if non_lu:
+                ligne[2] += 1
+
+        messages = Message.objects.order_by('id').values_list(
+            'id', 'expediteur_id', 'destinataire_id', 'date_envoi', 'est_lu',
+            'est_archive_expediteur', 'est_archive_destinataire',
+        )
+        nb_messages = 0
+        for msg_id, exp, dest, date, est_lu, arch_exp, arch_dest in messages.iterator(chunk_size=batch_size):
+            nb_messages += 1
+            if arch_exp:
+                _voir(exp, dest)
+            else:
+                _voir(exp, dest, msg_id, date)
+            if arch_dest:
+                _voir(dest, exp)
+            else:
+                _voir(dest, exp, msg_id, date, non_lu=not est_lu)
+
+        lignes = [
+            Conversation(
+                proprietaire_id=proprietaire, contact_id=contact,
+                dernier_message_id=msg_id, date_dernier_message=date, nb_non_lus=nb_non_lus,
+            )
+            for (proprietaire, contact), (msg_id, date, nb_non_lus) in resume.items()
+        ]
+        with transaction.atomic():
+            Conversation.objects.all().delete()
+            Conversation.objects.bulk_create(lignes, batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(lignes)} conversation(s) reconstruite(s) à partir de {nb_messages} message(s).'
+        ))
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('communication', '0002_conversation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnvoiPush',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot', models.UUIDField(db_index=True, help_text="Identifiant commun aux envois d'une même diffusion")),
+                ('nom_destinataire', models.CharField(blank=True, max_length=200)),
+                ('telephone', models.CharField(help_text='Numéro au format E.164', max_length=20)),
+                ('message', models.TextField()),
+                ('contexte', models.CharField(default='notification', max_length=30)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('envoye', 'Envoyé'), ('echec', 'Échec')], default='en_attente', max_length=20)),
+                ('tentatives', models.PositiveSmallIntegerField(default=0)),
+                ('prochaine_tentative', models.DateTimeField(default=django.utils.timezone.now)),
+                ('derniere_erreur', models.TextField(blank=True)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_envoi', models.DateTimeField(blank=True, null=True)),
+                ('utilisateur', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='envois_push', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Envoi push',
+                'verbose_name_plural': 'Envois push',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut', 'prochaine_tentative'], name='envoipush_file_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from apps.accounts.models import CustomUser
 
 
@@ -24,6 +25,31 @@ class Message(models.Model):
         return f"{self.expediteur.get_full_name()} → {self.destinataire.get_full_name()}: {self.sujet}"
 
 
+class Conversation(models.Model):
+    """
+    Résumé dénormalisé d'une conversation, vu par l'un des deux membres.
+    Une ligne par côté (proprietaire → contact) : chaque côté a son propre dernier message
+    visible (les archivages sont propres à chaque membre) et son compteur de non lus.
+    Mis à jour dans la même transaction que l'écriture du message (voir conversations.py).
+    """
+    proprietaire = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='conversations')
+    contact = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    dernier_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    date_dernier_message = models.DateTimeField(null=True, blank=True)
+    nb_non_lus = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Conversation'
+        verbose_name_plural = 'Conversations'
+        unique_together = ['proprietaire', 'contact']
+        indexes = [
+            models.Index(fields=['proprietaire', '-date_dernier_message'], name='conversation_boite_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.proprietaire.get_full_name()} ↔ {self.contact.get_full_name()}"
+
+
 class CategorieForum(models.Model):
     nom = models.CharField(max_length=100)
     description = models.TextField()
@@ -109,3 +135,41 @@ class Notification(models.Model):
 
     def __str__(self):
         return f"{self.utilisateur.get_full_name()} - {self.titre}"
+
+
+class EnvoiPush(models.Model):
+    """
+    File d'attente persistante des messages externes (WhatsApp / SMS via la passerelle).
+    Les vues enregistrent les envois ici et répondent immédiatement ; la commande
+    `process_push_queue` les dépile avec une concurrence bornée et des reprises espacées.
+    """
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('envoye', 'Envoyé'),
+        ('echec', 'Échec'),
+    ]
+
+    lot = models.UUIDField(db_index=True, help_text="Identifiant commun aux envois d'une même diffusion")
+    utilisateur = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='envois_push')
+    nom_destinataire = models.CharField(max_length=200, blank=True)
+    telephone = models.CharField(max_length=20, help_text='Numéro au format E.164')
+    message = models.TextField()
+    contexte = models.CharField(max_length=30, default='notification')
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_attente')
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    prochaine_tentative = models.DateTimeField(default=timezone.now)
+    derniere_erreur = models.TextField(blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_envoi = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Envoi push'
+        verbose_name_plural = 'Envois push'
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['statut', 'prochaine_tentative'], name='envoipush_file_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.telephone} - {self.contexte} - {self.get_statut_display()}"
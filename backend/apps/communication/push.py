@@ -1,6 +1,10 @@
+import bisect
 import json
-from urllib import request as urllib_request, error as urllib_error
+import os
+import threading
+import time
 
+import urllib3
 from django.conf import settings
 from django.utils.encoding import force_str
 
@@ -23,9 +27,133 @@ def _normalize_phone_to_e164(phone: str) -> str | None:
   return None
 
 
-def _post_to_gateway(payload: dict) -> bool:
+class ClientPasserelle:
+  """
+  Client HTTP partagé par le processus pour parler à la passerelle : pool de connexions
+  keep-alive (urllib3), réutilisées d'un appel à l'autre au lieu d'une poignée de main
+  TCP + TLS par message. Thread-safe ; recréé automatiquement après un fork (gunicorn).
+
+  Configuration : PUSH_HTTP_POOL_SIZE, PUSH_HTTP_CONNECT_TIMEOUT, PUSH_HTTP_READ_TIMEOUT.
+  Les compteurs (requêtes, réutilisations, échecs, histogramme de latence) sont lisibles
+  via `stats()`.
+  """
+
+  # Bornes supérieures (ms) des tranches de l'histogramme de latence
+  TRANCHES_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._pool = None
+    self._pid = None
+    self._reinitialiser_compteurs()
+
+  def _reinitialiser_compteurs(self):
+    self.requetes = 0
+    self.echecs = 0
+    self.latence_totale_ms = 0.0
+    self.histogramme = [0] * (len(self.TRANCHES_MS) + 1)
+
+  def _manager(self):
+    pid = os.getpid()
+    if self._pool is None or self._pid != pid:
+      with self._lock:
+        if self._pool is None or self._pid != pid:
+          taille = max(1, int(getattr(settings, "PUSH_HTTP_POOL_SIZE", 10)))
+          self._pool = urllib3.PoolManager(
+            num_pools=4,
+            maxsize=taille,
+            block=False,
+            retries=False,
+            timeout=urllib3.Timeout(
+              connect=float(getattr(settings, "PUSH_HTTP_CONNECT_TIMEOUT", 5)),
+              read=float(getattr(settings, "PUSH_HTTP_READ_TIMEOUT", 10)),
+            ),
+            headers={"Connection": "keep-alive"},
+          )
+          self._pid = pid
+          self._reinitialiser_compteurs()
+    return self._pool
+
+  def post_json(self, url: str, payload, headers: dict | None = None, read_timeout: float | None = None):
+    """POST JSON sur une connexion du pool. Retourne (status, corps brut) ; lève urllib3.exceptions.HTTPError."""
+    manager = self._manager()
+    timeout = None
+    if read_timeout is not None:
+      timeout = urllib3.Timeout(
+        connect=float(getattr(settings, "PUSH_HTTP_CONNECT_TIMEOUT", 5)), read=read_timeout,
+      )
+    debut = time.perf_counter()
+    ok = False
+    try:
+      kwargs = {"body": json.dumps(payload).encode("utf-8"), "headers": headers or {}}
+      if timeout is not None:
+        kwargs["timeout"] = timeout
+      resp = manager.request("POST", url, **kwargs)
+      ok = 200 <= resp.status < 300
+      return resp.status, resp.data
+    finally:
+      self._enregistrer((time.perf_counter() - debut) * 1000, ok)
+
+  def _enregistrer(self, latence_ms: float, ok: bool):
+    with self._lock:
+      self.requetes += 1
+      if not ok:
+        self.echecs += 1
+      self.latence_totale_ms += latence_ms
+      self.histogramme[bisect.bisect_left(self.TRANCHES_MS, latence_ms)] += 1
+
+  def stats(self) -> dict:
+    """Compteurs du processus courant (les workers gunicorn ont chacun les leurs)."""
+    with self._lock:
+      pools = [self._pool.pools[k] for k in self._pool.pools.keys()] if self._pool is not None else []
+      connexions = sum(p.num_connections for p in pools)
+      requetes_pool = sum(p.num_requests for p in pools)
+      libelles = [f"<={t}" for t in self.TRANCHES_MS] + [f">{self.TRANCHES_MS[-1]}"]
+      return {
+        "pid": os.getpid(),
+        "requetes": self.requetes,
+        "echecs": self.echecs,
+        "connexions_ouvertes": connexions,
+        # Requêtes servies par une connexion déjà établie (keep-alive)
+        "reutilisations": max(0, requetes_pool - connexions),
+        "latence_moyenne_ms": round(self.latence_totale_ms / self.requetes, 1) if self.requetes else None,
+        "latence_ms": dict(zip(libelles, self.histogramme)),
+      }
+
+
+client_passerelle = ClientPasserelle()
+
+
+def _entetes_passerelle() -> dict:
+  headers = {"Content-Type": "application/json"}
+  token = getattr(settings, "PUSH_GATEWAY_TOKEN", "")
+  if token:
+    headers["Authorization"] = f"Bearer {token}"
+  return headers
+
+
+def delai_lecture_lot(nb: int) -> float:
+  """Délai de lecture (s) d'un appel groupé de `nb` envois : couvre tout le lot côté passerelle."""
+  return 30 + 2 * nb
+
+
+def duree_max_lot(nb: int, concurrence: int = 1) -> float:
+  """
+  Durée maximale (s) de la transmission de `nb` envois, délais de connexion et de lecture
+  compris : un appel groupé si PUSH_GATEWAY_BATCH_URL est configuré, sinon des appels
+  unitaires par vagues de `concurrence`.
+  """
+  connexion = float(getattr(settings, "PUSH_HTTP_CONNECT_TIMEOUT", 5))
+  if getattr(settings, "PUSH_GATEWAY_BATCH_URL", ""):
+    return connexion + delai_lecture_lot(nb)
+  vagues = -(-nb // max(1, concurrence))
+  return vagues * (connexion + float(getattr(settings, "PUSH_HTTP_READ_TIMEOUT", 10)))
+
+
+def _appel_passerelle(payload: dict) -> tuple[bool, str]:
   """
   Envoie le payload JSON vers une passerelle HTTP externe.
+  Retourne (succès, message d'erreur) ; l'erreur est conservée par la file d'envoi.
 
   La configuration se fait via :
   - PUSH_GATEWAY_URL
@@ -38,24 +166,62 @@ def _post_to_gateway(payload: dict) -> bool:
     # Debug simple pour comprendre pourquoi rien ne part
     if getattr(settings, "DEBUG", False):
       print("[PUSH] PUSH_GATEWAY_URL manquant, aucun envoi effectué.")
-    return False
-  headers = {"Content-Type": "application/json"}
-  token = getattr(settings, "PUSH_GATEWAY_TOKEN", "")
-  if token:
-    headers["Authorization"] = f"Bearer {token}"
+    return False, "PUSH_GATEWAY_URL manquant"
   try:
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib_request.Request(url, data=data, headers=headers, method="POST")
     if getattr(settings, "DEBUG", False):
       print(f"[PUSH] Appel passerelle {url} avec payload={payload}")
-    with urllib_request.urlopen(req, timeout=10) as resp:
-      return resp.status in (200, 201, 202)
-  except (urllib_error.URLError, urllib_error.HTTPError, TimeoutError, Exception):
+    status, _ = client_passerelle.post_json(url, payload, headers=_entetes_passerelle())
+    if status in (200, 201, 202):
+      return True, ""
+    return False, f"HTTP {status}"
+  except Exception as e:
     if getattr(settings, "DEBUG", False):
       import traceback
       print("[PUSH] ERREUR lors de l'appel à la passerelle :")
       traceback.print_exc()
-    return False
+    return False, force_str(e)[:500] or e.__class__.__name__
+
+
+def _appel_passerelle_lot(payloads: list[dict]) -> list[tuple[bool, str]]:
+  """
+  Envoie plusieurs payloads en un seul appel à l'endpoint groupé de la passerelle
+  (PUSH_GATEWAY_BATCH_URL, route /send-batch). Retourne un (succès, erreur) par payload,
+  dans le même ordre ; en cas d'échec de l'appel lui-même, tous les envois sont en échec.
+  """
+  url = getattr(settings, "PUSH_GATEWAY_BATCH_URL", "")
+  if not url:
+    return [(False, "PUSH_GATEWAY_BATCH_URL manquant")] * len(payloads)
+  items = [{**p, "id": i} for i, p in enumerate(payloads)]
+  try:
+    # Le délai de lecture couvre l'ensemble des envois du lot côté passerelle
+    status, corps = client_passerelle.post_json(
+      url, {"items": items}, headers=_entetes_passerelle(), read_timeout=delai_lecture_lot(len(items)),
+    )
+    if not 200 <= status < 300:
+      return [(False, f"HTTP {status}")] * len(payloads)
+    reponse = json.loads(corps.decode("utf-8") or "{}")
+  except Exception as e:
+    if getattr(settings, "DEBUG", False):
+      import traceback
+      print("[PUSH] ERREUR lors de l'appel groupé à la passerelle :")
+      traceback.print_exc()
+    erreur = force_str(e)[:500] or e.__class__.__name__
+    return [(False, erreur)] * len(payloads)
+
+  resultats = [(False, "Absent de la réponse de la passerelle")] * len(payloads)
+  for r in reponse.get("results") or []:
+    i = r.get("id")
+    if isinstance(i, int) and 0 <= i < len(payloads):
+      resultats[i] = (bool(r.get("ok")), "" if r.get("ok") else force_str(r.get("error") or "Échec")[:500])
+  return resultats
+
+
+def _post_to_gateway(payload: dict) -> bool:
+  return _appel_passerelle(payload)[0]
+
+
+def _nom_utilisateur(user) -> str:
+  return (user.get_full_name() or user.username or "").strip()
 
 
 def send_push_to_user(user, message: str, contexte: str = "notification") -> bool:
@@ -77,7 +243,72 @@ def send_push_to_user(user, message: str, contexte: str = "notification") -> boo
     "message": force_str(message)[:4000],
     "context": contexte,
     "user_id": getattr(user, "id", None),
-    "user_name": (user.get_full_name() or user.username or "").strip(),
+    "user_name": _nom_utilisateur(user),
   }
   return _post_to_gateway(payload)
 
+
+
+# ───────────────────────────── File d'envoi ─────────────────────────────────
+# Les vues n'appellent plus la passerelle dans la requête HTTP : elles enregistrent
+# les envois (EnvoiPush) et la commande `process_push_queue` les traite en arrière-plan.
+
+def enqueue_push_to_users(users, message: str, contexte: str = "notification"):
+  """
+  Met en file un message externe pour chaque utilisateur ayant un numéro valide.
+  Retourne l'identifiant du lot (UUID) permettant de suivre les envois, ou None
+  si les envois externes sont désactivés ou si aucun destinataire n'est joignable.
+  """
+  if not getattr(settings, "PUSH_ENABLED", False):
+    return None
+  import uuid
+  from .models import EnvoiPush
+
+  lot = uuid.uuid4()
+  texte = force_str(message)[:4000]
+  envois = []
+  for user in users:
+    phone_e164 = _normalize_phone_to_e164(getattr(user, "telephone", "") or "")
+    if not phone_e164:
+      continue
+    envois.append(EnvoiPush(
+      lot=lot,
+      utilisateur=user,
+      nom_destinataire=_nom_utilisateur(user)[:200],
+      telephone=phone_e164,
+      message=texte,
+      contexte=contexte,
+    ))
+  if not envois:
+    return None
+  EnvoiPush.objects.bulk_create(envois, batch_size=500)
+  return lot
+
+
+def payload_envoi(envoi) -> dict:
+  """Payload passerelle d'un EnvoiPush (même format que send_push_to_user)."""
+  return {
+    "to": envoi.telephone,
+    "message": envoi.message,
+    "context": envoi.contexte,
+    "user_id": envoi.utilisateur_id,
+    "user_name": envoi.nom_destinataire,
+  }
+
+
+def dispatch_envoi(envoi) -> tuple[bool, str]:
+  """Transmet un EnvoiPush à la passerelle. N'écrit rien en base (appelable depuis un thread)."""
+  return _appel_passerelle(payload_envoi(envoi))
+
+
+def dispatch_envois(envois) -> list[tuple[bool, str]]:
+  """
+  Transmet une liste d'EnvoiPush via l'endpoint groupé (un appel HTTP par tranche de
+  PUSH_GATEWAY_BATCH_SIZE destinataires). N'écrit rien en base.
+  """
+  taille = max(1, getattr(settings, "PUSH_GATEWAY_BATCH_SIZE", 200))
+  resultats = []
+  for debut in range(0, len(envois), taille):
+    tranche = envois[debut:debut + taille]
+    resultats.extend(_appel_passerelle_lot([payload_envoi(e) for e in tranche]))
+  return resultats
@@ -0,0 +1,110 @@
+"""
+Traitement de la file d'envoi externe (EnvoiPush).
+
+Les envois dus sont réservés par lot (`select_for_update(skip_locked=True)`, plusieurs
+workers peuvent tourner en parallèle), transmis à la passerelle, puis marqués envoyés,
+replanifiés (délai exponentiel) ou en échec définitif.
+
+Si PUSH_GATEWAY_BATCH_URL est configuré, un lot réservé part en un seul appel HTTP
+(route /send-batch, la passerelle parallélise vers Wasender) ; sinon un appel par
+envoi, avec une concurrence bornée.
+"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EnvoiPush
+from .push import dispatch_envoi, dispatch_envois, duree_max_lot
+
+# Durée de réservation d'un envoi : passé ce délai, un envoi resté "en_cours"
+# (worker arrêté brutalement) redevient disponible. Au moins la durée maximale de
+# transmission du lot plus MARGE_RESERVATION, pour qu'un lot lent ne soit pas repris
+# (et envoyé deux fois) par un autre worker.
+DUREE_RESERVATION = timedelta(minutes=5)
+MARGE_RESERVATION = timedelta(minutes=2)
+# Délai maximal entre deux tentatives
+DELAI_MAX = timedelta(hours=6)
+
+
+def delai_reprise(tentatives: int) -> timedelta:
+    """Délai exponentiel avec gigue : base, 2×base, 4×base… plafonné à DELAI_MAX."""
+    base = getattr(settings, 'PUSH_RETRY_BASE_SECONDS', 30)
+    secondes = base * (2 ** max(0, tentatives - 1))
+    secondes = min(secondes, DELAI_MAX.total_seconds())
+    return timedelta(seconds=secondes * random.uniform(0.8, 1.2))
+
+
+def duree_reservation(taille_lot: int, concurrence: int = 1) -> timedelta:
+    """Durée de réservation d'un lot : sa transmission au plus lent, plus la marge."""
+    return max(
+        DUREE_RESERVATION,
+        timedelta(seconds=duree_max_lot(taille_lot, concurrence)) + MARGE_RESERVATION,
+    )
+
+
+def reserver_envois(taille_lot: int, concurrence: int = 1):
+    """
+    Réserve jusqu'à `taille_lot` envois dus et les passe "en_cours", pour la durée de
+    transmission du lot avec `concurrence` appels simultanés (voir traiter_envois).
+    """
+    maintenant = timezone.now()
+    with transaction.atomic():
+        envois = list(
+            EnvoiPush.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(statut='en_attente') | Q(statut='en_cours'),
+                prochaine_tentative__lte=maintenant,
+            )
+            .order_by('prochaine_tentative', 'id')[:taille_lot]
+        )
+        if envois:
+            EnvoiPush.objects.filter(id__in=[e.id for e in envois]).update(
+                statut='en_cours', prochaine_tentative=maintenant + duree_reservation(taille_lot, concurrence),
+            )
+    return envois
+
+
+def enregistrer_resultat(envoi, ok: bool, erreur: str = '', max_tentatives: int | None = None):
+    """Met à jour un envoi après l'appel à la passerelle."""
+    if max_tentatives is None:
+        max_tentatives = getattr(settings, 'PUSH_MAX_ATTEMPTS', 5)
+    maintenant = timezone.now()
+    envoi.tentatives += 1
+    if ok:
+        envoi.statut = 'envoye'
+        envoi.date_envoi = maintenant
+        envoi.derniere_erreur = ''
+    elif envoi.tentatives >= max_tentatives:
+        envoi.statut = 'echec'
+        envoi.derniere_erreur = erreur
+    else:
+        envoi.statut = 'en_attente'
+        envoi.prochaine_tentative = maintenant + delai_reprise(envoi.tentatives)
+        envoi.derniere_erreur = erreur
+    envoi.save(update_fields=['statut', 'tentatives', 'prochaine_tentative', 'date_envoi', 'derniere_erreur'])
+
+
+def traiter_envois(envois, concurrence: int, max_tentatives: int | None = None):
+    """
+    Transmet les envois réservés : en un appel groupé si l'endpoint /send-batch est
+    configuré, sinon avec au plus `concurrence` appels simultanés. Seuls les appels HTTP
+    tournent dans les threads ; les écritures en base restent dans le thread appelant.
+    Retourne (nb_envoyes, nb_reprogrammes, nb_echecs).
+    """
+    if not envois:
+        return 0, 0, 0
+    if getattr(settings, 'PUSH_GATEWAY_BATCH_URL', ''):
+        resultats = dispatch_envois(envois)
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, concurrence)) as pool:
+            resultats = list(pool.map(dispatch_envoi, envois))
+    compte = {'envoye': 0, 'en_attente': 0, 'echec': 0}
+    for envoi, (ok, erreur) in zip(envois, resultats):
+        enregistrer_resultat(envoi, ok, erreur, max_tentatives)
+        compte[envoi.statut] += 1
+    return compte['envoye'], compte['en_attente'], compte['echec']
@@ -1,19 +1,27 @@
 from rest_framework import serializers
-from .models import Message, CategorieForum, SujetForum, ReponseForum, Notification
+
+from apps.accounts.identites import IdentiteField
+from .models import Message, CategorieForum, SujetForum, ReponseForum, Notification, EnvoiPush
 
 
 class MessageSerializer(serializers.ModelSerializer):
-    expediteur_nom = serializers.CharField(source='expediteur.get_full_name', read_only=True)
-    destinataire_nom = serializers.CharField(source='destinataire.get_full_name', read_only=True)
-    expediteur_photo = serializers.ImageField(source='expediteur.photo', read_only=True)
-    expediteur_photo_updated_at = serializers.DateTimeField(source='expediteur.photo_updated_at', read_only=True)
-    destinataire_photo = serializers.ImageField(source='destinataire.photo', read_only=True)
-    destinataire_photo_updated_at = serializers.DateTimeField(source='destinataire.photo_updated_at', read_only=True)
+    # Personnes liées : identités en cache (accounts/identites.py), sans jointure
+    expediteur_nom = IdentiteField(cle='nom', source='expediteur_id')
+    destinataire_nom = IdentiteField(cle='nom', source='destinataire_id')
+    expediteur_photo = IdentiteField(cle='photo', source='expediteur_id')
+    expediteur_photo_thumb = IdentiteField(cle='photo_thumb', source='expediteur_id')
+    expediteur_photo_updated_at = IdentiteField(cle='photo_updated_at', source='expediteur_id')
+    destinataire_photo = IdentiteField(cle='photo', source='destinataire_id')
+    destinataire_photo_thumb = IdentiteField(cle='photo_thumb', source='destinataire_id')
+    destinataire_photo_updated_at = IdentiteField(cle='photo_updated_at', source='destinataire_id')
 
     class Meta:
         model = Message
         fields = '__all__'
-        read_only_fields = ['date_envoi', 'expediteur', 'date_lecture']
+        read_only_fields = [
+            'date_envoi', 'expediteur', 'date_lecture',
+            'est_lu', 'est_archive_expediteur', 'est_archive_destinataire',
+        ]
 
 
 class CategorieForumSerializer(serializers.ModelSerializer):
@@ -23,7 +31,7 @@ class CategorieForumSerializer(serializers.ModelSerializer):
 
 
 class ReponseForumSerializer(serializers.ModelSerializer):
-    auteur_nom = serializers.CharField(source='auteur.get_full_name', read_only=True)
+    auteur_nom = IdentiteField(cle='nom', source='auteur_id')
 
     class Meta:
         model = ReponseForum
@@ -32,7 +40,7 @@ class ReponseForumSerializer(serializers.ModelSerializer):
 
 
 class SujetForumSerializer(serializers.ModelSerializer):
-    auteur_nom = serializers.CharField(source='auteur.get_full_name', read_only=True)
+    auteur_nom = IdentiteField(cle='nom', source='auteur_id')
     categorie_nom = serializers.CharField(source='categorie.nom', read_only=True)
 
     class Meta:
@@ -48,3 +56,11 @@ class NotificationSerializer(serializers.ModelSerializer):
         model = Notification
         fields = '__all__'
         read_only_fields = ['date_creation', 'utilisateur', 'date_lecture']
+
+
+class EnvoiPushSerializer(serializers.ModelSerializer):
+    statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+
+    class Meta:
+        model = EnvoiPush
+        fields = '__all__'
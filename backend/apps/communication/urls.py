@@ -8,6 +8,7 @@ router.register(r'forums/categories', views.CategorieForumViewSet)
 router.register(r'forums/sujets', views.SujetForumViewSet)
 router.register(r'forums/reponses', views.ReponseForumViewSet)
 router.register(r'notifications', views.NotificationViewSet)
+router.register(r'envois-push', views.EnvoiPushViewSet)
 
 urlpatterns = [
     path('communication/', include(router.urls)),
@@ -1,19 +1,33 @@
+from django.db import transaction
 from django.db.models import Q
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from apps.accounts.permissions import IsAdminOrJewrinCommunication
+from utils.compteurs import CompteurVuesMixin
+from utils.images import chemin_derive, est_image
 
-from .models import Message, CategorieForum, SujetForum, ReponseForum, Notification
-from .push import send_push_to_user
-from .serializers import MessageSerializer, CategorieForumSerializer, SujetForumSerializer, ReponseForumSerializer, NotificationSerializer
+from .conversations import (
+    BoiteCursorPagination, ConversationCursorPagination,
+    boite_de_reception, contacts_avec_resume, serialiser_boite, serialiser_conversations, trier_contacts,
+    enregistrer_message, message_lu, conversation_lue, recalculer_conversation,
+)
+from .models import Message, CategorieForum, SujetForum, ReponseForum, Notification, EnvoiPush
+from .push import client_passerelle, enqueue_push_to_users
+from .serializers import (
+    MessageSerializer, CategorieForumSerializer, SujetForumSerializer, ReponseForumSerializer, NotificationSerializer,
+    EnvoiPushSerializer,
+)
 
 
 class MessageViewSet(viewsets.ModelViewSet):
     queryset = Message.objects.none()
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    # Pas de PUT / PATCH : lecture et archivage passent par marquer_lu, marquer_conversation_lue
+    # et la suppression, qui tiennent à jour les lignes Conversation (conversations.py)
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
     
     def destroy(self, request, *args, **kwargs):
         """Override destroy pour faire un soft delete au lieu d'une suppression physique."""
@@ -24,21 +38,28 @@ class MessageViewSet(viewsets.ModelViewSet):
         if instance.expediteur != user and instance.destinataire != user:
             return Response({'detail': 'Non autorisé'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Marquer comme archivé selon le rôle de l'utilisateur
-        if instance.expediteur == user:
-            instance.est_archive_expediteur = True
-            instance.save(update_fields=['est_archive_expediteur'])
-        elif instance.destinataire == user:
-            instance.est_archive_destinataire = True
-            instance.save(update_fields=['est_archive_destinataire'])
-        
+        self._archiver(instance, user)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def _archiver(self, msg, user):
+        """Archive le message du côté de `user` et recalcule sa conversation."""
+        with transaction.atomic():
+            # Marquer comme archivé selon le rôle de l'utilisateur
+            if msg.expediteur == user:
+                msg.est_archive_expediteur = True
+                msg.save(update_fields=['est_archive_expediteur'])
+                recalculer_conversation(user.id, msg.destinataire_id)
+            elif msg.destinataire == user:
+                msg.est_archive_destinataire = True
+                msg.save(update_fields=['est_archive_destinataire'])
+                recalculer_conversation(user.id, msg.expediteur_id)
+
     def get_queryset(self):
         user = self.request.user
         # Filtrer par contact si fourni dans les query params
         contact_id = self.request.query_params.get('contact_id')
-        base = Message.objects.select_related('expediteur', 'destinataire')
+        # Noms et photos des correspondants : identités en cache (MessageSerializer)
+        base = Message.objects.all()
         if contact_id:
             try:
                 contact_id_int = int(contact_id)
@@ -69,129 +90,66 @@ class MessageViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def destinataires(self, request):
-        """Liste de tous les membres de la daara que l'utilisateur connecté peut choisir comme destinataires."""
+        """
+        Liste de tous les membres de la daara que l'utilisateur connecté peut choisir comme destinataires.
+        ETag de la version de l'annuaire (304 si aucun compte n'a changé) ; pour une liste
+        paginée avec recherche, voir /api/auth/annuaire/.
+        """
+        from apps.accounts.annuaire import etag_membres, marquer, reponse_non_modifiee
         from apps.accounts.models import CustomUser
         user = request.user
+        etag = etag_membres(request, user.pk)
+        non_modifiee = reponse_non_modifiee(request, etag)
+        if non_modifiee is not None:
+            return non_modifiee
         # Utiliser seulement is_active car est_actif peut ne pas être défini pour tous les utilisateurs
-        qs = CustomUser.objects.filter(is_active=True).exclude(id=user.id).order_by('first_name', 'last_name')
+        lignes = (
+            CustomUser.objects.filter(is_active=True).exclude(id=user.id).order_by('first_name', 'last_name')
+            .values_list('id', 'first_name', 'last_name', 'email', 'photo', 'photo_updated_at')
+        )
         result = []
-        for u in qs:
-            photo = None
-            photo_updated_at = None
-            try:
-                if u.photo:
-                    photo = str(u.photo)
-                    photo_updated_at = u.photo_updated_at.isoformat() if u.photo_updated_at else None
-            except Exception:
-                photo = None
-                photo_updated_at = None
-            
+        for pk, first_name, last_name, email, photo, photo_updated_at in lignes:
+            first_name, last_name, email = first_name or '', last_name or '', email or ''
             result.append({
-                'id': u.id,
-                'first_name': u.first_name or '',
-                'last_name': u.last_name or '',
-                'email': u.email or '',
-                'photo': photo,
-                'photo_updated_at': photo_updated_at,
-                'full_name': u.get_full_name() or f'{u.first_name or ""} {u.last_name or ""}'.strip() or u.email or f'Utilisateur #{u.id}'
+                'id': pk,
+                'first_name': first_name,
+                'last_name': last_name,
+                'email': email,
+                'photo': photo or None,
+                'photo_thumb': chemin_derive(photo, 'thumb') if photo and est_image(photo) else None,
+                'photo_updated_at': photo_updated_at.isoformat() if photo and photo_updated_at else None,
+                'full_name': f'{first_name} {last_name}'.strip() or email or f'Utilisateur #{pk}',
             })
-        return Response(result)
-    
+        return marquer(Response(result), etag)
+
     @action(detail=False, methods=['get'])
     def conversations(self, request):
-        """Liste de tous les membres de la daara comme contacts (avec qui l'utilisateur a échangé ou non)."""
-        from apps.accounts.models import CustomUser
-        from django.db.models import Q
-        
-        user = request.user
-        
-        try:
-            # Récupérer tous les utilisateurs avec qui on a échangé
-            messages_sent = Message.objects.filter(expediteur=user).values_list('destinataire_id', flat=True).distinct()
-            messages_received = Message.objects.filter(destinataire=user).values_list('expediteur_id', flat=True).distinct()
-            contact_ids = set(list(messages_sent) + list(messages_received))
-        except Exception:
-            contact_ids = set()
-        
-        # Récupérer TOUS les membres actifs de la daara pour permettre de communiquer avec n'importe qui
-        # Utiliser seulement is_active car est_actif peut ne pas être défini pour tous les utilisateurs
-        try:
-            all_users = list(CustomUser.objects.filter(is_active=True).exclude(id=user.id).order_by('first_name', 'last_name'))
-        except Exception as e:
-            # En cas d'erreur, retourner une liste vide plutôt que de planter
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Erreur lors de la récupération des utilisateurs: {e}")
-            return Response([])
-        
-        conversations = []
-        for contact in all_users:
-            # Récupérer le dernier message avec ce contact (non archivé)
-            last_message = Message.objects.filter(
-                Q(expediteur=user, destinataire=contact, est_archive_expediteur=False) | 
-                Q(expediteur=contact, destinataire=user, est_archive_destinataire=False)
-            ).order_by('-date_envoi').first()
-            
-            # Compter les messages non lus de ce contact (non archivés)
-            unread_count = Message.objects.filter(
-                expediteur=contact,
-                destinataire=user,
-                est_lu=False,
-                est_archive_destinataire=False
-            ).count()
-            
-            contact_name = contact.get_full_name() or f'{contact.first_name or ""} {contact.last_name or ""}'.strip() or contact.email or f'Utilisateur #{contact.id}'
-            
-            # Gérer la photo de manière sécurisée - retourner le nom du fichier pour que le frontend construise l'URL
-            contact_photo = None
-            contact_photo_updated_at = None
-            try:
-                if contact.photo:
-                    # Retourner le chemin relatif du fichier (ex: photos_membres/xxx.jpg)
-                    contact_photo = str(contact.photo)
-                    contact_photo_updated_at = contact.photo_updated_at.isoformat() if contact.photo_updated_at else None
-            except Exception as e:
-                contact_photo = None
-                contact_photo_updated_at = None
-            
-            # Sérialiser le dernier message si disponible
-            last_message_data = None
-            if last_message:
-                try:
-                    last_message_data = MessageSerializer(last_message).data
-                except Exception as e:
-                    last_message_data = None
-            
-            conversations.append({
-                'contact_id': contact.id,
-                'contact_name': contact_name,
-                'contact_email': contact.email or '',
-                'contact_photo': contact_photo,
-                'contact_photo_updated_at': contact_photo_updated_at,
-                'last_message': last_message_data,
-                'unread_count': unread_count,
-                'has_conversation': contact.id in contact_ids,
-            })
-        
-        # Trier par dernier message (conversations avec messages en premier)
-        # Les conversations avec messages récents apparaissent en premier
-        try:
-            def sort_key(x):
-                if x['last_message'] and x['last_message'].get('date_envoi'):
-                    return (x['last_message']['date_envoi'], x['has_conversation'])
-                elif x['has_conversation']:
-                    return ('', True)
-                else:
-                    return ('', False)
-            
-            conversations.sort(key=sort_key, reverse=True)
-        except Exception as e:
-            # En cas d'erreur de tri, retourner quand même les conversations non triées
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Erreur lors du tri des conversations: {e}")
-        
-        return Response(conversations)
+        """
+        Liste de tous les membres de la daara comme contacts (avec qui l'utilisateur a échangé ou non),
+        avec dernier message et nombre de non lus, calculés en un nombre constant de requêtes.
+
+        Sans paramètre : liste complète (comportement historique).
+        Avec ?page_size=N ou ?cursor=... : pagination par curseur (conversations récentes d'abord).
+        Avec ?avec_messages=1 : uniquement les conversations ayant un message visible,
+        lues directement dans la table Conversation (parcours indexé).
+        """
+        pagine = 'cursor' in request.query_params or 'page_size' in request.query_params
+
+        if request.query_params.get('avec_messages') in ('1', 'true'):
+            boite = boite_de_reception(request.user)
+            if pagine:
+                paginator = BoiteCursorPagination()
+                page = paginator.paginate_queryset(boite, request, view=self)
+                return paginator.get_paginated_response(serialiser_boite(page))
+            return Response(serialiser_boite(boite))
+
+        contacts = contacts_avec_resume(request.user)
+        if pagine:
+            paginator = ConversationCursorPagination()
+            page = paginator.paginate_queryset(contacts, request, view=self)
+            return paginator.get_paginated_response(serialiser_conversations(page))
+
+        return Response(serialiser_conversations(trier_contacts(contacts)))
 
     def create(self, request, *args, **kwargs):
         # Gérer les destinataires depuis request.data (peut être une liste ou une valeur multiple depuis FormData)
@@ -263,14 +221,16 @@ class MessageViewSet(viewsets.ModelViewSet):
                 nouveau_nom = f"{nom_base}_{uid_int}{extension}"
                 fichier_copie = ContentFile(contenu_fichier, name=nouveau_nom)
             
-            # Créer un seul message pour ce destinataire
-            msg = Message.objects.create(
-                expediteur=expediteur,
-                destinataire=user,
-                sujet=sujet,
-                contenu=contenu,
-                fichier_joint=fichier_copie,
-            )
+            # Créer un seul message pour ce destinataire (et mettre à jour la conversation)
+            with transaction.atomic():
+                msg = Message.objects.create(
+                    expediteur=expediteur,
+                    destinataire=user,
+                    sujet=sujet,
+                    contenu=contenu,
+                    fichier_joint=fichier_copie,
+                )
+                enregistrer_message(msg)
             created.append(MessageSerializer(msg).data)
         
         if not created:
@@ -301,9 +261,12 @@ class MessageViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'Non autorisé'}, status=status.HTTP_403_FORBIDDEN)
         if not msg.est_lu:
             from django.utils import timezone
-            msg.est_lu = True
-            msg.date_lecture = timezone.now()
-            msg.save(update_fields=['est_lu', 'date_lecture'])
+            now = timezone.now()
+            with transaction.atomic():
+                # Mise à jour conditionnelle : de deux appels simultanés, un seul décompte le non lu
+                if Message.objects.filter(pk=msg.pk, est_lu=False).update(est_lu=True, date_lecture=now):
+                    message_lu(msg)
+            msg.refresh_from_db(fields=['est_lu', 'date_lecture'])
         return Response(MessageSerializer(msg).data)
 
     @action(detail=False, methods=['post'], url_path='marquer_conversation_lue')
@@ -318,11 +281,13 @@ class MessageViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'contact_id invalide.'}, status=status.HTTP_400_BAD_REQUEST)
         from django.utils import timezone
         now = timezone.now()
-        updated = Message.objects.filter(
-            expediteur_id=contact_id,
-            destinataire=request.user,
-            est_lu=False,
-        ).update(est_lu=True, date_lecture=now)
+        with transaction.atomic():
+            updated = Message.objects.filter(
+                expediteur_id=contact_id,
+                destinataire=request.user,
+                est_lu=False,
+            ).update(est_lu=True, date_lecture=now)
+            conversation_lue(request.user.id, contact_id)
         return Response({'detail': f'{updated} message(s) marqué(s) comme lu(s).', 'count': updated})
     
     @action(detail=True, methods=['post'], url_path='supprimer')
@@ -335,14 +300,7 @@ class MessageViewSet(viewsets.ModelViewSet):
         if msg.expediteur != user and msg.destinataire != user:
             return Response({'detail': 'Non autorisé'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Marquer comme archivé selon le rôle de l'utilisateur
-        if msg.expediteur == user:
-            msg.est_archive_expediteur = True
-            msg.save(update_fields=['est_archive_expediteur'])
-        elif msg.destinataire == user:
-            msg.est_archive_destinataire = True
-            msg.save(update_fields=['est_archive_destinataire'])
-        
+        self._archiver(msg, user)
         return Response(MessageSerializer(msg).data)
 
 
@@ -352,7 +310,7 @@ class CategorieForumViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
 
 
-class SujetForumViewSet(viewsets.ModelViewSet):
+class SujetForumViewSet(CompteurVuesMixin, viewsets.ModelViewSet):
     queryset = SujetForum.objects.all().order_by('-est_epingle', '-date_modification')
     serializer_class = SujetForumSerializer
     permission_classes = [IsAuthenticated]
@@ -445,6 +403,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
         ]
         Notification.objects.bulk_create(batch)
         nb_membres = len(batch)
+        lot_push = None
 
         # Notification externe (WhatsApp / SMS via passerelle) :
         # - type "evenement" ou "systeme" ou "finance"
@@ -458,13 +417,13 @@ class NotificationViewSet(viewsets.ModelViewSet):
             texte = f"[{type_notification.upper()}] {titre}\n\n{message}"
             if lien:
                 texte += f"\n\nPlus d'infos : {lien}"
-            for u in utilisateurs:
-                send_push_to_user(u, texte, contexte='notification')
+            # Mise en file : la commande process_push_queue se charge de l'envoi
+            lot_push = enqueue_push_to_users(utilisateurs, texte, contexte='notification')
 
-        return Response(
-            {'detail': f'1 message envoyé à {nb_membres} membre(s).', 'count': nb_membres},
-            status=status.HTTP_201_CREATED
-        )
+        data = {'detail': f'1 message envoyé à {nb_membres} membre(s).', 'count': nb_membres}
+        if lot_push:
+            data['push_lot'] = str(lot_push)
+        return Response(data, status=status.HTTP_201_CREATED)
 
     def perform_create(self, serializer):
         utilisateur_id = self.request.data.get('utilisateur')
@@ -483,3 +442,33 @@ class NotificationViewSet(viewsets.ModelViewSet):
         notif.date_lecture = timezone.now()
         notif.save()
         return Response(NotificationSerializer(notif).data)
+
+
+class EnvoiPushViewSet(viewsets.ReadOnlyModelViewSet):
+    """Suivi de la file des messages externes (WhatsApp / SMS). Filtrable par lot, statut, contexte."""
+    queryset = EnvoiPush.objects.select_related('utilisateur').order_by('-date_creation')
+    serializer_class = EnvoiPushSerializer
+    permission_classes = [IsAdminOrJewrinCommunication]
+    filterset_fields = ['lot', 'statut', 'contexte', 'utilisateur']
+
+    @action(detail=False, methods=['get'])
+    def resume(self, request):
+        """Nombre d'envois par statut, pour un lot (`?lot=<uuid>`) ou pour toute la file."""
+        from django.core.exceptions import ValidationError
+        from django.db.models import Count
+        qs = EnvoiPush.objects.all()
+        lot = request.query_params.get('lot')
+        if lot:
+            try:
+                qs = qs.filter(lot=lot)
+            except ValidationError:
+                return Response({'detail': 'lot invalide.'}, status=status.HTTP_400_BAD_REQUEST)
+        par_statut = {code: 0 for code, _ in EnvoiPush.STATUT_CHOICES}
+        for ligne in qs.values('statut').annotate(n=Count('id')):
+            par_statut[ligne['statut']] = ligne['n']
+        return Response({'lot': lot, 'total': sum(par_statut.values()), 'par_statut': par_statut})
+
+    @action(detail=False, methods=['get'])
+    def client(self, request):
+        """Compteurs du client HTTP de la passerelle pour ce processus (requêtes, réutilisations, latence)."""
+        return Response(client_passerelle.stats())
@@ -3,7 +3,7 @@ from django.utils.html import format_html
 from .models import (
     CategorieDocument, DocumentNumerique, MediaAudio, MediaVideo,
     ArchiveHistorique, AlbumPhoto, Photo,
-    Kourel, SeanceConservatoire, PresenceSeance, KhassidaRepetee
+    Kourel, SeanceConservatoire, PresenceSeance, KhassidaRepetee, AssiduiteMensuelle
 )
 
 
@@ -17,10 +17,12 @@ class CategorieDocumentAdmin(admin.ModelAdmin):
 
 @admin.register(DocumentNumerique)
 class DocumentNumeriqueAdmin(admin.ModelAdmin):
-    list_display = ['titre', 'auteur', 'type_document', 'categorie', 'langue', 'telechargements', 'vues', 'date_ajout']
-    list_filter = ['type_document', 'categorie', 'langue']
+    list_display = ['titre', 'auteur', 'type_document', 'categorie', 'langue', 'telechargements', 'vues', 'date_ajout', 'ingestion_statut']
+    list_filter = ['type_document', 'categorie', 'langue', 'ingestion_statut']
     search_fields = ['titre', 'auteur', 'isbn', 'tags']
-    readonly_fields = ['date_ajout', 'telechargements', 'vues', 'telecharge_par']
+    readonly_fields = ['date_ajout', 'telechargements', 'vues', 'telecharge_par',
+                       'metadonnees', 'miniature', 'ingestion_statut', 'ingestion_erreur', 'date_ingestion']
+    exclude = ['texte']
     date_hierarchy = 'date_ajout'
 
 
@@ -189,3 +191,17 @@ class KhassidaRepeteeAdmin(admin.ModelAdmin):
     list_display = ['nom_khassida', 'dathie', 'khassida_portion', 'seance', 'ordre']
     list_filter = ['dathie', 'seance__kourel']
     search_fields = ['nom_khassida', 'dathie']
+
+
+@admin.register(AssiduiteMensuelle)
+class AssiduiteMensuelleAdmin(admin.ModelAdmin):
+    list_display = ['membre', 'kourel', 'annee', 'mois', 'type_seance', 'nb_attendues', 'nb_presents', 'nb_abs_just', 'nb_abs_non_just']
+    list_filter = ['kourel', 'type_seance', 'annee']
+    search_fields = ['membre__first_name', 'membre__last_name', 'membre__username']
+    list_select_related = ['membre', 'kourel']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
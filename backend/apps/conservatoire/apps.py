@@ -5,3 +5,6 @@ class ConservatoireConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.conservatoire'
     verbose_name = 'Conservatoire'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (agrégat d'assiduité)
@@ -0,0 +1,239 @@
+"""
+Agrégat d'assiduité (table AssiduiteMensuelle : membre × kourel × mois × type de séance).
+
+- recalculer(bucket) / recalculer_membres(kourel_id, membres) : mise à jour incrémentale
+  d'un mois d'un kourel (ou des lignes de quelques membres), appelée par les signaux
+  (signals.py) et par l'enregistrement en masse des présences (presences.py)
+- reconstruire() : reconstruction complète (commande rebuild_assiduite, migration)
+- agreger() : lecture pour les rapports et les statistiques. Les mois entièrement
+  couverts par la période sont lus dans l'agrégat ; seuls les mois partiels en bordure
+  de période sont recalculés depuis les présences.
+
+Un « bucket » est (kourel_id, annee, mois, type_seance), le mois étant celui de la date
+locale de la séance (même convention que les filtres date_heure__date).
+"""
+import calendar
+from collections import defaultdict
+from datetime import date
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+CHAMPS_CLE = ('membre_id', 'kourel_id', 'annee', 'mois', 'type_seance')
+COMPTEURS = ('nb_attendues', 'nb_presents', 'nb_abs_just', 'nb_abs_non_just')
+
+
+def _modeles(apps=None):
+    """Modèles utilisés (registre courant, ou registre historique depuis une migration)."""
+    apps = apps or django_apps
+    Kourel = apps.get_model('conservatoire', 'Kourel')
+    return (
+        apps.get_model('conservatoire', 'SeanceConservatoire'),
+        apps.get_model('conservatoire', 'PresenceSeance'),
+        Kourel.membres.through,
+        apps.get_model('conservatoire', 'AssiduiteMensuelle'),
+    )
+
+
+def bucket_seance(kourel_id, date_heure, type_seance):
+    if timezone.is_aware(date_heure):
+        date_heure = timezone.localtime(date_heure)
+    return (kourel_id, date_heure.year, date_heure.month, type_seance)
+
+
+def _calculer(seances, membres=None, apps=None):
+    """
+    Compteurs bruts des séances `seances` :
+    {(membre_id, kourel_id, annee, mois, type_seance): [attendues, presents, abs_just, abs_non_just]}
+    `membres` : restreint le calcul à ces membres. 3 requêtes.
+    """
+    _, PresenceSeance, MembreKourel, _ = _modeles(apps)
+    seances = seances.order_by()
+    lignes = defaultdict(lambda: [0, 0, 0, 0])
+
+    nb_seances = list(
+        seances.annotate(annee=ExtractYear('date_heure'), mois=ExtractMonth('date_heure'))
+        .values('kourel_id', 'annee', 'mois', 'type_seance')
+        .annotate(n=Count('id'))
+    )
+    if not nb_seances:
+        return lignes
+
+    liens = MembreKourel.objects.filter(kourel_id__in={r['kourel_id'] for r in nb_seances})
+    if membres is not None:
+        liens = liens.filter(customuser_id__in=membres)
+    membres_par_kourel = defaultdict(list)
+    for kourel_id, membre_id in liens.values_list('kourel_id', 'customuser_id'):
+        membres_par_kourel[kourel_id].append(membre_id)
+    for r in nb_seances:
+        for membre_id in membres_par_kourel[r['kourel_id']]:
+            lignes[(membre_id, r['kourel_id'], r['annee'], r['mois'], r['type_seance'])][0] += r['n']
+
+    presences = PresenceSeance.objects.filter(seance__in=seances)
+    if membres is not None:
+        presences = presences.filter(membre_id__in=membres)
+    presences = (
+        presences.order_by()
+        .annotate(annee=ExtractYear('seance__date_heure'), mois=ExtractMonth('seance__date_heure'))
+        .values('membre_id', 'seance__kourel_id', 'annee', 'mois', 'seance__type_seance')
+        .annotate(
+            p=Count('id', filter=Q(statut='present')),
+            aj=Count('id', filter=Q(statut='absent_justifie')),
+            anj=Count('id', filter=Q(statut='absent_non_justifie')),
+        )
+    )
+    for r in presences:
+        ligne = lignes[(r['membre_id'], r['seance__kourel_id'], r['annee'], r['mois'], r['seance__type_seance'])]
+        ligne[1] += r['p']
+        ligne[2] += r['aj']
+        ligne[3] += r['anj']
+    return lignes
+
+
+def _enregistrer(lignes, apps=None):
+    AssiduiteMensuelle = _modeles(apps)[3]
+    AssiduiteMensuelle.objects.bulk_create(
+        [
+            AssiduiteMensuelle(**dict(zip(CHAMPS_CLE, cle)), **dict(zip(COMPTEURS, valeurs)))
+            for cle, valeurs in lignes.items()
+        ],
+        batch_size=1000,
+    )
+    return len(lignes)
+
+
+def recalculer(bucket):
+    """Recalcule les lignes d'un mois d'un kourel pour un type de séance."""
+    SeanceConservatoire, _, _, AssiduiteMensuelle = _modeles()
+    kourel_id, annee, mois, type_seance = bucket
+    with transaction.atomic():
+        AssiduiteMensuelle.objects.filter(
+            kourel_id=kourel_id, annee=annee, mois=mois, type_seance=type_seance,
+        ).delete()
+        _enregistrer(_calculer(SeanceConservatoire.objects.filter(
+            kourel_id=kourel_id, type_seance=type_seance,
+            date_heure__year=annee, date_heure__month=mois,
+        )))
+
+
+def recalculer_seances(seance_ids):
+    """Recalcule les buckets des séances données (écritures en masse sans signaux)."""
+    SeanceConservatoire = _modeles()[0]
+    buckets = {
+        bucket_seance(*valeurs)
+        for valeurs in SeanceConservatoire.objects.filter(pk__in=seance_ids)
+        .values_list('kourel_id', 'date_heure', 'type_seance')
+    }
+    for bucket in buckets:
+        recalculer(bucket)
+
+
+def recalculer_membres(kourel_id, membres):
+    """Recalcule toutes les lignes de quelques membres d'un kourel (ajout / retrait du kourel)."""
+    SeanceConservatoire, _, _, AssiduiteMensuelle = _modeles()
+    membres = list(membres)
+    with transaction.atomic():
+        AssiduiteMensuelle.objects.filter(kourel_id=kourel_id, membre_id__in=membres).delete()
+        _enregistrer(_calculer(SeanceConservatoire.objects.filter(kourel_id=kourel_id), membres=membres))
+
+
+def reconstruire(kourel_id=None, apps=None):
+    """Reconstruit l'agrégat (tous les kourels ou un seul). Retourne le nombre de lignes."""
+    SeanceConservatoire, _, _, AssiduiteMensuelle = _modeles(apps)
+    seances = SeanceConservatoire.objects.all()
+    lignes = AssiduiteMensuelle.objects.all()
+    if kourel_id:
+        seances = seances.filter(kourel_id=kourel_id)
+        lignes = lignes.filter(kourel_id=kourel_id)
+    with transaction.atomic():
+        lignes.delete()
+        return _enregistrer(_calculer(seances, apps=apps), apps=apps)
+
+
+# ───────────────────────────────── Lecture ─────────────────────────────────────
+
+def _fin_de_mois(annee, mois):
+    return date(annee, mois, calendar.monthrange(annee, mois)[1])
+
+
+def _mois_suivant(annee, mois):
+    return (annee + 1, 1) if mois == 12 else (annee, mois + 1)
+
+
+def _mois_precedent(annee, mois):
+    return (annee - 1, 12) if mois == 1 else (annee, mois - 1)
+
+
+def decouper_periode(date_debut=None, date_fin=None):
+    """
+    Découpe [date_debut, date_fin] (bornes optionnelles, incluses) en :
+    - un filtre Q sur (annee, mois) des mois entièrement couverts, ou None s'il n'y en a pas
+    - la liste des fenêtres (debut, fin) des mois partiels en bordure
+    """
+    if date_debut and date_fin and date_debut > date_fin:
+        return None, []
+    fenetres = []
+    premier = dernier = None
+    if date_debut:
+        premier = (date_debut.year, date_debut.month)
+        if date_debut.day != 1:
+            fin = _fin_de_mois(*premier)
+            fenetres.append((date_debut, min(fin, date_fin) if date_fin else fin))
+            premier = _mois_suivant(*premier)
+    if date_fin:
+        dernier = (date_fin.year, date_fin.month)
+        if date_fin != _fin_de_mois(*dernier):
+            debut = date(date_fin.year, date_fin.month, 1)
+            if not fenetres or fenetres[0][1] < debut:
+                fenetres.append((max(debut, date_debut) if date_debut else debut, date_fin))
+            dernier = _mois_precedent(*dernier)
+    if premier and dernier and premier > dernier:
+        return None, fenetres
+    q = Q()
+    if premier:
+        q &= Q(annee__gt=premier[0]) | Q(annee=premier[0], mois__gte=premier[1])
+    if dernier:
+        q &= Q(annee__lt=dernier[0]) | Q(annee=dernier[0], mois__lte=dernier[1])
+    return q, fenetres
+
+
+def agreger(par=(), kourel_id=None, type_seance=None, date_debut=None, date_fin=None):
+    """
+    Compteurs d'assiduité regroupés par `par` (sous-ensemble de CHAMPS_CLE, ex. ('membre_id',)) :
+    {tuple des valeurs de `par`: {nb_attendues, nb_presents, nb_abs_just, nb_abs_non_just}}.
+    Filtres : kourel, type de séance (None = tous), période (dates incluses).
+    """
+    SeanceConservatoire, _, _, AssiduiteMensuelle = _modeles()
+    par = tuple(par)
+    totaux = defaultdict(lambda: [0, 0, 0, 0])
+    mois_complets, fenetres = decouper_periode(date_debut, date_fin)
+
+    if mois_complets is not None:
+        qs = AssiduiteMensuelle.objects.filter(mois_complets)
+        if kourel_id:
+            qs = qs.filter(kourel_id=kourel_id)
+        if type_seance:
+            qs = qs.filter(type_seance=type_seance)
+        sommes = {c: Sum(c) for c in COMPTEURS}
+        lignes = qs.order_by().values(*par).annotate(**sommes) if par else [qs.aggregate(**sommes)]
+        for r in lignes:
+            total = totaux[tuple(r[c] for c in par)]
+            for i, c in enumerate(COMPTEURS):
+                total[i] += r[c] or 0
+
+    positions = [CHAMPS_CLE.index(c) for c in par]
+    for debut, fin in fenetres:
+        seances = SeanceConservatoire.objects.filter(date_heure__date__gte=debut, date_heure__date__lte=fin)
+        if kourel_id:
+            seances = seances.filter(kourel_id=kourel_id)
+        if type_seance:
+            seances = seances.filter(type_seance=type_seance)
+        for cle, valeurs in _calculer(seances).items():
+            total = totaux[tuple(cle[i] for i in positions)]
+            for i, v in enumerate(valeurs):
+                total[i] += v
+
+    return {cle: dict(zip(COMPTEURS, valeurs)) for cle, valeurs in totaux.items()}
@@ -5,10 +5,7 @@ from django.http import HttpResponse
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, BasePermission
 
-from .rapport_export import (
-    export_rapport_excel, export_rapport_pdf, export_rapport_csv,
-    export_membres_kourel_excel, export_membres_kourel_pdf,
-)
+from .rapport_export import export_membres_kourel_excel, export_membres_kourel_pdf
 
 
 class IsAdminUserOrRole(BasePermission):
@@ -55,32 +52,22 @@ class RapportSeancesExportView(APIView):
         if fmt not in ('pdf', 'excel', 'xlsx', 'csv'):
             fmt = 'excel'
 
-        date_debut = _parse_date(request.query_params.get('date_debut'))
-        date_fin   = _parse_date(request.query_params.get('date_fin'))
-        kourel_id  = request.query_params.get('kourel_id')
-        if kourel_id:
-            try:
-                kourel_id = int(kourel_id)
-            except ValueError:
-                kourel_id = None
-
-        parts = ['rapport_seances']
-        if date_debut and date_fin:
-            parts += [str(date_debut), str(date_fin)]
-        else:
-            parts.append('toutes')
-        if kourel_id:
-            parts.append(f'kourel{kourel_id}')
-        filename = '_'.join(parts)
-
-        if fmt in ('excel', 'xlsx'):
-            buf = export_rapport_excel(date_debut, date_fin, kourel_id=kourel_id)
-        elif fmt == 'pdf':
-            buf = export_rapport_pdf(date_debut, date_fin, kourel_id=kourel_id)
-        else:
-            buf = export_rapport_csv(date_debut, date_fin, kourel_id=kourel_id)
+        if request.query_params.get('asynchrone') in ('1', 'true'):
+            from rest_framework.response import Response
+            from apps.rapports.views import creer_export
+            data, code = creer_export(request.user, 'seances', fmt, request.query_params.dict())
+            return Response(data, status=code)
 
-        return _send_file(buf, fmt, filename)
+        # Servi depuis le cache des rapports (ETag / 304, régénéré si les données changent)
+        from rest_framework.response import Response
+        from apps.rapports.cache import servir_rapport
+        from apps.rapports.registre import TYPES_RAPPORT, normaliser_format
+        params = TYPES_RAPPORT['seances']['parametres'](request.query_params)
+        filename = TYPES_RAPPORT['seances']['nom_fichier'](params)
+        resp = servir_rapport(request, 'seances', normaliser_format(fmt), request.query_params, filename)
+        if resp is None:
+            return Response({'detail': 'Erreur génération.'}, status=500)
+        return resp
 
 
 class FicheKourelExportView(APIView):
@@ -102,6 +89,12 @@ class FicheKourelExportView(APIView):
         if fmt not in ('excel', 'xlsx', 'pdf'):
             fmt = 'excel'
 
+        if request.query_params.get('asynchrone') in ('1', 'true'):
+            from rest_framework.response import Response
+            from apps.rapports.views import creer_export
+            data, code = creer_export(request.user, 'fiche_kourel', fmt, {'kourel_id': kourel.pk})
+            return Response(data, status=code)
+
         filename = f"membres_{kourel.nom.replace(' ', '_')}"
         if fmt in ('excel', 'xlsx'):
             buf = export_membres_kourel_excel(kourel.pk)
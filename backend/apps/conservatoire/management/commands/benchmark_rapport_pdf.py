@@ -0,0 +1,52 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.conservatoire.rapport_export import export_rapport_pdf
+from utils.pdf_parallele import nb_processus, parallele_disponible
+
+
+def _date(valeur):
+    try:
+        return datetime.strptime(valeur, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Date invalide : {valeur} (format YYYY-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = "Compare le temps de génération du rapport PDF des séances : rendu séquentiel et rendu parallèle"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-debut', help='YYYY-MM-DD')
+        parser.add_argument('--date-fin', help='YYYY-MM-DD')
+        parser.add_argument('--kourel', type=int)
+        parser.add_argument('--processus', type=int, nargs='+',
+                            help='Nombres de processus à mesurer (défaut : EXPORT_PDF_WORKERS)')
+        parser.add_argument('--repetitions', type=int, default=3)
+
+    def handle(self, *args, **options):
+        if not parallele_disponible():
+            raise CommandError('Rendu parallèle indisponible (pypdf absent ou fork non supporté).')
+        params = {
+            'date_debut': _date(options['date_debut']) if options.get('date_debut') else None,
+            'date_fin': _date(options['date_fin']) if options.get('date_fin') else None,
+            'kourel_id': options.get('kourel'),
+        }
+        repetitions = max(1, options['repetitions'])
+
+        def mesurer(processus):
+            durees = []
+            for _ in range(repetitions):
+                debut = time.perf_counter()
+                buf = export_rapport_pdf(processus=processus, **params)
+                durees.append(time.perf_counter() - debut)
+            return min(durees), len(buf.getvalue())
+
+        reference, taille = mesurer(1)
+        self.stdout.write(f'séquentiel      : {reference:.2f} s ({taille // 1024} Ko)')
+        for processus in options.get('processus') or [nb_processus()]:
+            duree, taille = mesurer(processus)
+            self.stdout.write(self.style.SUCCESS(
+                f'{processus:2d} processus    : {duree:.2f} s ({taille // 1024} Ko) — x{reference / duree:.2f}'
+            ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.conservatoire.assiduite import reconstruire
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'agrégat d'assiduité mensuelle (membre × kourel × mois) depuis les présences"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kourel', type=int, help='Limiter la reconstruction à ce kourel')
+
+    def handle(self, *args, **options):
+        nb = reconstruire(kourel_id=options.get('kourel'))
+        self.stdout.write(self.style.SUCCESS(f'{nb} ligne(s) d\'assiduité reconstruite(s).'))
@@ -0,0 +1,26 @@
+# Horodatage de modification : sert de version des données pour le cache des rapports
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conservatoire', '0011_ensure_kourel_fks_exist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seanceconservatoire',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='presenceseance',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Agrégat d'assiduité mensuelle (membre × kourel × mois × type de séance), rempli à la création
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def remplir(apps, schema_editor):
+    from apps.conservatoire.assiduite import reconstruire
+    reconstruire(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('conservatoire', '0012_seance_presence_date_modification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssiduiteMensuelle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee', models.PositiveSmallIntegerField()),
+                ('mois', models.PositiveSmallIntegerField()),
+                ('type_seance', models.CharField(choices=[('repetition', 'Répétition'), ('prestation', 'Prestation')], max_length=20)),
+                ('nb_attendues', models.PositiveIntegerField(default=0)),
+                ('nb_presents', models.PositiveIntegerField(default=0)),
+                ('nb_abs_just', models.PositiveIntegerField(default=0)),
+                ('nb_abs_non_just', models.PositiveIntegerField(default=0)),
+                ('kourel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assiduites', to='conservatoire.kourel')),
+                ('membre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assiduites', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Assiduité mensuelle',
+                'verbose_name_plural': 'Assiduités mensuelles',
+                'indexes': [
+                    models.Index(fields=['kourel', 'annee', 'mois'], name='assiduite_kourel_mois_idx'),
+                    models.Index(fields=['annee', 'mois'], name='assiduite_mois_idx'),
+                ],
+                'unique_together': {('membre', 'kourel', 'annee', 'mois', 'type_seance')},
+            },
+        ),
+        migrations.RunPython(remplir, migrations.RunPython.noop),
+    ]
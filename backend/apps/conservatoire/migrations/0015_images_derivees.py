@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:19
+
+from django.db import migrations
+import utils.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conservatoire', '0014_ingestion_pdf'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='albumphoto',
+            name='couverture',
+            field=utils.images.ImageDeriveeField(blank=True, null=True, upload_to='conservatoire/albums/couvertures/'),
+        ),
+        migrations.AlterField(
+            model_name='photo',
+            name='fichier',
+            field=utils.images.ImageDeriveeField(upload_to='conservatoire/photos/'),
+        ),
+    ]
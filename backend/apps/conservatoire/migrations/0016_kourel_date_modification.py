@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conservatoire', '0015_images_derivees'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kourel',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True, db_index=True, help_text='Version des données (cache des rapports) ; avancée aussi par les changements de membres'),
+        ),
+    ]
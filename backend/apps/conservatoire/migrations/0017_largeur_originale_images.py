@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:57
+
+from django.db import migrations, models
+import utils.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conservatoire', '0016_kourel_date_modification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='albumphoto',
+            name='couverture_largeur',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)", null=True),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='fichier_largeur',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)", null=True),
+        ),
+        migrations.AlterField(
+            model_name='albumphoto',
+            name='couverture',
+            field=utils.images.ImageDeriveeField(blank=True, largeur_field='couverture_largeur', null=True, upload_to='conservatoire/albums/couvertures/'),
+        ),
+        migrations.AlterField(
+            model_name='photo',
+            name='fichier',
+            field=utils.images.ImageDeriveeField(largeur_field='fichier_largeur', upload_to='conservatoire/photos/'),
+        ),
+    ]
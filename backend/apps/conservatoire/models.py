@@ -1,5 +1,7 @@
 from django.db import models
 from apps.accounts.models import CustomUser
+from utils.images import ImageDeriveeField
+from utils.ingestion_pdf import PDFIngere
 
 
 class CategorieDocument(models.Model):
@@ -18,7 +20,8 @@ class CategorieDocument(models.Model):
         return self.nom
 
 
-class DocumentNumerique(models.Model):
+class DocumentNumerique(PDFIngere):
+    """Document PDF ; nombre de pages, métadonnées, texte et miniature extraits par l'ingestion."""
     TYPE_CHOICES = [
         ('livre', 'Livre'),
         ('article', 'Article'),
@@ -29,6 +32,8 @@ class DocumentNumerique(models.Model):
         ('autre', 'Autre'),
     ]
 
+    champ_pdf = 'fichier'
+
     titre = models.CharField(max_length=200)
     auteur = models.CharField(max_length=200)
     categorie = models.ForeignKey(CategorieDocument, on_delete=models.SET_NULL, null=True, blank=True)
@@ -36,7 +41,6 @@ class DocumentNumerique(models.Model):
     description = models.TextField(blank=True)
     fichier = models.FileField(upload_to='conservatoire/documents/')
     couverture = models.ImageField(upload_to='conservatoire/couvertures/', null=True, blank=True)
-    nombre_pages = models.IntegerField(null=True, blank=True)
     annee_publication = models.IntegerField(null=True, blank=True)
     editeur = models.CharField(max_length=200, blank=True)
     isbn = models.CharField(max_length=50, blank=True)
@@ -163,7 +167,8 @@ class AlbumPhoto(models.Model):
     titre = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     date_evenement = models.DateField()
-    couverture = models.ImageField(upload_to='conservatoire/albums/couvertures/', null=True, blank=True)
+    couverture = ImageDeriveeField(upload_to='conservatoire/albums/couvertures/', null=True, blank=True, largeur_field='couverture_largeur')
+    couverture_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)")
     cree_par = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     date_creation = models.DateTimeField(auto_now_add=True)
     est_public = models.BooleanField(default=True)
@@ -181,7 +186,8 @@ class Photo(models.Model):
     album = models.ForeignKey(AlbumPhoto, on_delete=models.CASCADE, related_name='photos')
     titre = models.CharField(max_length=200, blank=True)
     description = models.TextField(blank=True)
-    fichier = models.ImageField(upload_to='conservatoire/photos/')
+    fichier = ImageDeriveeField(upload_to='conservatoire/photos/', largeur_field='fichier_largeur')
+    fichier_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)")
     date_prise = models.DateField(null=True, blank=True)
     lieu = models.CharField(max_length=200, blank=True)
     photographe = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='photos_prises')
@@ -223,6 +229,10 @@ class Kourel(models.Model):
         help_text="Jewrine responsable de ce kourel"
     )
     ordre = models.IntegerField(default=0)
+    date_modification = models.DateTimeField(
+        auto_now=True, db_index=True,
+        help_text="Version des données (cache des rapports) ; avancée aussi par les changements de membres"
+    )
 
     class Meta:
         verbose_name = 'Kourel'
@@ -248,6 +258,7 @@ class SeanceConservatoire(models.Model):
     lieu = models.CharField(max_length=200, blank=True)
     cree_par = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     date_creation = models.DateTimeField(auto_now_add=True)
+    date_modification = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = 'Séance Conservatoire'
@@ -292,6 +303,7 @@ class PresenceSeance(models.Model):
     membre = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='presences_seances')
     statut = models.CharField(max_length=30, choices=STATUT_CHOICES, default='present')
     remarque = models.TextField(blank=True, help_text="Justification ou remarque si absent justifié")
+    date_modification = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = 'Présence à une séance'
@@ -301,3 +313,33 @@ class PresenceSeance(models.Model):
 
     def __str__(self):
         return f"{self.membre.get_full_name()} — {self.seance} — {self.get_statut_display()}"
+
+
+class AssiduiteMensuelle(models.Model):
+    """
+    Agrégat des présences par membre, kourel, mois et type de séance.
+    Tenu à jour à chaque écriture de séance / présence / membres de kourel (voir assiduite.py) ;
+    reconstruit par la commande rebuild_assiduite.
+    nb_attendues : séances du kourel dans le mois si le membre en fait partie (sinon 0).
+    """
+    membre = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='assiduites')
+    kourel = models.ForeignKey(Kourel, on_delete=models.CASCADE, related_name='assiduites')
+    annee = models.PositiveSmallIntegerField()
+    mois = models.PositiveSmallIntegerField()
+    type_seance = models.CharField(max_length=20, choices=SeanceConservatoire.TYPE_CHOICES)
+    nb_attendues = models.PositiveIntegerField(default=0)
+    nb_presents = models.PositiveIntegerField(default=0)
+    nb_abs_just = models.PositiveIntegerField(default=0)
+    nb_abs_non_just = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Assiduité mensuelle'
+        verbose_name_plural = 'Assiduités mensuelles'
+        unique_together = ['membre', 'kourel', 'annee', 'mois', 'type_seance']
+        indexes = [
+            models.Index(fields=['kourel', 'annee', 'mois'], name='assiduite_kourel_mois_idx'),
+            models.Index(fields=['annee', 'mois'], name='assiduite_mois_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.membre_id} — {self.kourel_id} — {self.mois:02d}/{self.annee} ({self.type_seance})"
@@ -0,0 +1,123 @@
+"""
+Enregistrement en masse des présences et des khassidas d'une ou plusieurs séances.
+
+Présences : une lecture de l'existant, puis un seul `bulk_create(update_conflicts=True)`
+sur (seance, membre) pour les lignes nouvelles ou modifiées — au lieu d'un
+update_or_create (2 requêtes) par membre. Khassidas : suppression + `bulk_create`.
+Chaque opération s'exécute dans une transaction et retourne un résumé des changements.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .assiduite import recalculer_seances
+from .models import Kourel, KhassidaRepetee, PresenceSeance, SeanceConservatoire
+
+STATUTS = {s for s, _ in PresenceSeance.STATUT_CHOICES}
+
+
+def _entier(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _normaliser(items):
+    """[{membre, statut, remarque}] -> {membre_id: (statut, remarque)} (le dernier l'emporte)."""
+    marques = {}
+    for item in items or []:
+        if not isinstance(item, dict):
+            continue
+        mid = _entier(item.get('membre'))
+        if mid is None:
+            continue
+        statut = item.get('statut', 'present')
+        if statut not in STATUTS:
+            statut = 'present'
+        marques[mid] = (statut, item.get('remarque') or '')
+    return marques
+
+
+@transaction.atomic
+def enregistrer_presences(lots):
+    """
+    `lots` : [(seance, items)] avec `items` au format du payload "presences".
+    Seuls les membres du kourel de la séance sont pris en compte.
+    Retourne, par séance : {seance, crees, modifies, inchanges, ignores}
+    (crees / modifies / ignores : listes d'identifiants de membres).
+    3 requêtes quel que soit le nombre de séances et de membres.
+    """
+    lots = [(seance, _normaliser(items)) for seance, items in lots]
+    if not lots:
+        return []
+    seance_ids = [seance.pk for seance, _ in lots]
+
+    membres_par_kourel = {}
+    for kourel_id, membre_id in Kourel.membres.through.objects.filter(
+        kourel_id__in={seance.kourel_id for seance, _ in lots}
+    ).values_list('kourel_id', 'customuser_id'):
+        membres_par_kourel.setdefault(kourel_id, set()).add(membre_id)
+
+    existantes = {
+        (sid, mid): (statut, remarque)
+        for sid, mid, statut, remarque in PresenceSeance.objects.filter(
+            seance_id__in=seance_ids
+        ).values_list('seance_id', 'membre_id', 'statut', 'remarque')
+    }
+
+    a_ecrire = []
+    resultats = []
+    for seance, marques in lots:
+        membres = membres_par_kourel.get(seance.kourel_id, set())
+        diff = {'seance': seance.pk, 'crees': [], 'modifies': [], 'inchanges': 0, 'ignores': []}
+        for mid, (statut, remarque) in marques.items():
+            if mid not in membres:
+                diff['ignores'].append(mid)
+                continue
+            avant = existantes.get((seance.pk, mid))
+            if avant == (statut, remarque):
+                diff['inchanges'] += 1
+                continue
+            diff['crees' if avant is None else 'modifies'].append(mid)
+            a_ecrire.append(PresenceSeance(seance_id=seance.pk, membre_id=mid, statut=statut, remarque=remarque))
+        resultats.append(diff)
+
+    if a_ecrire:
+        PresenceSeance.objects.bulk_create(
+            a_ecrire,
+            update_conflicts=True,
+            unique_fields=['seance', 'membre'],
+            update_fields=['statut', 'remarque', 'date_modification'],
+        )
+        # bulk_create n'émet pas de signaux : mise à jour explicite de l'agrégat d'assiduité
+        recalculer_seances({p.seance_id for p in a_ecrire})
+    return resultats
+
+
+def remplacer_khassidas(seance, items):
+    """
+    Remplace les khassidas de la séance (les entrées sans nom ou sans dathie sont ignorées).
+    Retourne {seance, supprimees, creees}.
+    """
+    nouvelles = []
+    for i, item in enumerate(items or []):
+        if not isinstance(item, dict):
+            continue
+        nom = (item.get('nom_khassida') or '').strip()
+        dathie = (item.get('dathie') or '').strip()
+        if not nom or not dathie:
+            continue
+        nouvelles.append(KhassidaRepetee(
+            seance_id=seance.pk,
+            nom_khassida=nom,
+            dathie=dathie,
+            khassida_portion=(item.get('khassida_portion') or '').strip(),
+            ordre=item.get('ordre', i),
+        ))
+    with transaction.atomic():
+        supprimees, _ = KhassidaRepetee.objects.filter(seance_id=seance.pk).delete()
+        KhassidaRepetee.objects.bulk_create(nouvelles)
+        # Les khassidas figurent dans les rapports : la séance change de version (cache des rapports)
+        SeanceConservatoire.objects.filter(pk=seance.pk).update(date_modification=timezone.now())
+    return {'seance': seance.pk, 'supprimees': supprimees, 'creees': len(nouvelles)}
+
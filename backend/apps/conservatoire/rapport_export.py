@@ -3,11 +3,17 @@ Export des rapports de séances de répétition en PDF, Excel ou CSV.
 Inclut toutes les séances, présences, statistiques et infos des kourels
 (responsable, maitres de cœur, jewrine).
 """
-from .models import SeanceConservatoire, PresenceSeance, Kourel
+from apps.accounts import identites
+
+from .models import PresenceSeance, SeanceConservatoire, Kourel
 
 
 # ─────────────────────────────── Helpers ────────────────────────────────────
 
+# Séances lues par lots pour le détail (présences / khassidas préchargées par lot)
+SEANCES_PAR_LOT = 200
+
+
 def _get_queryset(date_debut=None, date_fin=None, kourel_id=None):
     qs = SeanceConservatoire.objects.filter(type_seance='repetition')
     if date_debut:
@@ -16,69 +22,78 @@ def _get_queryset(date_debut=None, date_fin=None, kourel_id=None):
         qs = qs.filter(date_heure__date__lte=date_fin)
     if kourel_id:
         qs = qs.filter(kourel_id=kourel_id)
-    return qs.select_related(
-        'kourel',
-        'kourel__responsable',
-        'kourel__maitre_de_coeur',
-        'kourel__maitre_de_coeur_2',
-        'kourel__jewrine',
-    ).prefetch_related(
-        'presences', 'presences__membre', 'khassidas', 'kourel__membres'
-    ).order_by('date_heure')
-
-
-def _get_stats_par_membre(qs):
-    """[{membre, nom, kourel, nb_seances_attendues, nb_presents, nb_abs_just, nb_abs_non_just, taux_presence}]"""
-    from collections import defaultdict
-    seance_ids = list(qs.values_list('id', flat=True))
-    membre_seances = defaultdict(set)
-    membre_kourel = {}
-    for seance in qs.select_related('kourel'):
-        kourel = seance.kourel
-        if not kourel:
-            continue
-        for m in kourel.membres.all():
-            membre_seances[m.id].add(seance.id)
-            if m.id not in membre_kourel:
-                membre_kourel[m.id] = (m, kourel.nom)
-    presences = PresenceSeance.objects.filter(seance_id__in=seance_ids).select_related('membre')
-    from collections import defaultdict
-    membre_presents = defaultdict(int)
-    membre_abs_just = defaultdict(int)
-    membre_abs_non_just = defaultdict(int)
-    for p in presences:
-        mid = p.membre_id
-        if p.statut == 'present':
-            membre_presents[mid] += 1
-        elif p.statut == 'absent_justifie':
-            membre_abs_just[mid] += 1
-        else:
-            membre_abs_non_just[mid] += 1
+    # Noms des encadrants et des membres : identités en cache (identites.py), sans jointure
+    return qs.select_related('kourel').prefetch_related('presences', 'khassidas').order_by('date_heure')
+
+
+def _noms_membres(qs):
+    """{id: nom} des membres ayant une présence dans les séances `qs` (une lecture)."""
+    ids = PresenceSeance.objects.filter(seance__in=qs.order_by()).values_list('membre_id', flat=True).distinct()
+    return {pk: identite['nom'] for pk, identite in identites.get_many(ids).items()}
+
+
+def _get_stats_par_membre(date_debut=None, date_fin=None, kourel_id=None):
+    """
+    [{membre_id, nom, kourel, nb_seances_attendues, nb_presents, nb_abs_just, nb_abs_non_just, taux_presence}]
+    Répétitions de la période, lues dans l'agrégat d'assiduité (membres actuels des kourels).
+    """
+    from .assiduite import agreger
+
+    lignes = agreger(('membre_id', 'kourel_id'), kourel_id=kourel_id, type_seance='repetition',
+                     date_debut=date_debut, date_fin=date_fin)
+    par_membre = {}
+    for (mid, kid), c in lignes.items():
+        m = par_membre.setdefault(mid, {'kourels': [], 'nb_attendues': 0, 'nb_presents': 0,
+                                        'nb_abs_just': 0, 'nb_abs_non_just': 0})
+        if c['nb_attendues']:
+            m['kourels'].append(kid)
+        for k in ('nb_attendues', 'nb_presents', 'nb_abs_just', 'nb_abs_non_just'):
+            m[k] += c[k]
+    par_membre = {mid: m for mid, m in par_membre.items() if m['nb_attendues']}
+
+    membres = identites.get_many(par_membre)
+    kourels = {
+        k.pk: k.nom for k in Kourel.objects.filter(
+            pk__in={kid for m in par_membre.values() for kid in m['kourels']}
+        ).order_by('ordre', 'nom').only('nom')
+    }
     result = []
-    for mid, seance_ids_att in membre_seances.items():
-        nb_attendues = len(seance_ids_att)
-        nb_pres = membre_presents[mid]
-        nb_aj = membre_abs_just[mid]
-        nb_anj = membre_abs_non_just[mid]
-        taux = round(100 * nb_pres / nb_attendues, 1) if nb_attendues else 0
-        m, kourel_nom = membre_kourel.get(mid, (None, ''))
-        nom = m.get_full_name() if m else f'Membre #{mid}'
+    for mid, s in par_membre.items():
+        nb_attendues = s['nb_attendues']
+        m = membres.get(mid)
         result.append({
-            'membre_id': mid, 'membre': m, 'nom': nom, 'kourel': kourel_nom,
-            'nb_seances_attendues': nb_attendues, 'nb_presents': nb_pres,
-            'nb_abs_just': nb_aj, 'nb_abs_non_just': nb_anj,
-            'taux_presence': taux
+            'membre_id': mid, 'nom': m['nom'] if m else f'Membre #{mid}',
+            'kourel': ', '.join(nom for kid, nom in kourels.items() if kid in s['kourels']),
+            'nb_seances_attendues': nb_attendues, 'nb_presents': s['nb_presents'],
+            'nb_abs_just': s['nb_abs_just'], 'nb_abs_non_just': s['nb_abs_non_just'],
+            'taux_presence': round(100 * s['nb_presents'] / nb_attendues, 1) if nb_attendues else 0,
         })
     return sorted(result, key=lambda x: (-x['taux_presence'], x['nom']))
 
 
+def _get_stats_globales(date_debut=None, date_fin=None, kourel_id=None):
+    """Totaux des marquages de présence des répétitions de la période (agrégat d'assiduité)."""
+    from .assiduite import agreger
+    c = agreger((), kourel_id=kourel_id, type_seance='repetition',
+                date_debut=date_debut, date_fin=date_fin).get((), {})
+    nb_presents = c.get('nb_presents', 0)
+    nb_total = nb_presents + c.get('nb_abs_just', 0) + c.get('nb_abs_non_just', 0)
+    return {
+        'nb_total': nb_total,
+        'nb_presents': nb_presents,
+        'nb_abs_just': c.get('nb_abs_just', 0),
+        'nb_abs_non_just': c.get('nb_abs_non_just', 0),
+        'taux_presence': round(100 * nb_presents / nb_total, 1) if nb_total else 0,
+    }
+
+
 def _kourel_encadrement(kourel):
-    """Retourne un dict avec les noms des encadrants d'un kourel."""
+    """Retourne un dict avec les noms des encadrants d'un kourel (identités en cache)."""
     return {
-        'responsable': kourel.responsable.get_full_name() if kourel.responsable else '—',
-        'maitre_1': kourel.maitre_de_coeur.get_full_name() if kourel.maitre_de_coeur else '—',
-        'maitre_2': kourel.maitre_de_coeur_2.get_full_name() if kourel.maitre_de_coeur_2 else '—',
-        'jewrine': kourel.jewrine.get_full_name() if kourel.jewrine else '—',
+        'responsable': identites.nom(kourel.responsable_id, '—'),
+        'maitre_1': identites.nom(kourel.maitre_de_coeur_id, '—'),
+        'maitre_2': identites.nom(kourel.maitre_de_coeur_2_id, '—'),
+        'jewrine': identites.nom(kourel.jewrine_id, '—'),
     }
 
 
@@ -135,13 +150,10 @@ def export_rapport_excel(date_debut=None, date_fin=None, kourel_id=None):
     ws_stats = wb.active
     ws_stats.title = "Statistiques"
 
-    presences_all = PresenceSeance.objects.filter(seance__in=qs)
     nb_seances = qs.count()
-    nb_total = presences_all.count()
-    nb_presents = presences_all.filter(statut='present').count()
-    nb_abs_just = presences_all.filter(statut='absent_justifie').count()
-    nb_abs_non_just = presences_all.filter(statut='absent_non_justifie').count()
-    taux_presence = round(100 * nb_presents / nb_total, 1) if nb_total else 0
+    g = _get_stats_globales(date_debut, date_fin, kourel_id)
+    nb_total, nb_presents, taux_presence = g['nb_total'], g['nb_presents'], g['taux_presence']
+    nb_abs_just, nb_abs_non_just = g['nb_abs_just'], g['nb_abs_non_just']
 
     ws_stats.merge_cells('A1:C1')
     title_cell = ws_stats.cell(row=1, column=1, value="Rapport des Séances de Répétition — DBM")
@@ -183,9 +195,7 @@ def export_rapport_excel(date_debut=None, date_fin=None, kourel_id=None):
         'Kourel', 'Responsable', '1er Maître de cœur', '2ème Maître de cœur',
         'Jewrine', 'Nb membres', 'Nb séances'
     ])
-    kourel_qs = Kourel.objects.select_related(
-        'responsable', 'maitre_de_coeur', 'maitre_de_coeur_2', 'jewrine'
-    ).prefetch_related('membres')
+    kourel_qs = Kourel.objects.prefetch_related('membres')
     if kourel_id:
         kourel_qs = kourel_qs.filter(pk=kourel_id)
 
@@ -210,7 +220,7 @@ def export_rapport_excel(date_debut=None, date_fin=None, kourel_id=None):
     # ══════════════════════════════════════════════════
     # Feuille 3 : Taux de présence par membre
     # ══════════════════════════════════════════════════
-    stats_membres = _get_stats_par_membre(qs)
+    stats_membres = _get_stats_par_membre(date_debut, date_fin, kourel_id)
     ws_membres = wb.create_sheet("Taux par membre")
     _write_header_row(ws_membres, 1, [
         'Membre', 'Kourel', 'Séances attendues',
@@ -241,6 +251,7 @@ def export_rapport_excel(date_debut=None, date_fin=None, kourel_id=None):
     # ══════════════════════════════════════════════════
     ws = wb.create_sheet("Détail séances")
     taux_par_membre = {s['membre_id']: s['taux_presence'] for s in stats_membres}
+    noms = _noms_membres(qs)
     _write_header_row(ws, 1, [
         'Date', 'Heure début', 'Heure fin', 'Lieu', 'Kourel',
         'Responsable', '1er MC', '2ème MC', 'Jewrine',
@@ -280,7 +291,7 @@ def export_rapport_excel(date_debut=None, date_fin=None, kourel_id=None):
                 taux = f"{taux_par_membre.get(p.membre_id, 0)}%" if p.membre_id else '—'
                 statut_display = p.get_statut_display()
                 row_data = base_row + [
-                    p.membre.get_full_name() if p.membre else '',
+                    noms.get(p.membre_id, ''),
                     statut_display, taux, p.remarque or ''
                 ]
                 bg = _LIGHT if idx_p % 2 == 0 else 'FFFFFF'
@@ -301,265 +312,286 @@ def export_rapport_excel(date_debut=None, date_fin=None, kourel_id=None):
 
 # ────────────────────────── PDF export ──────────────────────────────────────
 
-def export_rapport_pdf(date_debut=None, date_fin=None, kourel_id=None):
-    """Export PDF complet : stats, fiche kourels, taux membres, détail séances."""
-    try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import A4, landscape
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import cm
-        from reportlab.platypus import (
-            SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, HRFlowable
-        )
-    except ImportError:
-        return None
-
-    qs = _get_queryset(date_debut, date_fin, kourel_id)
-    from io import BytesIO
-    buf = BytesIO()
+# Séances par section rendue dans un processus (chaque section commence sur une nouvelle page)
+PDF_SEANCES_PAR_SECTION = 40
 
-    doc = SimpleDocTemplate(
-        buf, pagesize=A4,
-        rightMargin=1.5*cm, leftMargin=1.5*cm,
-        topMargin=2*cm, bottomMargin=2*cm
-    )
-    styles = getSampleStyleSheet()
-    GREEN = colors.HexColor('#2D5F3F')
-    GOLD  = colors.HexColor('#C9A961')
-    LIGHT = colors.HexColor('#F4EAD5')
-    RED   = colors.HexColor('#CC3333')
-    ORANGE = colors.HexColor('#E6A817')
-
-    h1_style = ParagraphStyle('H1', parent=styles['Heading1'], textColor=GREEN, fontSize=16, spaceAfter=4)
-    h2_style = ParagraphStyle('H2', parent=styles['Heading2'], textColor=GREEN, fontSize=12, spaceAfter=4)
-    small = ParagraphStyle('Small', parent=styles['Normal'], fontSize=8)
-
-    def tbl_style(header_color=GREEN, stripe=LIGHT):
-        return TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), header_color),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 7),
-            ('TOPPADDING', (0, 0), (-1, 0), 7),
-            ('GRID', (0, 0), (-1, -1), 0.4, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, stripe]),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('TOPPADDING', (0, 1), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ])
 
-    elements = []
+def _donnees_rapport_pdf(date_debut=None, date_fin=None, kourel_id=None):
+    """
+    Lecture en base de tout le contenu du rapport PDF, sous forme de données simples
+    (chaînes, listes, dicts) : les sections peuvent ensuite être rendues hors du processus.
+    """
+    qs = _get_queryset(date_debut, date_fin, kourel_id)
     periode_str = (
         f"{date_debut.strftime('%d/%m/%Y')} — {date_fin.strftime('%d/%m/%Y')}"
         if date_debut and date_fin else "Toutes les séances créées"
     )
 
-    try:
-        from utils.pdf_header import build_pdf_header
-        elements.extend(build_pdf_header("Rapport des séances de répétition", periode_str))
-    except Exception:
-        elements.append(Paragraph("Rapport des séances de répétition", h1_style))
-        elements.append(Paragraph(f"Période : {periode_str}", styles['Normal']))
-        elements.append(Spacer(1, 0.5*cm))
+    kourel_qs = Kourel.objects.prefetch_related('membres').order_by('ordre', 'nom')
+    if kourel_id:
+        kourel_qs = kourel_qs.filter(pk=kourel_id)
+    kourels = []
+    for k in kourel_qs:
+        enc = _kourel_encadrement(k)
+        kourels.append([k.nom, enc['responsable'], enc['maitre_1'], enc['maitre_2'], enc['jewrine'], str(k.membres.count())])
+
+    stats_membres = _get_stats_par_membre(date_debut, date_fin, kourel_id)
+    taux_par_membre = {s['membre_id']: s['taux_presence'] for s in stats_membres}
+    noms = _noms_membres(qs)
+
+    seances = []
+    for seance in qs.iterator(chunk_size=SEANCES_PAR_LOT):
+        kourel = seance.kourel
+        enc = _kourel_encadrement(kourel) if kourel else {
+            'responsable': '—', 'maitre_1': '—', 'maitre_2': '—', 'jewrine': '—'
+        }
+        khass_str = ', '.join(
+            f"{k.nom_khassida} ({k.dathie})" + (f" - {k.khassida_portion}" if k.khassida_portion else "")
+            for k in seance.khassidas.all()
+        ) or '—'
+        seances.append({
+            'info': [
+                seance.date_heure.strftime('%d/%m/%Y %H:%M') if seance.date_heure else '',
+                seance.heure_fin.strftime('%H:%M') if seance.heure_fin else '—',
+                seance.lieu or '—',
+                kourel.nom if kourel else '—',
+            ],
+            'encadrement': [enc['responsable'], enc['maitre_1'], enc['maitre_2'], enc['jewrine']],
+            'khassidas': khass_str,
+            'presences': [
+                (
+                    noms.get(p.membre_id, ''),
+                    p.get_statut_display(),
+                    f"{taux_par_membre.get(p.membre_id, 0)}%" if p.membre_id else '—',
+                    p.remarque or '',
+                    p.statut,
+                )
+                for p in seance.presences.all()
+            ],
+        })
+
+    return {
+        'periode': periode_str,
+        'nb_seances': len(seances),
+        'globales': _get_stats_globales(date_debut, date_fin, kourel_id),
+        'kourels': kourels,
+        'membres': [
+            [s['nom'], s['kourel'], str(s['nb_seances_attendues']), str(s['nb_presents']),
+             str(s['nb_abs_just']), str(s['nb_abs_non_just']), s['taux_presence']]
+            for s in stats_membres
+        ],
+        'seances': seances,
+    }
+
+
+def _elements_synthese(d):
+    """Titre, statistiques globales, encadrement des kourels et taux par membre."""
+    from reportlab.lib import colors
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, Spacer, Table
+    from utils import pdf_outils
+
+    s = pdf_outils.styles()
+    elements = pdf_outils.titre_rapport("Rapport des séances de répétition", d['periode'])
 
     # ── Statistiques globales ──
-    presences_all = list(PresenceSeance.objects.filter(seance__in=qs))
-    nb_total = len(presences_all)
-    nb_presents = sum(1 for p in presences_all if p.statut == 'present')
-    nb_abs_just = sum(1 for p in presences_all if p.statut == 'absent_justifie')
-    nb_abs_non_just = sum(1 for p in presences_all if p.statut == 'absent_non_justifie')
-    taux_presence = round(100 * nb_presents / nb_total, 1) if nb_total else 0
-
-    elements.append(Paragraph('Statistiques globales', h2_style))
+    g = d['globales']
+    elements.append(Paragraph('Statistiques globales', s['h2']))
     stats_data = [['Indicateur', 'Valeur']] + [
-        ['Nombre de séances', str(qs.count())],
-        ['Total marquages présence', str(nb_total)],
-        ['Présents', str(nb_presents)],
-        ['Absents justifiés', str(nb_abs_just)],
-        ['Absents non justifiés', str(nb_abs_non_just)],
-        ['Taux de présence global', f'{taux_presence}%'],
+        ['Nombre de séances', str(d['nb_seances'])],
+        ['Total marquages présence', str(g['nb_total'])],
+        ['Présents', str(g['nb_presents'])],
+        ['Absents justifiés', str(g['nb_abs_just'])],
+        ['Absents non justifiés', str(g['nb_abs_non_just'])],
+        ['Taux de présence global', f"{g['taux_presence']}%"],
     ]
     stats_table = Table(stats_data, colWidths=[9*cm, 5*cm])
-    stats_table.setStyle(tbl_style(header_color=GOLD))
+    stats_table.setStyle(pdf_outils.style_tableau(entete=pdf_outils.OR))
     elements.append(stats_table)
     elements.append(Spacer(1, 0.8*cm))
 
     # ── Fiche Kourels ──
-    elements.append(Paragraph('Encadrement des Kourels', h2_style))
+    elements.append(Paragraph('Encadrement des Kourels', s['h2']))
     elements.append(Spacer(1, 0.3*cm))
-    kourel_qs = Kourel.objects.select_related(
-        'responsable', 'maitre_de_coeur', 'maitre_de_coeur_2', 'jewrine'
-    ).prefetch_related('membres').order_by('ordre', 'nom')
-    if kourel_id:
-        kourel_qs = kourel_qs.filter(pk=kourel_id)
-
-    kourel_headers = [['Kourel', 'Responsable', '1er MC', '2ème MC', 'Jewrine', 'Membres']]
-    kourel_rows = []
-    for k in kourel_qs:
-        enc = _kourel_encadrement(k)
-        kourel_rows.append([k.nom, enc['responsable'], enc['maitre_1'], enc['maitre_2'], enc['jewrine'], str(k.membres.count())])
-    if kourel_rows:
-        kt = Table(kourel_headers + kourel_rows, colWidths=[3.5*cm, 3.5*cm, 3*cm, 3*cm, 3*cm, 2*cm])
-        kt.setStyle(tbl_style())
+    if d['kourels']:
+        kourel_headers = [['Kourel', 'Responsable', '1er MC', '2ème MC', 'Jewrine', 'Membres']]
+        kt = Table(kourel_headers + d['kourels'], colWidths=[3.5*cm, 3.5*cm, 3*cm, 3*cm, 3*cm, 2*cm])
+        kt.setStyle(pdf_outils.style_tableau())
         elements.append(kt)
     else:
-        elements.append(Paragraph('Aucun kourel trouvé.', styles['Normal']))
+        elements.append(Paragraph('Aucun kourel trouvé.', s['normal']))
     elements.append(Spacer(1, 0.8*cm))
 
     # ── Taux par membre ──
-    stats_membres = _get_stats_par_membre(qs)
-    elements.append(Paragraph('Taux de présence par membre', h2_style))
+    elements.append(Paragraph('Taux de présence par membre', s['h2']))
     elements.append(Spacer(1, 0.3*cm))
-    if stats_membres:
+    if d['membres']:
         m_headers = [['Membre', 'Kourel', 'Attendues', 'Présents', 'Abs. just.', 'Abs. non just.', 'Taux (%)']]
-        m_data = [
-            [s['nom'], s['kourel'], str(s['nb_seances_attendues']), str(s['nb_presents']),
-             str(s['nb_abs_just']), str(s['nb_abs_non_just']), f"{s['taux_presence']}%"]
-            for s in stats_membres
-        ]
+        m_data = [ligne[:6] + [f'{ligne[6]}%'] for ligne in d['membres']]
         mt = Table(m_headers + m_data, colWidths=[4.5*cm, 3.5*cm, 2*cm, 2*cm, 2*cm, 2.5*cm, 2*cm])
-        style = tbl_style()
+        style = pdf_outils.style_tableau()
         # Coloration conditionnelle du taux
-        for i, s in enumerate(stats_membres, 1):
-            taux = s['taux_presence']
+        for i, ligne in enumerate(d['membres'], 1):
+            taux = ligne[6]
             color = colors.HexColor('#E8F5E9') if taux >= 80 else (colors.HexColor('#FFF9E6') if taux >= 50 else colors.HexColor('#FFEBEE'))
             style.add('BACKGROUND', (6, i), (6, i), color)
         mt.setStyle(style)
         elements.append(mt)
     else:
-        elements.append(Paragraph('Aucun membre concerné.', styles['Normal']))
+        elements.append(Paragraph('Aucun membre concerné.', s['normal']))
     elements.append(Spacer(1, 0.8*cm))
+    return elements
 
-    # ── Détail des séances ──
-    elements.append(PageBreak())
-    elements.append(Paragraph('Détail des séances', h2_style))
-    elements.append(Spacer(1, 0.3*cm))
 
-    taux_par_membre = {s['membre_id']: s['taux_presence'] for s in stats_membres}
-    for seance in qs:
-        kourel = seance.kourel
-        enc = _kourel_encadrement(kourel) if kourel else {
-            'responsable': '—', 'maitre_1': '—', 'maitre_2': '—', 'jewrine': '—'
-        }
-        khass_str = ', '.join(
-            f"{k.nom_khassida} ({k.dathie})" + (f" - {k.khassida_portion}" if k.khassida_portion else "")
-            for k in seance.khassidas.all()
-        ) or '—'
-        date_str = seance.date_heure.strftime('%d/%m/%Y %H:%M') if seance.date_heure else ''
-        heure_fin_str = seance.heure_fin.strftime('%H:%M') if seance.heure_fin else '—'
+def _elements_seances(seances, titre=True):
+    """Détail d'une suite de séances (titre de partie sur la première section seulement)."""
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, Spacer, Table
+    from utils import pdf_outils
+
+    s = pdf_outils.styles()
+    elements = []
+    if titre:
+        elements.append(Paragraph('Détail des séances', s['h2']))
+        elements.append(Spacer(1, 0.3*cm))
 
+    for seance in seances:
         # Entête séance
         seance_info = Table([
             ['Date/Heure', 'Heure fin', 'Lieu', 'Kourel'],
-            [date_str, heure_fin_str, seance.lieu or '—', kourel.nom if kourel else '—'],
+            seance['info'],
             ['Responsable', '1er MC', '2ème MC', 'Jewrine'],
-            [enc['responsable'], enc['maitre_1'], enc['maitre_2'], enc['jewrine']],
+            seance['encadrement'],
         ], colWidths=[4*cm, 3*cm, 4.5*cm, 4.5*cm])
-        seance_info.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), GREEN),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BACKGROUND', (0, 1), (-1, 1), LIGHT),
-            ('BACKGROUND', (0, 2), (-1, 2), GOLD),
-            ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
-            ('BACKGROUND', (0, 3), (-1, 3), colors.HexColor('#FAF3E0')),
-            ('GRID', (0, 0), (-1, -1), 0.4, colors.grey),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ]))
+        seance_info.setStyle(pdf_outils.style_entete_seance())
         elements.append(seance_info)
 
-        if khass_str != '—':
+        if seance['khassidas'] != '—':
             elements.append(Spacer(1, 0.15*cm))
-            elements.append(Paragraph(f"<b>Khassidas :</b> {khass_str}", small))
+            elements.append(Paragraph(f"<b>Khassidas :</b> {seance['khassidas']}", s['small']))
 
-        presences = list(seance.presences.all())
+        presences = seance['presences']
         if presences:
             elements.append(Spacer(1, 0.2*cm))
-            ph = [['Membre', 'Statut', 'Taux présence', 'Remarque']]
-            for p in presences:
-                taux = f"{taux_par_membre.get(p.membre_id, 0)}%" if p.membre_id else '—'
-                ph.append([
-                    p.membre.get_full_name() if p.membre else '',
-                    p.get_statut_display(), taux, p.remarque or ''
-                ])
+            ph = [['Membre', 'Statut', 'Taux présence', 'Remarque']] + [list(p[:4]) for p in presences]
             pt = Table(ph, colWidths=[5*cm, 3.5*cm, 2.5*cm, 5*cm])
-            pt_style = tbl_style(header_color=GOLD)
+            pt_style = pdf_outils.style_tableau(entete=pdf_outils.OR)
             # Coloriser statut
             for i, p in enumerate(presences, 1):
-                if p.statut == 'present':
-                    pt_style.add('TEXTCOLOR', (1, i), (1, i), GREEN)
-                elif p.statut == 'absent_non_justifie':
-                    pt_style.add('TEXTCOLOR', (1, i), (1, i), RED)
+                if p[4] == 'present':
+                    pt_style.add('TEXTCOLOR', (1, i), (1, i), pdf_outils.VERT)
+                elif p[4] == 'absent_non_justifie':
+                    pt_style.add('TEXTCOLOR', (1, i), (1, i), pdf_outils.ROUGE)
                 else:
-                    pt_style.add('TEXTCOLOR', (1, i), (1, i), ORANGE)
+                    pt_style.add('TEXTCOLOR', (1, i), (1, i), pdf_outils.ORANGE)
             pt.setStyle(pt_style)
             elements.append(pt)
         elements.append(Spacer(1, 0.6*cm))
+    return elements
 
-    doc.build(elements)
-    buf.seek(0)
-    return buf
 
+def _construire_pdf(elements, entete=True, numeroter=False):
+    """Mise en page A4 du rapport (marges latérales réduites) ; retourne les octets du PDF."""
+    from reportlab.lib.units import cm
+    from utils import pdf_outils
 
-# ────────────────────────── CSV export ──────────────────────────────────────
+    return pdf_outils.rendre(elements, entete=entete, numeroter=numeroter, marges=(1.5*cm, 1.5*cm, 2*cm, 2*cm))
 
-def export_rapport_csv(date_debut=None, date_fin=None, kourel_id=None):
-    """Export CSV complet des séances de répétition, avec infos encadrement kourel."""
-    import csv
-    from io import StringIO
 
+def _rendre_section(section):
+    """Rendu d'une section du rapport (exécuté dans un processus de rendu)."""
+    genre, donnees, titre = section
+    if genre == 'synthese':
+        return _construire_pdf(_elements_synthese(donnees))
+    return _construire_pdf(_elements_seances(donnees, titre=titre), entete=False)
+
+
+def export_rapport_pdf(date_debut=None, date_fin=None, kourel_id=None, processus=None):
+    """
+    Export PDF complet : stats, fiche kourels, taux membres, détail séances.
+    Les rapports de plus d'une section de séances sont rendus en parallèle
+    (utils/pdf_parallele.py) ; `processus` : nombre de processus (défaut : voir
+    pdf_parallele.nb_processus, séquentiel dans les requêtes web ; 1 = rendu séquentiel).
+    """
+    try:
+        from reportlab.platypus import PageBreak
+        from utils import pdf_outils
+    except ImportError:
+        return None
+    from io import BytesIO
+    from utils import pdf_parallele
+
+    d = _donnees_rapport_pdf(date_debut, date_fin, kourel_id)
+    seances = d.pop('seances')
+    pas = PDF_SEANCES_PAR_SECTION
+
+    if (
+        len(seances) > pas
+        and pdf_parallele.nb_processus(processus) > 1
+        and pdf_parallele.parallele_disponible()
+    ):
+        # Styles et logo préparés avant le fork : hérités par les processus de rendu
+        pdf_outils.styles()
+        pdf_outils.logo()
+        sections = [('synthese', d, False)] + [
+            ('seances', seances[i:i + pas], i == 0) for i in range(0, len(seances), pas)
+        ]
+        return pdf_parallele.fusionner(pdf_parallele.rendre_sections(_rendre_section, sections, processus))
+
+    elements = _elements_synthese(d) + [PageBreak()] + _elements_seances(seances)
+    return BytesIO(_construire_pdf(elements, numeroter=True))
+
+
+# ────────────────────────── CSV export ──────────────────────────────────────
+
+def lignes_rapport_csv(date_debut=None, date_fin=None, kourel_id=None):
+    """
+    Lignes du CSV des séances de répétition (générateur) : en-tête, encadrement des
+    kourels, taux par membre, puis détail des séances parcouru par lots.
+    """
     qs = _get_queryset(date_debut, date_fin, kourel_id)
-    buf = StringIO()
-    writer = csv.writer(buf, delimiter=';')
 
     periode_str = (
         f"{date_debut.strftime('%d/%m/%Y')} — {date_fin.strftime('%d/%m/%Y')}"
         if date_debut and date_fin else "Toutes les séances créées"
     )
-    writer.writerow([f'Rapport séances de répétition DBM — Période : {periode_str}'])
+    yield [f'Rapport séances de répétition DBM — Période : {periode_str}']
 
-    presences_all = list(PresenceSeance.objects.filter(seance__in=qs))
-    nb_total = len(presences_all)
-    nb_presents = sum(1 for p in presences_all if p.statut == 'present')
-    taux_presence = round(100 * nb_presents / nb_total, 1) if nb_total else 0
-    writer.writerow([f'Séances: {qs.count()} | Présences: {nb_total} | Présents: {nb_presents} | Taux: {taux_presence}%'])
-    writer.writerow([])
+    g = _get_stats_globales(date_debut, date_fin, kourel_id)
+    nb_total, nb_presents, taux_presence = g['nb_total'], g['nb_presents'], g['taux_presence']
+    yield [f'Séances: {qs.count()} | Présences: {nb_total} | Présents: {nb_presents} | Taux: {taux_presence}%']
+    yield []
 
     # Section kourels
-    writer.writerow(['=== ENCADREMENT DES KOURELS ==='])
-    writer.writerow(['Kourel', 'Responsable', '1er Maître de cœur', '2ème Maître de cœur', 'Jewrine', 'Nb membres'])
-    kourel_qs = Kourel.objects.select_related(
-        'responsable', 'maitre_de_coeur', 'maitre_de_coeur_2', 'jewrine'
-    ).prefetch_related('membres').order_by('ordre', 'nom')
+    yield ['=== ENCADREMENT DES KOURELS ===']
+    yield ['Kourel', 'Responsable', '1er Maître de cœur', '2ème Maître de cœur', 'Jewrine', 'Nb membres']
+    kourel_qs = Kourel.objects.prefetch_related('membres').order_by('ordre', 'nom')
     if kourel_id:
         kourel_qs = kourel_qs.filter(pk=kourel_id)
     for k in kourel_qs:
         enc = _kourel_encadrement(k)
-        writer.writerow([k.nom, enc['responsable'], enc['maitre_1'], enc['maitre_2'], enc['jewrine'], k.membres.count()])
-    writer.writerow([])
+        yield [k.nom, enc['responsable'], enc['maitre_1'], enc['maitre_2'], enc['jewrine'], k.membres.count()]
+    yield []
 
     # Section taux par membre
-    stats_membres = _get_stats_par_membre(qs)
-    writer.writerow(['=== TAUX DE PRESENCE PAR MEMBRE ==='])
-    writer.writerow(['Membre', 'Kourel', 'Séances attendues', 'Présents', 'Abs. justifiés', 'Abs. non justifiés', 'Taux (%)'])
+    stats_membres = _get_stats_par_membre(date_debut, date_fin, kourel_id)
+    yield ['=== TAUX DE PRESENCE PAR MEMBRE ===']
+    yield ['Membre', 'Kourel', 'Séances attendues', 'Présents', 'Abs. justifiés', 'Abs. non justifiés', 'Taux (%)']
     for s in stats_membres:
-        writer.writerow([s['nom'], s['kourel'], s['nb_seances_attendues'], s['nb_presents'],
-                        s['nb_abs_just'], s['nb_abs_non_just'], f"{s['taux_presence']}%"])
-    writer.writerow([])
+        yield [s['nom'], s['kourel'], s['nb_seances_attendues'], s['nb_presents'],
+               s['nb_abs_just'], s['nb_abs_non_just'], f"{s['taux_presence']}%"]
+    yield []
 
     # Section détail séances
-    writer.writerow(['=== DETAIL DES SEANCES ==='])
-    writer.writerow([
+    yield ['=== DETAIL DES SEANCES ===']
+    yield [
         'Date', 'Heure début', 'Heure fin', 'Lieu', 'Kourel',
         'Responsable', '1er MC', '2ème MC', 'Jewrine',
         'Khassidas (nom, dathie, portion)', 'Membre', 'Statut', 'Taux présence (%)', 'Remarque'
-    ])
+    ]
     taux_par_membre = {s['membre_id']: s['taux_presence'] for s in stats_membres}
-    for seance in qs:
+    noms = _noms_membres(qs)
+    for seance in qs.iterator(chunk_size=SEANCES_PAR_LOT):
         kourel = seance.kourel
         enc = _kourel_encadrement(kourel) if kourel else {
             'responsable': '—', 'maitre_1': '—', 'maitre_2': '—', 'jewrine': '—'
@@ -577,19 +609,20 @@ def export_rapport_csv(date_debut=None, date_fin=None, kourel_id=None):
 
         presences = list(seance.presences.all())
         if not presences:
-            writer.writerow(base + ['—', '—', '—', ''])
+            yield base + ['—', '—', '—', '']
         else:
             for p in presences:
                 taux = f"{taux_par_membre.get(p.membre_id, 0)}%" if p.membre_id else '—'
-                writer.writerow(base + [
-                    p.membre.get_full_name() if p.membre else '',
+                yield base + [
+                    noms.get(p.membre_id, ''),
                     p.get_statut_display(), taux, p.remarque or ''
-                ])
+                ]
 
-    from io import BytesIO
-    out = BytesIO(buf.getvalue().encode('utf-8-sig'))
-    out.seek(0)
-    return out
+
+def export_rapport_csv(date_debut=None, date_fin=None, kourel_id=None):
+    """Export CSV complet des séances de répétition, avec infos encadrement kourel (fichier temporaire)."""
+    from utils.csv_stream import ecrire_csv
+    return ecrire_csv(lignes_rapport_csv(date_debut, date_fin, kourel_id))
 
 
 # ────────────────────────── Export fiche membres kourel ─────────────────────
@@ -604,9 +637,7 @@ def export_membres_kourel_excel(kourel_id):
         return None
 
     try:
-        kourel = Kourel.objects.select_related(
-            'responsable', 'maitre_de_coeur', 'maitre_de_coeur_2', 'jewrine'
-        ).prefetch_related('membres').get(pk=kourel_id)
+        kourel = Kourel.objects.prefetch_related('membres').get(pk=kourel_id)
     except Kourel.DoesNotExist:
         return None
 
@@ -684,34 +715,20 @@ def export_membres_kourel_excel(kourel_id):
 def export_membres_kourel_pdf(kourel_id):
     """Export PDF de la fiche membres d'un kourel."""
     try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
         from reportlab.lib.units import cm
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.platypus import Table, Paragraph, Spacer
+        from utils import pdf_outils
     except ImportError:
         return None
 
     try:
-        kourel = Kourel.objects.select_related(
-            'responsable', 'maitre_de_coeur', 'maitre_de_coeur_2', 'jewrine'
-        ).prefetch_related('membres').get(pk=kourel_id)
+        kourel = Kourel.objects.prefetch_related('membres').get(pk=kourel_id)
     except Kourel.DoesNotExist:
         return None
 
-    from io import BytesIO
-    buf = BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
-    styles = getSampleStyleSheet()
-    GREEN = colors.HexColor('#2D5F3F')
-    GOLD  = colors.HexColor('#C9A961')
-    LIGHT = colors.HexColor('#F4EAD5')
-
-    h1 = ParagraphStyle('H1', parent=styles['Heading1'], textColor=GREEN, fontSize=15)
-    h2 = ParagraphStyle('H2', parent=styles['Heading2'], textColor=GREEN, fontSize=11)
-
+    styles = pdf_outils.styles()
     elements = []
-    elements.append(Paragraph(f"Fiche Kourel : {kourel.nom}", h1))
+    elements.append(Paragraph(f"Fiche Kourel : {kourel.nom}", styles['h1_fiche']))
     elements.append(Spacer(1, 0.4*cm))
 
     enc = _kourel_encadrement(kourel)
@@ -723,18 +740,11 @@ def export_membres_kourel_pdf(kourel_id):
         ['Nombre de membres', str(kourel.membres.count())],
     ]
     enc_tbl = Table(enc_data, colWidths=[6*cm, 11*cm])
-    enc_tbl.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), LIGHT),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('GRID', (0, 0), (-1, -1), 0.4, colors.grey),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-    ]))
+    enc_tbl.setStyle(pdf_outils.style_fiche())
     elements.append(enc_tbl)
     elements.append(Spacer(1, 0.6*cm))
 
-    elements.append(Paragraph("Liste des membres", h2))
+    elements.append(Paragraph("Liste des membres", styles['h2_fiche']))
     elements.append(Spacer(1, 0.3*cm))
 
     membres = list(kourel.membres.all().order_by('last_name', 'first_name'))
@@ -746,19 +756,10 @@ def export_membres_kourel_pdf(kourel_id):
             for i, m in enumerate(membres, 1)
         ]
         mt = Table(m_headers + m_data, colWidths=[1*cm, 5*cm, 3.5*cm, 5*cm, 3*cm])
-        mt.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), GOLD),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 0.4, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, LIGHT]),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ]))
+        mt.setStyle(pdf_outils.style_liste())
         elements.append(mt)
     else:
-        elements.append(Paragraph('Aucun membre enregistré dans ce kourel.', styles['Normal']))
+        elements.append(Paragraph('Aucun membre enregistré dans ce kourel.', styles['normal']))
 
-    doc.build(elements)
-    buf.seek(0)
-    return buf
+    from io import BytesIO
+    return BytesIO(pdf_outils.rendre(elements, entete=False))
@@ -1,4 +1,9 @@
 from rest_framework import serializers
+
+from apps.accounts import identites
+from apps.accounts.identites import IdentiteField, precharger
+from apps.televersements.serializers import TeleversementField, TeleversementMixin
+from utils.images import DeriveField
 from .models import (
     CategorieDocument, DocumentNumerique, MediaAudio, MediaVideo,
     ArchiveHistorique, AlbumPhoto, Photo,
@@ -12,17 +17,21 @@ class CategorieDocumentSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class DocumentNumeriqueSerializer(serializers.ModelSerializer):
+class DocumentNumeriqueSerializer(TeleversementMixin, serializers.ModelSerializer):
     categorie_nom = serializers.CharField(source='categorie.nom', read_only=True)
+    fichier_televersement = TeleversementField(cible='document')
 
     class Meta:
         model = DocumentNumerique
-        fields = '__all__'
-        read_only_fields = ['date_ajout', 'telecharge_par', 'telechargements', 'vues']
+        # Texte extrait par l'ingestion : servi par la recherche, pas dans les listes
+        exclude = ['texte']
+        read_only_fields = ['date_ajout', 'telecharge_par', 'telechargements', 'vues',
+                            'metadonnees', 'miniature', 'ingestion_statut', 'ingestion_erreur', 'date_ingestion']
 
 
-class MediaAudioSerializer(serializers.ModelSerializer):
+class MediaAudioSerializer(TeleversementMixin, serializers.ModelSerializer):
     categorie_display = serializers.CharField(source='get_categorie_display', read_only=True)
+    fichier_audio_televersement = TeleversementField(cible='audio')
 
     class Meta:
         model = MediaAudio
@@ -30,8 +39,9 @@ class MediaAudioSerializer(serializers.ModelSerializer):
         read_only_fields = ['date_ajout', 'upload_par', 'ecoutes']
 
 
-class MediaVideoSerializer(serializers.ModelSerializer):
+class MediaVideoSerializer(TeleversementMixin, serializers.ModelSerializer):
     categorie_display = serializers.CharField(source='get_categorie_display', read_only=True)
+    fichier_video_televersement = TeleversementField(cible='video')
 
     class Meta:
         model = MediaVideo
@@ -72,6 +82,9 @@ class ArchiveHistoriqueSerializer(serializers.ModelSerializer):
 
 
 class PhotoSerializer(serializers.ModelSerializer):
+    fichier_thumb = DeriveField(source='fichier')
+    fichier_srcset = DeriveField(source='fichier', taille='srcset')
+
     class Meta:
         model = Photo
         fields = '__all__'
@@ -80,6 +93,8 @@ class PhotoSerializer(serializers.ModelSerializer):
 
 class AlbumPhotoSerializer(serializers.ModelSerializer):
     photos = PhotoSerializer(many=True, read_only=True)
+    couverture_thumb = DeriveField(source='couverture')
+    couverture_srcset = DeriveField(source='couverture', taille='srcset')
 
     class Meta:
         model = AlbumPhoto
@@ -90,44 +105,32 @@ class AlbumPhotoSerializer(serializers.ModelSerializer):
 class KourelSerializer(serializers.ModelSerializer):
     membres_noms = serializers.SerializerMethodField()
     nb_membres = serializers.SerializerMethodField()
-    responsable_nom = serializers.SerializerMethodField()
-    maitre_de_coeur_nom = serializers.SerializerMethodField()
-    maitre_de_coeur_2_nom = serializers.SerializerMethodField()
-    jewrine_nom = serializers.SerializerMethodField()
+    responsable_nom = IdentiteField(cle='nom', source='responsable_id')
+    maitre_de_coeur_nom = IdentiteField(cle='nom', source='maitre_de_coeur_id')
+    maitre_de_coeur_2_nom = IdentiteField(cle='nom', source='maitre_de_coeur_2_id')
+    jewrine_nom = IdentiteField(cle='nom', source='jewrine_id')
 
     class Meta:
         model = Kourel
         fields = '__all__'
 
     def get_membres_noms(self, obj):
+        ids = [u.pk for u in obj.membres.all()]
+        # Membres de tous les kourels de la liste lus en une fois (membres préchargés : ids seuls)
+        noms = precharger(self, 'membres', lambda k: [u.pk for u in k.membres.all()]) or identites.get_many(ids)
         return [
-            {'id': u.id, 'nom': u.get_full_name(), 'photo': u.photo.url if u.photo else None}
-            for u in obj.membres.all()
+            {k: noms[pk][k] for k in ('id', 'nom', 'photo', 'photo_thumb')}
+            for pk in ids if pk in noms
         ]
 
     def get_nb_membres(self, obj):
         return obj.membres.count()
 
-    def get_responsable_nom(self, obj):
-        return obj.responsable.get_full_name() if obj.responsable else None
-
-    def get_maitre_de_coeur_nom(self, obj):
-        return obj.maitre_de_coeur.get_full_name() if obj.maitre_de_coeur else None
-
-    def get_maitre_de_coeur_2_nom(self, obj):
-        return obj.maitre_de_coeur_2.get_full_name() if obj.maitre_de_coeur_2 else None
-
-    def get_jewrine_nom(self, obj):
-        return obj.jewrine.get_full_name() if obj.jewrine else None
-
 
 class PresenceSeanceSerializer(serializers.ModelSerializer):
-    membre_nom = serializers.SerializerMethodField()
+    membre_nom = IdentiteField(cle='nom', source='membre_id')
     statut_display = serializers.CharField(source='get_statut_display', read_only=True)
 
-    def get_membre_nom(self, obj):
-        return obj.membre.get_full_name() if obj.membre else ''
-
     class Meta:
         model = PresenceSeance
         fields = '__all__'
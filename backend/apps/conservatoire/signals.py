@@ -0,0 +1,113 @@
+"""
+Mise à jour incrémentale de l'agrégat d'assiduité (assiduite.py) sur chaque écriture de
+séance, de présence ou de membres d'un kourel — y compris depuis l'admin et les
+suppressions en cascade. Les écritures en masse (bulk_create) appellent
+assiduite.recalculer_seances explicitement.
+"""
+import threading
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import assiduite
+from .models import Kourel, PresenceSeance, SeanceConservatoire
+
+# Séances en cours de suppression : leurs présences supprimées en cascade ne déclenchent
+# pas un recalcul chacune, la séance recalcule son mois une fois supprimée.
+_suppressions = threading.local()
+
+
+def _seances_supprimees():
+    if not hasattr(_suppressions, 'ids'):
+        _suppressions.ids = set()
+    return _suppressions.ids
+
+
+def _bucket(seance):
+    return assiduite.bucket_seance(seance.kourel_id, seance.date_heure, seance.type_seance)
+
+
+@receiver(pre_save, sender=SeanceConservatoire)
+def seance_avant_enregistrement(sender, instance, raw=False, **kwargs):
+    instance._assiduite_avant = None
+    if instance.pk and not raw:
+        avant = SeanceConservatoire.objects.filter(pk=instance.pk).values_list(
+            'kourel_id', 'date_heure', 'type_seance'
+        ).first()
+        if avant:
+            instance._assiduite_avant = assiduite.bucket_seance(*avant)
+
+
+@receiver(post_save, sender=SeanceConservatoire)
+def seance_enregistree(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    apres = _bucket(instance)
+    avant = getattr(instance, '_assiduite_avant', None)
+    if created or avant != apres:
+        assiduite.recalculer(apres)
+    if avant and avant != apres:
+        assiduite.recalculer(avant)
+
+
+@receiver(pre_delete, sender=SeanceConservatoire)
+def seance_avant_suppression(sender, instance, **kwargs):
+    _seances_supprimees().add(instance.pk)
+
+
+@receiver(post_delete, sender=SeanceConservatoire)
+def seance_supprimee(sender, instance, **kwargs):
+    _seances_supprimees().discard(instance.pk)
+    assiduite.recalculer(_bucket(instance))
+
+
+@receiver(pre_save, sender=PresenceSeance)
+def presence_avant_enregistrement(sender, instance, raw=False, **kwargs):
+    instance._assiduite_seance_avant = None
+    if instance.pk and not raw:
+        instance._assiduite_seance_avant = (
+            PresenceSeance.objects.filter(pk=instance.pk).values_list('seance_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=PresenceSeance)
+def presence_enregistree(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    seances = {instance.seance_id, getattr(instance, '_assiduite_seance_avant', None)} - {None}
+    assiduite.recalculer_seances(seances)
+
+
+@receiver(post_delete, sender=PresenceSeance)
+def presence_supprimee(sender, instance, **kwargs):
+    if instance.seance_id not in _seances_supprimees():
+        assiduite.recalculer_seances([instance.seance_id])
+
+
+@receiver(m2m_changed, sender=Kourel.membres.through)
+def membres_kourel_modifies(sender, instance, action, reverse, pk_set, **kwargs):
+    """Ajout / retrait de membres : seules les lignes des membres concernés sont recalculées."""
+    if action == 'pre_clear':
+        # pk_set n'est pas fourni pour clear : on relève les liens avant suppression
+        if reverse:
+            instance._assiduite_clear = list(instance.kourels.values_list('pk', flat=True))
+        else:
+            instance._assiduite_clear = list(instance.membres.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_assiduite_clear', [])
+    if not pk_set:
+        return
+    # Version des données des rapports (rapports/cache.py) : l'ajout de membres
+    # n'enregistre pas le kourel
+    kourels = pk_set if reverse else [instance.pk]
+    Kourel.objects.filter(pk__in=kourels).update(date_modification=timezone.now())
+    if reverse:
+        # instance : un membre ; pk_set : ses kourels
+        for kourel_id in pk_set:
+            assiduite.recalculer_membres(kourel_id, [instance.pk])
+    else:
+        assiduite.recalculer_membres(instance.pk, pk_set)
@@ -36,19 +36,18 @@ def _rapport_export_wrapper(req):
         from django.http import JsonResponse
         return JsonResponse({'detail': 'Droits insuffisants.'}, status=403)
 
-    from .rapport_export import export_rapport_excel, export_rapport_pdf, export_rapport_csv
     from datetime import datetime
 
     fmt = req.GET.get('format', 'excel').lower()
     if fmt not in ('pdf', 'excel', 'xlsx', 'csv'):
         fmt = 'excel'
 
-    kourel_id = req.GET.get('kourel_id')
-    if kourel_id:
-        try:
-            kourel_id = int(kourel_id)
-        except ValueError:
-            kourel_id = None
+    if req.GET.get('asynchrone') in ('1', 'true'):
+        # Génération en arrière-plan : on retourne l'export à suivre / télécharger
+        from django.http import JsonResponse
+        from apps.rapports.views import creer_export
+        data, code = creer_export(user, 'seances', fmt, req.GET.dict())
+        return JsonResponse(data, status=code)
 
     def _parse(val):
         try:
@@ -59,30 +58,16 @@ def _rapport_export_wrapper(req):
     date_debut = _parse(req.GET.get('date_debut'))
     date_fin   = _parse(req.GET.get('date_fin'))
 
-    buf = None
     filename = 'rapport_seances_toutes'
     if date_debut and date_fin:
         filename = f'rapport_seances_{date_debut}_{date_fin}'
 
-    if fmt in ('excel', 'xlsx'):
-        buf = export_rapport_excel(date_debut, date_fin, kourel_id=kourel_id)
-        content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        filename += '.xlsx'
-    elif fmt == 'pdf':
-        buf = export_rapport_pdf(date_debut, date_fin, kourel_id=kourel_id)
-        content_type = 'application/pdf'
-        filename += '.pdf'
-    elif fmt == 'csv':
-        buf = export_rapport_csv(date_debut, date_fin, kourel_id=kourel_id)
-        content_type = 'text/csv; charset=utf-8'
-        filename += '.csv'
-    else:
-        content_type = 'application/octet-stream'
-
-    if not buf:
+    # Servi depuis le cache des rapports (ETag / 304, régénéré si les données changent)
+    from apps.rapports.cache import servir_rapport
+    from apps.rapports.registre import normaliser_format
+    resp = servir_rapport(req, 'seances', normaliser_format(fmt), req.GET, filename)
+    if resp is None:
         return HttpResponse('Erreur génération', status=500)
-    resp = HttpResponse(buf.read(), content_type=content_type)
-    resp['Content-Disposition'] = f'attachment; filename="{filename}"'
     return resp
 
 
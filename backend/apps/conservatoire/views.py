@@ -1,11 +1,16 @@
 from datetime import datetime
+from django.db.models import Prefetch
 from django.http import HttpResponse
 
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated, BasePermission
 from rest_framework.response import Response
+from apps.accounts import identites
+from apps.accounts.models import CustomUser
 from apps.accounts.permissions import IsAdminOrJewrinConservatoire, has_admin_access
+from utils.compteurs import CompteurVuesMixin
 
 from .models import (
     CategorieDocument, DocumentNumerique, MediaAudio, MediaVideo,
@@ -50,6 +55,26 @@ def _export_response(buf, fmt, filename_base):
     return resp
 
 
+def _rapport_response(request, type_rapport, fmt, data, filename_base):
+    """
+    Rapport servi depuis le cache des rapports (apps.rapports.cache) : ETag, 304 sur
+    If-None-Match, régénération seulement si les données ont changé.
+    """
+    from apps.rapports.cache import servir_rapport
+    from apps.rapports.registre import normaliser_format
+    resp = servir_rapport(request, type_rapport, normaliser_format(fmt), data, filename_base)
+    if resp is None:
+        return Response({'detail': 'Erreur de génération. Vérifiez openpyxl et reportlab.'}, status=500)
+    return resp
+
+
+class StatsMembresPagination(PageNumberPagination):
+    """Pagination optionnelle du classement des présences (stats_membres)."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
 # ──────────────────────────────── ViewSets ───────────────────────────────────
 
 class CategorieDocumentViewSet(viewsets.ReadOnlyModelViewSet):
@@ -58,7 +83,7 @@ class CategorieDocumentViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
 
 
-class DocumentNumeriqueViewSet(viewsets.ModelViewSet):
+class DocumentNumeriqueViewSet(CompteurVuesMixin, viewsets.ModelViewSet):
     queryset = DocumentNumerique.objects.select_related('telecharge_par', 'categorie').order_by('-date_ajout')
     serializer_class = DocumentNumeriqueSerializer
     permission_classes = [IsAuthenticated]
@@ -73,7 +98,8 @@ class DocumentNumeriqueViewSet(viewsets.ModelViewSet):
         serializer.save(telecharge_par=self.request.user)
 
 
-class MediaAudioViewSet(viewsets.ModelViewSet):
+class MediaAudioViewSet(CompteurVuesMixin, viewsets.ModelViewSet):
+    champ_compteur_vues = 'ecoutes'
     queryset = MediaAudio.objects.select_related('upload_par').order_by('-date_ajout')
     serializer_class = MediaAudioSerializer
     permission_classes = [IsAuthenticated]
@@ -88,7 +114,7 @@ class MediaAudioViewSet(viewsets.ModelViewSet):
         serializer.save(upload_par=self.request.user)
 
 
-class MediaVideoViewSet(viewsets.ModelViewSet):
+class MediaVideoViewSet(CompteurVuesMixin, viewsets.ModelViewSet):
     queryset = MediaVideo.objects.select_related('upload_par').order_by('-date_ajout')
     serializer_class = MediaVideoSerializer
     permission_classes = [IsAuthenticated]
@@ -153,8 +179,10 @@ class PhotoViewSet(viewsets.ModelViewSet):
 
 
 class KourelViewSet(viewsets.ModelViewSet):
-    queryset = Kourel.objects.all().prefetch_related('membres').select_related(
-        'maitre_de_coeur', 'maitre_de_coeur_2', 'responsable', 'jewrine'
+    # Noms et photos des personnes liées : identités en cache (accounts/identites.py) ;
+    # des membres, seuls les ids sont lus
+    queryset = Kourel.objects.all().prefetch_related(
+        Prefetch('membres', queryset=CustomUser.objects.only('pk'))
     ).order_by('ordre', 'nom')
     serializer_class = KourelSerializer
     permission_classes = [IsAuthenticated]
@@ -193,12 +221,17 @@ class KourelViewSet(viewsets.ModelViewSet):
         Export (Excel, PDF, CSV) des séances d'un kourel spécifique.
         GET ?format=excel|pdf|csv&date_debut=YYYY-MM-DD&date_fin=YYYY-MM-DD
         """
-        from .rapport_export import export_rapport_excel, export_rapport_pdf, export_rapport_csv
-
         kourel = self.get_object()
         fmt = request.query_params.get('format', 'excel').lower()
         if fmt not in ('excel', 'xlsx', 'pdf', 'csv'):
             fmt = 'excel'
+        params = {**request.query_params.dict(), 'kourel_id': kourel.pk}
+
+        if request.query_params.get('asynchrone') in ('1', 'true'):
+            # Génération en arrière-plan : on retourne l'export à suivre / télécharger
+            from apps.rapports.views import creer_export
+            data, code = creer_export(request.user, 'seances', fmt, params)
+            return Response(data, status=code)
 
         date_debut = _parse_date(request.query_params.get('date_debut'))
         date_fin   = _parse_date(request.query_params.get('date_fin'))
@@ -207,14 +240,7 @@ class KourelViewSet(viewsets.ModelViewSet):
         if date_debut and date_fin:
             filename += f"_{date_debut}_{date_fin}"
 
-        if fmt in ('excel', 'xlsx'):
-            buf = export_rapport_excel(date_debut, date_fin, kourel_id=kourel.pk)
-        elif fmt == 'pdf':
-            buf = export_rapport_pdf(date_debut, date_fin, kourel_id=kourel.pk)
-        else:
-            buf = export_rapport_csv(date_debut, date_fin, kourel_id=kourel.pk)
-
-        return _export_response(buf, fmt, filename)
+        return _rapport_response(request, 'seances', fmt, params, filename)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUserOrRole()],
             url_path='stats')
@@ -222,29 +248,76 @@ class KourelViewSet(viewsets.ModelViewSet):
         """
         Statistiques globales de tous les kourels :
         nb membres, nb séances, taux présence moyen.
+        GET ?date_debut=YYYY-MM-DD&date_fin=YYYY-MM-DD&type_seance=repetition|prestation|tous
+        (défaut : répétitions, toutes dates)
+        Kourels annotés + compteurs de présence lus dans l'agrégat d'assiduité.
         """
-        from django.db.models import Count, Q, Avg
-        kourels = Kourel.objects.prefetch_related('membres', 'seances').select_related(
-            'responsable', 'maitre_de_coeur', 'maitre_de_coeur_2', 'jewrine'
-        ).order_by('ordre', 'nom')
+        from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+        from django.db.models.functions import Coalesce
+
+        type_seance = request.query_params.get('type_seance', 'repetition')
+        types_valides = dict(SeanceConservatoire.TYPE_CHOICES)
+        if type_seance not in types_valides and type_seance != 'tous':
+            return Response(
+                {'detail': f"type_seance invalide (valeurs : {', '.join(types_valides)}, tous)."},
+                status=400,
+            )
+        date_debut = _parse_date(request.query_params.get('date_debut'))
+        date_fin   = _parse_date(request.query_params.get('date_fin'))
+
+        def filtre_seances(prefixe):
+            q = Q()
+            if type_seance != 'tous':
+                q &= Q(**{f'{prefixe}type_seance': type_seance})
+            if date_debut:
+                q &= Q(**{f'{prefixe}date_heure__date__gte': date_debut})
+            if date_fin:
+                q &= Q(**{f'{prefixe}date_heure__date__lte': date_fin})
+            return q
+
+        # Compte des membres en sous-requête : évite le produit membres × séances des deux jointures
+        nb_membres = (
+            Kourel.membres.through.objects.filter(kourel=OuterRef('pk'))
+            .order_by().values('kourel').annotate(n=Count('pk')).values('n')
+        )
+        kourels = list(Kourel.objects.annotate(
+            nb_membres=Coalesce(Subquery(nb_membres, output_field=IntegerField()), 0),
+            nb_seances=Count('seances', filter=filtre_seances('seances__')),
+        ).order_by('ordre', 'nom'))
+        noms = {
+            pk: identite['nom'] for pk, identite in identites.get_many(
+                pk for k in kourels
+                for pk in (k.responsable_id, k.maitre_de_coeur_id, k.maitre_de_coeur_2_id, k.jewrine_id)
+            ).items()
+        }
+
+        # Compteurs de présence lus dans l'agrégat d'assiduité (membres × mois)
+        from .assiduite import agreger
+        presences = agreger(
+            ('kourel_id',), type_seance=None if type_seance == 'tous' else type_seance,
+            date_debut=date_debut, date_fin=date_fin,
+        )
+
+        vide = {'nb_presents': 0, 'nb_abs_just': 0, 'nb_abs_non_just': 0}
         result = []
         for k in kourels:
-            seances = k.seances.filter(type_seance='repetition')
-            presences = PresenceSeance.objects.filter(seance__in=seances)
-            nb_total = presences.count()
-            nb_presents = presences.filter(statut='present').count()
-            taux = round(100 * nb_presents / nb_total, 1) if nb_total else 0
+            p = presences.get((k.pk,), vide)
+            nb_total = p['nb_presents'] + p['nb_abs_just'] + p['nb_abs_non_just']
             result.append({
                 'id': k.pk,
                 'nom': k.nom,
                 'ordre': k.ordre,
-                'responsable': k.responsable.get_full_name() if k.responsable else None,
-                'maitre_de_coeur': k.maitre_de_coeur.get_full_name() if k.maitre_de_coeur else None,
-                'maitre_de_coeur_2': k.maitre_de_coeur_2.get_full_name() if k.maitre_de_coeur_2 else None,
-                'jewrine': k.jewrine.get_full_name() if k.jewrine else None,
-                'nb_membres': k.membres.count(),
-                'nb_seances': seances.count(),
-                'taux_presence_moyen': taux,
+                'responsable': noms.get(k.responsable_id),
+                'maitre_de_coeur': noms.get(k.maitre_de_coeur_id),
+                'maitre_de_coeur_2': noms.get(k.maitre_de_coeur_2_id),
+                'jewrine': noms.get(k.jewrine_id),
+                'nb_membres': k.nb_membres,
+                'nb_seances': k.nb_seances,
+                'nb_presences': nb_total,
+                'nb_presents': p['nb_presents'],
+                'nb_absents_justifies': p['nb_abs_just'],
+                'nb_absents_non_justifies': p['nb_abs_non_just'],
+                'taux_presence_moyen': round(100 * p['nb_presents'] / nb_total, 1) if nb_total else 0,
             })
         return Response(result)
 
@@ -255,9 +328,11 @@ class SeanceConservatoireViewSet(viewsets.ModelViewSet):
     filterset_fields = ['kourel', 'type_seance']
 
     def get_queryset(self):
-        qs = SeanceConservatoire.objects.all().select_related('kourel').prefetch_related(
-            'presences', 'presences__membre', 'khassidas'
-        ).order_by('-date_heure')
+        qs = SeanceConservatoire.objects.all().select_related('kourel')
+        if self.action not in ('presences', 'presences_lot', 'khassidas'):
+            # Les actions d'écriture en masse ne resérialisent pas la séance
+            qs = qs.prefetch_related('presences', 'khassidas')
+        qs = qs.order_by('-date_heure')
         if not has_admin_access(self.request.user, 'conservatoire'):
             qs = qs.filter(kourel__membres=self.request.user)
         return qs.distinct()
@@ -275,46 +350,49 @@ class SeanceConservatoireViewSet(viewsets.ModelViewSet):
         """
         Met à jour les présences des membres du kourel pour cette séance.
         Payload: { "presences": [{"membre": id, "statut": "present|absent_justifie|absent_non_justifie", "remarque": ""}] }
+        Réponse : { "seance", "crees": [membre], "modifies": [membre], "inchanges": n, "ignores": [membre] }
         """
+        from .presences import enregistrer_presences
         seance = self.get_object()
-        data = request.data.get('presences', [])
-        kourel_membres = set(seance.kourel.membres.values_list('id', flat=True))
-        for item in data:
-            mid = item.get('membre')
-            if mid not in kourel_membres:
+        diff, = enregistrer_presences([(seance, request.data.get('presences', []))])
+        return Response(diff)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminOrJewrinConservatoire()],
+            url_path='presences-lot')
+    def presences_lot(self, request):
+        """
+        Présences de plusieurs séances en une fois.
+        Payload: { "seances": [{"seance": id, "presences": [{"membre": id, "statut": "...", "remarque": ""}]}] }
+        Réponse : { "seances": [résumé par séance, comme /presences/], "introuvables": [id] }
+        """
+        from .presences import enregistrer_presences
+        lots = {}
+        for item in request.data.get('seances') or []:
+            if not isinstance(item, dict):
                 continue
-            statut = item.get('statut', 'present')
-            if statut not in ['present', 'absent_justifie', 'absent_non_justifie']:
-                statut = 'present'
-            PresenceSeance.objects.update_or_create(
-                seance=seance,
-                membre_id=mid,
-                defaults={'statut': statut, 'remarque': item.get('remarque', '')}
-            )
-        return Response(SeanceConservatoireSerializer(seance).data)
+            try:
+                lots[int(item.get('seance'))] = item.get('presences', [])
+            except (TypeError, ValueError):
+                continue
+        if not lots:
+            return Response({'detail': 'Aucune séance fournie.'}, status=400)
+        seances = {s.pk: s for s in self.get_queryset().filter(pk__in=lots)}
+        resultats = enregistrer_presences([(seances[sid], items) for sid, items in lots.items() if sid in seances])
+        return Response({
+            'seances': resultats,
+            'introuvables': [sid for sid in lots if sid not in seances],
+        })
 
     @action(detail=True, methods=['post'], permission_classes=[IsAdminOrJewrinConservatoire()])
     def khassidas(self, request, pk=None):
         """
         Met à jour les khassidas répétées pour cette séance.
         Payload: { "khassidas": [{"nom_khassida": "...", "dathie": "...", "khassida_portion": "...", "ordre": 0}] }
+        Réponse : { "seance", "supprimees": n, "creees": n }
         """
+        from .presences import remplacer_khassidas
         seance = self.get_object()
-        data = request.data.get('khassidas', [])
-        seance.khassidas.all().delete()
-        for i, item in enumerate(data):
-            nom = (item.get('nom_khassida') or '').strip()
-            dathie = (item.get('dathie') or '').strip()
-            if not nom or not dathie:
-                continue
-            KhassidaRepetee.objects.create(
-                seance=seance,
-                nom_khassida=nom,
-                dathie=dathie,
-                khassida_portion=(item.get('khassida_portion') or '').strip(),
-                ordre=item.get('ordre', i)
-            )
-        return Response(SeanceConservatoireSerializer(seance).data)
+        return Response(remplacer_khassidas(seance, request.data.get('khassidas', [])))
 
     @action(detail=False, methods=['get'],
             permission_classes=[IsAuthenticated, IsAdminUserOrRole],
@@ -324,42 +402,24 @@ class SeanceConservatoireViewSet(viewsets.ModelViewSet):
         Export rapport des séances de répétition (PDF, Excel, CSV).
         GET ?date_debut=YYYY-MM-DD&date_fin=YYYY-MM-DD&format=pdf|excel|csv&kourel_id=<id>
         """
-        from .rapport_export import export_rapport_excel, export_rapport_pdf, export_rapport_csv
-
         fmt = request.query_params.get('format', 'excel').lower()
         if fmt not in ('pdf', 'excel', 'xlsx', 'csv'):
             fmt = 'excel'
 
-        date_debut = _parse_date(request.query_params.get('date_debut'))
-        date_fin   = _parse_date(request.query_params.get('date_fin'))
-        kourel_id  = request.query_params.get('kourel_id')
-        if kourel_id:
-            try:
-                kourel_id = int(kourel_id)
-            except ValueError:
-                kourel_id = None
-
-        parts = ['rapport_seances']
-        if date_debut and date_fin:
-            parts += [str(date_debut), str(date_fin)]
-        else:
-            parts.append('toutes')
-        if kourel_id:
-            parts.append(f'kourel{kourel_id}')
-        filename = '_'.join(parts)
-
-        if fmt in ('excel', 'xlsx'):
-            buf = export_rapport_excel(date_debut, date_fin, kourel_id=kourel_id)
-        elif fmt == 'pdf':
-            buf = export_rapport_pdf(date_debut, date_fin, kourel_id=kourel_id)
-        else:
-            buf = export_rapport_csv(date_debut, date_fin, kourel_id=kourel_id)
+        if request.query_params.get('asynchrone') in ('1', 'true'):
+            # Génération en arrière-plan : on retourne l'export à suivre / télécharger
+            from apps.rapports.views import creer_export
+            data, code = creer_export(request.user, 'seances', fmt, request.query_params.dict())
+            return Response(data, status=code)
 
-        return _export_response(buf, fmt, filename)
+        from apps.rapports.registre import TYPES_RAPPORT
+        params = TYPES_RAPPORT['seances']['parametres'](request.query_params)
+        filename = TYPES_RAPPORT['seances']['nom_fichier'](params)
+        return _rapport_response(request, 'seances', fmt, request.query_params, filename)
 
 
 class PresenceSeanceViewSet(viewsets.ModelViewSet):
-    queryset = PresenceSeance.objects.all().select_related('seance', 'membre').order_by('seance', 'membre')
+    queryset = PresenceSeance.objects.all().select_related('seance').order_by('seance', 'membre')
     serializer_class = PresenceSeanceSerializer
     permission_classes = [IsAuthenticated]
     filterset_fields = ['seance', 'membre', 'statut']
@@ -369,39 +429,80 @@ class PresenceSeanceViewSet(viewsets.ModelViewSet):
             return [IsAdminOrJewrinConservatoire()]
         return [IsAuthenticated()]
 
+    # ?ordering= de stats_membres -> clé de tri (membre_id départage les égalités)
+    ORDRES_STATS_MEMBRES = {
+        'pourcentage': lambda m: m['pourcentage'],
+        'nb_presents': lambda m: m['nb_presents'],
+        'nb_absents': lambda m: m['nb_absents'],
+        'nb_total': lambda m: m['nb_total'],
+        'nom': lambda m: m['membre_nom'].lower(),
+    }
+
     @action(detail=False, methods=['get'])
     def stats_membres(self, request):
-        """Pour chaque membre ayant des présences : nb_presents, nb_absents, nb_total, pourcentage."""
-        from django.db.models import Count, Q
+        """
+        Pour chaque membre ayant des présences : nb_presents, nb_absents, nb_total, pourcentage.
+        GET ?kourel_id=&date_debut=YYYY-MM-DD&date_fin=YYYY-MM-DD&type_seance=repetition|prestation
+            &ordering=-pourcentage|nb_presents|nb_absents|nb_total|nom (préfixe '-' : décroissant)
+        Pagination optionnelle avec ?page= / ?page_size= ; sinon liste complète.
+        Compteurs lus dans l'agrégat d'assiduité (groupés par membre), noms en une requête.
+        """
         from django.contrib.auth import get_user_model
+        from .assiduite import agreger
         User = get_user_model()
 
-        kourel_id = request.query_params.get('kourel_id')
-        qs = PresenceSeance.objects.all()
-        if kourel_id:
-            qs = qs.filter(seance__kourel_id=kourel_id)
+        params = request.query_params
+        type_seance = params.get('type_seance')
+        if type_seance == 'tous':
+            type_seance = None
+        if type_seance and type_seance not in dict(SeanceConservatoire.TYPE_CHOICES):
+            return Response({'detail': 'type_seance invalide.'}, status=400)
+        try:
+            kourel_id = int(params['kourel_id']) if params.get('kourel_id') else None
+        except ValueError:
+            return Response({'detail': 'kourel_id invalide.'}, status=400)
+
+        ordering = params.get('ordering', '-pourcentage')
+        champ = ordering.lstrip('-')
+        if champ not in self.ORDRES_STATS_MEMBRES:
+            return Response(
+                {'detail': f"ordering invalide (valeurs : {', '.join(self.ORDRES_STATS_MEMBRES)})."},
+                status=400,
+            )
 
-        qs = qs.values('membre').annotate(
-            nb_total=Count('id'),
-            nb_presents=Count('id', filter=Q(statut='present')),
-            nb_absents=Count('id', filter=Q(statut__in=['absent_non_justifie', 'absent_justifie'])),
+        compteurs = agreger(
+            ('membre_id',), kourel_id=kourel_id, type_seance=type_seance,
+            date_debut=_parse_date(params.get('date_debut')), date_fin=_parse_date(params.get('date_fin')),
         )
+        compteurs = {
+            mid: c for (mid,), c in compteurs.items()
+            if c['nb_presents'] + c['nb_abs_just'] + c['nb_abs_non_just']
+        }
+        noms = {
+            u['id']: f"{u['first_name'] or ''} {u['last_name'] or ''}".strip() or u['username']
+            for u in User.objects.filter(id__in=compteurs).values('id', 'first_name', 'last_name', 'username')
+        }
+
         result = []
-        for row in qs:
-            user = User.objects.filter(id=row['membre']).first()
-            if not user:
+        for mid, c in compteurs.items():
+            if mid not in noms:
                 continue
-            nb_total = row['nb_total'] or 0
-            nb_presents = row['nb_presents'] or 0
-            nb_absents = row['nb_absents'] or 0
-            pourcentage = round((nb_presents / nb_total * 100), 1) if nb_total > 0 else 0
+            nb_absents = c['nb_abs_just'] + c['nb_abs_non_just']
+            nb_total = c['nb_presents'] + nb_absents
             result.append({
-                'membre_id': row['membre'],
-                'membre_nom': user.get_full_name() or user.username,
-                'nb_presents': nb_presents,
+                'membre_id': mid,
+                'membre_nom': noms[mid],
+                'nb_presents': c['nb_presents'],
                 'nb_absents': nb_absents,
                 'nb_total': nb_total,
-                'pourcentage': pourcentage,
+                'pourcentage': round((c['nb_presents'] / nb_total * 100), 1) if nb_total > 0 else 0,
             })
-        result.sort(key=lambda x: -x['pourcentage'])
+        cle = self.ORDRES_STATS_MEMBRES[champ]
+        result.sort(key=lambda m: m['membre_id'])
+        result.sort(key=cle, reverse=ordering.startswith('-'))
+
+        if 'page' in params or 'page_size' in params:
+            paginator = StatsMembresPagination()
+            page = paginator.paginate_queryset(result, request, view=self)
+            return paginator.get_paginated_response(page)
         return Response(result)
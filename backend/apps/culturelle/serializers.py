@@ -1,9 +1,12 @@
 from rest_framework import serializers
+
+from apps.accounts.identites import IdentiteField
+from apps.televersements.serializers import TeleversementField, TeleversementMixin
 from .models import Kamil, Chapitre, Jukki, ProgressionLecture, ActiviteReligieuse, Enseignement, VersementKamil
 
 
 class JukkiSerializer(serializers.ModelSerializer):
-    membre_nom = serializers.CharField(source='membre.get_full_name', read_only=True)
+    membre_nom = IdentiteField(cle='nom', source='membre_id')
     kamil_titre = serializers.CharField(source='kamil.titre', read_only=True)
     kamil_date_debut = serializers.DateField(source='kamil.date_debut', read_only=True)
     kamil_date_fin = serializers.DateField(source='kamil.date_fin', read_only=True)
@@ -13,7 +16,9 @@ class JukkiSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class ChapitreSerializer(serializers.ModelSerializer):
+class ChapitreSerializer(TeleversementMixin, serializers.ModelSerializer):
+    contenu_audio_televersement = TeleversementField(cible='chapitre_audio')
+
     class Meta:
         model = Chapitre
         fields = '__all__'
@@ -52,7 +57,7 @@ class KamilSerializer(serializers.ModelSerializer):
 class VersementKamilSerializer(serializers.ModelSerializer):
     methode_display = serializers.CharField(source='get_methode_paiement_display', read_only=True)
     statut_display = serializers.CharField(source='get_statut_display', read_only=True)
-    membre_nom = serializers.CharField(source='membre.get_full_name', read_only=True)
+    membre_nom = IdentiteField(cle='nom', source='membre_id')
     chapitre_titre = serializers.CharField(source='progression.chapitre.titre', read_only=True)
     chapitre_numero = serializers.IntegerField(source='progression.chapitre.numero', read_only=True)
     kamil_titre = serializers.CharField(source='progression.kamil.titre', read_only=True)
@@ -68,7 +73,7 @@ class ProgressionLectureSerializer(serializers.ModelSerializer):
     chapitre_titre = serializers.CharField(source='chapitre.titre', read_only=True)
     chapitre_numero = serializers.IntegerField(source='chapitre.numero', read_only=True)
     kamil_titre = serializers.CharField(source='kamil.titre', read_only=True)
-    membre_nom = serializers.CharField(source='membre.get_full_name', read_only=True)
+    membre_nom = IdentiteField(cle='nom', source='membre_id')
     pourcentage_versement = serializers.ReadOnlyField()
     reste_a_payer = serializers.ReadOnlyField()
     versements = VersementKamilSerializer(many=True, read_only=True)
@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from django.db.models import Sum, Count
 from apps.accounts.permissions import IsAdminOrJewrinCulturelle, has_admin_access
+from utils.compteurs import CompteurVuesMixin
 
 from .models import Kamil, Chapitre, Jukki, ProgressionLecture, ActiviteReligieuse, Enseignement, VersementKamil
 from .serializers import KamilSerializer, ChapitreSerializer, JukkiSerializer, ProgressionLectureSerializer, ActiviteReligieuseSerializer, EnseignementSerializer, VersementKamilSerializer
@@ -73,13 +74,13 @@ class ChapitreViewSet(viewsets.ModelViewSet):
 
 
 class JukkiViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Jukki.objects.all().select_related('kamil', 'membre').order_by('kamil', 'numero')
+    queryset = Jukki.objects.all().select_related('kamil').order_by('kamil', 'numero')
     serializer_class = JukkiSerializer
     permission_classes = [IsAuthenticated]
     filterset_fields = ['kamil', 'membre', 'est_valide']
 
     def get_queryset(self):
-        qs = Jukki.objects.all().select_related('kamil', 'membre').order_by('kamil', 'numero')
+        qs = Jukki.objects.all().select_related('kamil').order_by('kamil', 'numero')
         if not has_admin_access(self.request.user, 'culturelle'):
             qs = qs.filter(membre=self.request.user)
         return qs
@@ -129,7 +130,7 @@ class ProgressionLectureViewSet(viewsets.ModelViewSet):
     filterset_fields = ['membre', 'kamil', 'chapitre', 'statut']
 
     def get_queryset(self):
-        qs = ProgressionLecture.objects.all().select_related('membre', 'kamil', 'chapitre').order_by('membre', 'kamil', 'chapitre__numero')
+        qs = ProgressionLecture.objects.all().select_related('kamil', 'chapitre').order_by('membre', 'kamil', 'chapitre__numero')
         if not has_admin_access(self.request.user, 'culturelle'):
             qs = qs.filter(membre=self.request.user)
         return qs
@@ -210,7 +211,7 @@ class ActiviteReligieuseViewSet(viewsets.ModelViewSet):
         serializer.save(animateur=self.request.user)
 
 
-class EnseignementViewSet(viewsets.ModelViewSet):
+class EnseignementViewSet(CompteurVuesMixin, viewsets.ModelViewSet):
     queryset = Enseignement.objects.all().order_by('-date_publication')
     serializer_class = EnseignementSerializer
     permission_classes = [IsAuthenticated]
@@ -226,7 +227,7 @@ class VersementKamilViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = VersementKamil.objects.all().select_related(
-            'membre', 'progression', 'progression__chapitre', 'progression__kamil'
+            'progression', 'progression__chapitre', 'progression__kamil'
         ).order_by('-date_versement')
         if not has_admin_access(self.request.user, 'culturelle'):
             qs = qs.filter(membre=self.request.user)
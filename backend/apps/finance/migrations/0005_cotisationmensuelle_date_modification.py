@@ -0,0 +1,20 @@
+# Horodatage de modification : sert de version des données pour le cache des rapports
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_cotisation_unique_with_objet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cotisationmensuelle',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -27,6 +27,7 @@ class CotisationMensuelle(models.Model):
     reference_wave = models.CharField(max_length=100, blank=True)
     mode_paiement = models.CharField(max_length=50, default='wave')
     notes = models.TextField(blank=True)
+    date_modification = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ['membre', 'mois', 'annee', 'type_cotisation', 'objet_assignation']
@@ -2,10 +2,8 @@
 Export des rapports de cotisations en PDF ou Excel.
 Statistiques globales, par membre (taux, montants), somme totale collectée, etc.
 """
-from decimal import Decimal
-from collections import defaultdict
-
 from .models import CotisationMensuelle
+from .stats import CotisationStats
 
 
 def _get_queryset(date_debut=None, date_fin=None, annee=None, mois=None):
@@ -29,87 +27,100 @@ def _get_queryset(date_debut=None, date_fin=None, annee=None, mois=None):
     return qs
 
 
-def _get_stats_par_membre(qs):
-    """Retourne [{membre_id, nom, nb_total, nb_payees, nb_en_attente, nb_retard, montant_total, montant_paye, taux_cotisation}]"""
-    from django.db.models import Sum, Q
-    membre_data = defaultdict(lambda: {
-        'nb_total': 0, 'nb_payees': 0, 'nb_en_attente': 0, 'nb_retard': 0,
-        'montant_total': Decimal('0'), 'montant_paye': Decimal('0'), 'nom': ''
-    })
-    for c in qs:
-        mid = c.membre_id
-        membre_data[mid]['nom'] = c.membre.get_full_name() if c.membre else f'Membre #{mid}'
-        membre_data[mid]['nb_total'] += 1
-        membre_data[mid]['montant_total'] += c.montant
-        if c.statut == 'payee':
-            membre_data[mid]['nb_payees'] += 1
-            membre_data[mid]['montant_paye'] += c.montant
-        elif c.statut == 'en_attente':
-            membre_data[mid]['nb_en_attente'] += 1
-        elif c.statut == 'retard':
-            membre_data[mid]['nb_retard'] += 1
-
-    result = []
-    for mid, d in membre_data.items():
-        nb_total = d['nb_total']
-        nb_payees = d['nb_payees']
-        montant_total = d['montant_total']
-        montant_paye = d['montant_paye']
-        taux = round(100 * nb_payees / nb_total, 1) if nb_total else 0
-        taux_montant = round(float(100 * montant_paye / montant_total), 1) if montant_total else 0
-        result.append({
-            'membre_id': mid, 'nom': d['nom'],
-            'nb_total': nb_total, 'nb_payees': nb_payees,
-            'nb_en_attente': d.get('nb_en_attente', 0), 'nb_retard': d.get('nb_retard', 0),
-            'montant_total': montant_total, 'montant_paye': montant_paye,
-            'montant_restant': montant_total - montant_paye,
-            'taux_cotisation': taux, 'taux_montant': taux_montant
-        })
-    return sorted(result, key=lambda x: (-x['montant_paye'], x['nom']))
+def _periode_str(date_debut=None, date_fin=None, annee=None, mois=None):
+    periode_str = "Toutes les cotisations"
+    if annee:
+        periode_str = f"Année {annee}" + (f" - Mois {mois}" if mois else "")
+    elif date_debut and date_fin:
+        periode_str = f"{date_debut.strftime('%d/%m/%Y')} — {date_fin.strftime('%d/%m/%Y')}"
+    return periode_str
+
+
+# Taille des lots lus en base pendant l'export (mémoire constante quel que soit le volume)
+EXPORT_CHUNK_SIZE = 2000
+# Au-delà de cette taille, le fichier Excel produit est écrit sur disque plutôt qu'en mémoire
+EXPORT_SPOOL_MAX = 5 * 1024 * 1024
+
+MODES_PAIEMENT = {'wave': 'Wave', 'liquide': 'Espèces', 'autre': 'Autre'}
 
 
 def export_rapport_excel(date_debut=None, date_fin=None, annee=None, mois=None):
-    """Export Excel des cotisations + feuille statistiques + feuille par membre."""
+    """
+    Export Excel des cotisations + feuille statistiques + feuille par membre.
+
+    Classeur en écriture seule (lignes écrites au fil de l'eau), statistiques en une
+    requête groupée (CotisationStats) puis un seul parcours du détail par lots
+    (`iterator`), styles nommés partagés. Retourne un fichier temporaire
+    (SpooledTemporaryFile) positionné au début, à servir avec FileResponse.
+    """
     try:
         import openpyxl
-        from openpyxl.styles import Font, Border, Side
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, Border, Side, NamedStyle
         from openpyxl.utils import get_column_letter
     except ImportError:
         return None
+    from tempfile import SpooledTemporaryFile
 
     qs = _get_queryset(date_debut, date_fin, annee, mois)
-    stats_membres = _get_stats_par_membre(qs)
-
-    from django.db.models import Sum, Q
-    agg = qs.aggregate(
-        total_assigne=Sum('montant'),
-        total_paye=Sum('montant', filter=Q(statut='payee')),
+    totaux, stats_membres = CotisationStats(qs).complet()
+    qs = qs.only(
+        'membre_id', 'type_cotisation', 'objet_assignation', 'mois', 'annee', 'montant', 'statut',
+        'date_echeance', 'date_paiement', 'mode_paiement',
+        'membre__first_name', 'membre__last_name',
     )
-    montant_total_collecte = agg.get('total_paye') or Decimal('0')
-    montant_total_assigne = agg.get('total_assigne') or Decimal('0')
-    nb_total = qs.count()
-    nb_payees = qs.filter(statut='payee').count()
-    nb_en_attente = qs.filter(statut='en_attente').count()
-    nb_retard = qs.filter(statut='retard').count()
-    taux_paiement = round(100 * nb_payees / nb_total, 1) if nb_total else 0
-
-    wb = openpyxl.Workbook()
-    header_font = Font(bold=True)
+
+    wb = openpyxl.Workbook(write_only=True)
     thin = Side(style='thin')
     border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    wb.add_named_style(NamedStyle(name='dbm_entete', font=Font(bold=True), border=border))
+    wb.add_named_style(NamedStyle(name='dbm_cellule', border=border))
+    wb.add_named_style(NamedStyle(name='dbm_libelle', font=Font(bold=True)))
+    wb.add_named_style(NamedStyle(name='dbm_titre', font=Font(bold=True, size=14)))
 
-    # Feuille 1 : Statistiques globales
-    ws_stats = wb.active
-    ws_stats.title = "Statistiques"
-    periode_str = "Toutes les cotisations"
-    if annee:
-        periode_str = f"Année {annee}" + (f" - Mois {mois}" if mois else "")
-    elif date_debut and date_fin:
-        periode_str = f"{date_debut.strftime('%d/%m/%Y')} — {date_fin.strftime('%d/%m/%Y')}"
+    def _cellule(ws, value, style='dbm_cellule'):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    # Les feuilles sont créées dans l'ordre d'affichage ; en écriture seule,
+    # chacune est remplie indépendamment (fichier temporaire par feuille).
+    ws_stats = wb.create_sheet("Statistiques")
+    ws_membres = wb.create_sheet("Taux par membre")
+    ws = wb.create_sheet("Détail cotisations")
+    for col in range(1, 11):
+        ws_membres.column_dimensions[get_column_letter(col)].width = 18
+        ws.column_dimensions[get_column_letter(col)].width = 16
+
+    # Feuille 3 : Détail des cotisations (parcours unique par lots)
+    headers = ['Membre', 'Type', 'Objet', 'Mois', 'Année', 'Montant (FCFA)', 'Statut', 'Date échéance', 'Date paiement', 'Mode paiement']
+    ws.append([_cellule(ws, h, 'dbm_entete') for h in headers])
+    for c in qs.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        ws.append([
+            _cellule(ws, c.membre.get_full_name() if c.membre else ''),
+            _cellule(ws, c.get_type_cotisation_display()),
+            _cellule(ws, c.objet_assignation or '—'),
+            _cellule(ws, c.mois),
+            _cellule(ws, c.annee),
+            _cellule(ws, float(c.montant)),
+            _cellule(ws, c.get_statut_display()),
+            _cellule(ws, c.date_echeance.strftime('%d/%m/%Y') if c.date_echeance else ''),
+            _cellule(ws, c.date_paiement.strftime('%d/%m/%Y') if c.date_paiement else ''),
+            _cellule(ws, MODES_PAIEMENT.get(c.mode_paiement or 'wave', c.mode_paiement or '')),
+        ])
+
+    nb_total = totaux['nb_total']
+    nb_payees = totaux['nb_payees']
+    nb_en_attente = totaux['nb_en_attente']
+    nb_retard = totaux['nb_retard']
+    montant_total_assigne = totaux['montant_total']
+    montant_total_collecte = totaux['montant_paye']
+    taux_paiement = totaux['taux_cotisation']
 
-    ws_stats.cell(row=1, column=1, value="Rapport des cotisations").font = Font(bold=True, size=14)
-    ws_stats.cell(row=2, column=1, value=f"Période : {periode_str}")
-    row_s = 4
+    # Feuille 1 : Statistiques globales
+    ws_stats.append([_cellule(ws_stats, "Rapport des cotisations", 'dbm_titre')])
+    ws_stats.append([f"Période : {_periode_str(date_debut, date_fin, annee, mois)}"])
+    ws_stats.append([])
     for label, val in [
         ("Nombre total de cotisations", nb_total),
         ("Cotisations payées", nb_payees),
@@ -120,103 +131,47 @@ def export_rapport_excel(date_debut=None, date_fin=None, annee=None, mois=None):
         ("Somme totale collectée (FCFA)", float(montant_total_collecte)),
         ("Reste à collecter (FCFA)", float(montant_total_assigne - montant_total_collecte)),
     ]:
-        ws_stats.cell(row=row_s, column=1, value=label).font = header_font
-        ws_stats.cell(row=row_s, column=2, value=val).border = border
-        row_s += 1
+        ws_stats.append([_cellule(ws_stats, label, 'dbm_libelle'), _cellule(ws_stats, val)])
 
     # Feuille 2 : Taux et montants par membre
-    ws_membres = wb.create_sheet("Taux par membre", 1)
     h_membres = ['Membre', 'Cotisations totales', 'Payées', 'En attente', 'En retard', 'Montant assigné (FCFA)',
                  'Montant payé (FCFA)', 'Reste (FCFA)', 'Taux cotisation (%)', 'Taux montant (%)']
-    for col, h in enumerate(h_membres, 1):
-        c = ws_membres.cell(row=1, column=col, value=h)
-        c.font = header_font
-        c.border = border
-    for i, s in enumerate(stats_membres, 2):
-        ws_membres.cell(row=i, column=1, value=s['nom']).border = border
-        ws_membres.cell(row=i, column=2, value=s['nb_total']).border = border
-        ws_membres.cell(row=i, column=3, value=s['nb_payees']).border = border
-        ws_membres.cell(row=i, column=4, value=s['nb_en_attente']).border = border
-        ws_membres.cell(row=i, column=5, value=s['nb_retard']).border = border
-        ws_membres.cell(row=i, column=6, value=float(s['montant_total'])).border = border
-        ws_membres.cell(row=i, column=7, value=float(s['montant_paye'])).border = border
-        ws_membres.cell(row=i, column=8, value=float(s['montant_restant'])).border = border
-        ws_membres.cell(row=i, column=9, value=f"{s['taux_cotisation']}%").border = border
-        ws_membres.cell(row=i, column=10, value=f"{s['taux_montant']}%").border = border
-    for col in range(1, 11):
-        ws_membres.column_dimensions[get_column_letter(col)].width = 18
+    ws_membres.append([_cellule(ws_membres, h, 'dbm_entete') for h in h_membres])
+    for s in stats_membres:
+        ws_membres.append([_cellule(ws_membres, v) for v in (
+            s['nom'], s['nb_total'], s['nb_payees'], s['nb_en_attente'], s['nb_retard'],
+            float(s['montant_total']), float(s['montant_paye']), float(s['montant_restant']),
+            f"{s['taux_cotisation']}%", f"{s['taux_montant']}%",
+        )])
 
-    # Feuille 3 : Détail des cotisations
-    ws = wb.create_sheet("Détail cotisations", 2)
-    headers = ['Membre', 'Type', 'Objet', 'Mois', 'Année', 'Montant (FCFA)', 'Statut', 'Date échéance', 'Date paiement', 'Mode paiement']
-    for col, h in enumerate(headers, 1):
-        c = ws.cell(row=1, column=col, value=h)
-        c.font = header_font
-        c.border = border
-    taux_par_membre = {s['membre_id']: s['taux_cotisation'] for s in stats_membres}
-    for i, c in enumerate(qs, 2):
-        ws.cell(row=i, column=1, value=c.membre.get_full_name() if c.membre else '').border = border
-        ws.cell(row=i, column=2, value=c.get_type_cotisation_display()).border = border
-        ws.cell(row=i, column=3, value=c.objet_assignation or '—').border = border
-        ws.cell(row=i, column=4, value=c.mois).border = border
-        ws.cell(row=i, column=5, value=c.annee).border = border
-        ws.cell(row=i, column=6, value=float(c.montant)).border = border
-        ws.cell(row=i, column=7, value=c.get_statut_display()).border = border
-        ws.cell(row=i, column=8, value=c.date_echeance.strftime('%d/%m/%Y') if c.date_echeance else '').border = border
-        ws.cell(row=i, column=9, value=c.date_paiement.strftime('%d/%m/%Y') if c.date_paiement else '').border = border
-        mode_disp = {'wave': 'Wave', 'liquide': 'Espèces', 'autre': 'Autre'}.get(c.mode_paiement or 'wave', c.mode_paiement or '')
-        ws.cell(row=i, column=10, value=mode_disp).border = border
-    for col in range(1, 11):
-        ws.column_dimensions[get_column_letter(col)].width = 16
-
-    from io import BytesIO
-    buf = BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    return buf
+    fichier = SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX)
+    wb.save(fichier)
+    fichier.seek(0)
+    return fichier
 
 
 def export_rapport_pdf(date_debut=None, date_fin=None, annee=None, mois=None):
     """Export PDF des cotisations."""
     try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.styles import getSampleStyleSheet
         from reportlab.lib.units import cm
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.platypus import Table, Paragraph, Spacer
+        from utils import pdf_outils
     except ImportError:
         return None
 
     qs = _get_queryset(date_debut, date_fin, annee, mois)
-    stats_membres = _get_stats_par_membre(qs)
-
-    from django.db.models import Sum, Q
-    agg = qs.aggregate(
-        total_assigne=Sum('montant'),
-        total_paye=Sum('montant', filter=Q(statut='payee')),
-    )
-    montant_total_collecte = agg.get('total_paye') or Decimal('0')
-    montant_total_assigne = agg.get('total_assigne') or Decimal('0')
-    nb_total = qs.count()
-    nb_payees = qs.filter(statut='payee').count()
-    nb_en_attente = qs.filter(statut='en_attente').count()
-    nb_retard = qs.filter(statut='retard').count()
-    taux_paiement = round(100 * nb_payees / nb_total, 1) if nb_total else 0
+    totaux, stats_membres = CotisationStats(qs).complet()
+    montant_total_collecte = totaux['montant_paye']
+    montant_total_assigne = totaux['montant_total']
+    nb_total = totaux['nb_total']
+    nb_payees = totaux['nb_payees']
+    nb_en_attente = totaux['nb_en_attente']
+    nb_retard = totaux['nb_retard']
+    taux_paiement = totaux['taux_cotisation']
 
-    from io import BytesIO
-    buf = BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    periode_str = "Toutes les cotisations"
-    if annee:
-        periode_str = f"Année {annee}" + (f" - Mois {mois}" if mois else "")
-    elif date_debut and date_fin:
-        periode_str = f"{date_debut.strftime('%d/%m/%Y')} — {date_fin.strftime('%d/%m/%Y')}"
-
-    from utils.pdf_header import build_pdf_header
-    elements.extend(build_pdf_header("Rapport des cotisations", periode_str))
+    styles = pdf_outils.styles()
+    periode_str = _periode_str(date_debut, date_fin, annee, mois)
+    elements = pdf_outils.titre_rapport("Rapport des cotisations", periode_str)
 
     # Statistiques
     stats_data = [
@@ -230,17 +185,13 @@ def export_rapport_pdf(date_debut=None, date_fin=None, annee=None, mois=None):
         ['Reste à collecter (FCFA)', f'{float(montant_total_assigne - montant_total_collecte):,.0f}'],
     ]
     stats_table = Table([['Indicateur', 'Valeur']] + stats_data, colWidths=[6*cm, 4*cm])
-    stats_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2D5F3F')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    elements.append(Paragraph('<b>Statistiques</b>', styles['Heading2']))
+    stats_table.setStyle(pdf_outils.style_tableau_simple())
+    elements.append(Paragraph('<b>Statistiques</b>', styles['heading2']))
     elements.append(stats_table)
     elements.append(Spacer(1, 0.8*cm))
 
     # Taux par membre
-    elements.append(Paragraph('<b>Taux et montants par membre</b>', styles['Heading2']))
+    elements.append(Paragraph('<b>Taux et montants par membre</b>', styles['heading2']))
     elements.append(Spacer(1, 0.3*cm))
     if stats_membres:
         m_headers = [['Membre', 'Payées', 'Total', 'Montant assigné', 'Montant payé', 'Taux (%)']]
@@ -248,16 +199,68 @@ def export_rapport_pdf(date_debut=None, date_fin=None, annee=None, mois=None):
                    f"{float(s['montant_total']):,.0f}", f"{float(s['montant_paye']):,.0f}",
                    f"{s['taux_cotisation']}%"] for s in stats_membres]
         mt = Table(m_headers + m_data, colWidths=[5*cm, 2*cm, 2*cm, 3*cm, 3*cm, 2*cm])
-        mt.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2D5F3F')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
+        mt.setStyle(pdf_outils.style_tableau_simple(taille_entete=9))
         elements.append(mt)
     else:
-        elements.append(Paragraph('Aucune cotisation.', styles['Normal']))
+        elements.append(Paragraph('Aucune cotisation.', styles['normal']))
+
+    from io import BytesIO
+    return BytesIO(pdf_outils.rendre(elements))
+
+
+# ────────────────────────── Exports CSV (flux) ──────────────────────────────
+
+def _date_heure_str(value):
+    if not value:
+        return ''
+    from django.utils import timezone
+    return timezone.localtime(value).strftime('%d/%m/%Y %H:%M')
+
 
-    doc.build(elements)
-    buf.seek(0)
-    return buf
+def lignes_cotisations_csv(qs):
+    """
+    Lignes CSV des cotisations de `qs` (générateur, lecture par lots avec `.iterator()`).
+    Colonnes lues en values_list : pas d'instanciation de modèles.
+    """
+    statuts = dict(CotisationMensuelle.STATUT_CHOICES)
+    types = dict(CotisationMensuelle.TYPE_CHOICES)
+    yield [
+        'ID', 'Membre', 'Téléphone', 'Type', 'Objet', 'Mois', 'Année', 'Montant (FCFA)',
+        'Échéance', 'Statut', 'Date paiement', 'Mode paiement', 'Référence Wave', 'Notes',
+    ]
+    lignes = qs.values_list(
+        'id', 'membre__first_name', 'membre__last_name', 'membre__telephone',
+        'type_cotisation', 'objet_assignation', 'mois', 'annee', 'montant',
+        'date_echeance', 'statut', 'date_paiement', 'mode_paiement', 'reference_wave', 'notes',
+    )
+    for (pk, prenom, nom, tel, type_c, objet, mois, annee, montant,
+         echeance, statut, date_paiement, mode, ref, notes) in lignes.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            pk, f'{prenom or ""} {nom or ""}'.strip(), tel or '', types.get(type_c, type_c), objet,
+            mois, annee, montant, echeance.strftime('%d/%m/%Y') if echeance else '',
+            statuts.get(statut, statut), _date_heure_str(date_paiement),
+            MODES_PAIEMENT.get(mode, mode), ref, notes,
+        ]
+
+
+def lignes_transactions_csv(qs):
+    """Lignes CSV des transactions de `qs` (générateur, lecture par lots avec `.iterator()`)."""
+    from .models import Transaction
+    statuts = dict(Transaction.STATUT_CHOICES)
+    types = dict(Transaction.TYPE_CHOICES)
+    yield [
+        'Référence interne', 'Date', 'Membre', 'Téléphone', 'Type', 'Montant (FCFA)', 'Statut',
+        'Description', 'Référence Wave', 'Cotisation (mois/année)', 'Levée de fonds',
+    ]
+    lignes = qs.values_list(
+        'reference_interne', 'date_transaction', 'membre__first_name', 'membre__last_name',
+        'membre__telephone', 'type_transaction', 'montant', 'statut', 'description',
+        'reference_wave', 'cotisation__mois', 'cotisation__annee', 'levee_fonds__titre',
+    )
+    for (ref, date_tr, prenom, nom, tel, type_t, montant, statut, description,
+         ref_wave, c_mois, c_annee, levee) in lignes.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            ref, _date_heure_str(date_tr), f'{prenom or ""} {nom or ""}'.strip(), tel or '',
+            types.get(type_t, type_t), montant, statuts.get(statut, statut), description, ref_wave,
+            f'{c_mois:02d}/{c_annee}' if c_mois and c_annee else '', levee or '',
+        ]
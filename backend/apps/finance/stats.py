@@ -0,0 +1,117 @@
+"""
+Statistiques des cotisations calculées en une seule requête d'agrégation conditionnelle
+(`Count` / `Sum` avec `filter=Q(...)`), au lieu d'un `count()` par statut.
+
+Utilisé par :
+- CotisationMensuelleViewSet.statistiques (totaux)
+- rapport_export (totaux + détail par membre)
+- accounts.views.stats_admin (totaux globaux et du mois courant)
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+
+from .models import CotisationMensuelle
+
+STATUTS = ('payee', 'en_attente', 'retard', 'annulee')
+
+
+def _agregats(condition=None, suffixe=''):
+    """Expressions d'agrégation (compteurs par statut, montants) restreintes à `condition`."""
+    def f(q=None):
+        if condition is None:
+            return q
+        return condition & q if q is not None else condition
+
+    return {
+        f'nb_total{suffixe}': Count('id', filter=f()),
+        f'nb_payees{suffixe}': Count('id', filter=f(Q(statut='payee'))),
+        f'nb_en_attente{suffixe}': Count('id', filter=f(Q(statut='en_attente'))),
+        f'nb_retard{suffixe}': Count('id', filter=f(Q(statut='retard'))),
+        f'nb_annulees{suffixe}': Count('id', filter=f(Q(statut='annulee'))),
+        f'montant_total{suffixe}': Sum('montant', filter=f()),
+        f'montant_paye{suffixe}': Sum('montant', filter=f(Q(statut='payee'))),
+    }
+
+
+def _completer(d):
+    """Montants nuls -> Decimal('0'), ajoute reste et taux."""
+    d['montant_total'] = d.get('montant_total') or Decimal('0')
+    d['montant_paye'] = d.get('montant_paye') or Decimal('0')
+    d['montant_restant'] = d['montant_total'] - d['montant_paye']
+    d['taux_cotisation'] = round(100 * d['nb_payees'] / d['nb_total'], 1) if d['nb_total'] else 0
+    d['taux_montant'] = (
+        round(float(100 * d['montant_paye'] / d['montant_total']), 1) if d['montant_total'] else 0
+    )
+    return d
+
+
+class CotisationStats:
+    """
+    Statistiques d'un queryset de cotisations.
+
+        stats = CotisationStats(qs)
+        stats.totaux()                                  # 1 requête (aggregate)
+        stats.totaux(ce_mois=Q(annee=2026, mois=2))     # idem, + sous-totaux nommés
+        stats.par_membre()                              # 1 requête (GROUP BY membre)
+        stats.complet()                                 # totaux + par membre, 1 requête
+
+    Clés : nb_total, nb_payees, nb_en_attente, nb_retard, nb_annulees, montant_total,
+    montant_paye, montant_restant, taux_cotisation (%), taux_montant (%).
+    """
+
+    def __init__(self, queryset=None):
+        if queryset is None:
+            queryset = CotisationMensuelle.objects.all()
+        # Un ORDER BY hérité (ex. annee, mois) ajouterait ses colonnes au GROUP BY
+        self.queryset = queryset.order_by()
+
+    def totaux(self, **sous_ensembles):
+        """
+        Totaux du queryset. Chaque argument nommé (Q) ajoute un sous-dictionnaire de mêmes
+        clés restreint à cette condition, calculé dans la même requête.
+        """
+        expressions = _agregats()
+        for nom, condition in sous_ensembles.items():
+            expressions.update(_agregats(condition, f'__{nom}'))
+        brut = self.queryset.aggregate(**expressions)
+        resultat = _completer({k: v for k, v in brut.items() if '__' not in k})
+        for nom in sous_ensembles:
+            suffixe = f'__{nom}'
+            resultat[nom] = _completer({
+                k[:-len(suffixe)]: v for k, v in brut.items() if k.endswith(suffixe)
+            })
+        return resultat
+
+    def par_membre(self):
+        """
+        Détail par membre, trié par montant payé décroissant puis nom :
+        [{membre_id, nom, nb_total, nb_payees, ..., taux_cotisation, taux_montant}]
+        """
+        lignes = (
+            self.queryset
+            .values('membre_id', 'membre__first_name', 'membre__last_name')
+            .annotate(**_agregats())
+        )
+        result = []
+        for ligne in lignes:
+            mid = ligne.pop('membre_id')
+            prenom = ligne.pop('membre__first_name') or ''
+            nom = ligne.pop('membre__last_name') or ''
+            result.append(_completer({
+                'membre_id': mid,
+                'nom': f'{prenom} {nom}'.strip(),  # = get_full_name()
+                **ligne,
+            }))
+        return sorted(result, key=lambda x: (-x['montant_paye'], x['nom'], x['membre_id']))
+
+    def complet(self):
+        """Totaux et détail par membre à partir de la seule requête groupée par membre."""
+        membres = self.par_membre()
+        totaux = {k: 0 for k in ('nb_total', 'nb_payees', 'nb_en_attente', 'nb_retard', 'nb_annulees')}
+        totaux['montant_total'] = Decimal('0')
+        totaux['montant_paye'] = Decimal('0')
+        for m in membres:
+            for k in totaux:
+                totaux[k] += m[k]
+        return _completer(totaux), membres
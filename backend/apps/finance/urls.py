@@ -31,7 +31,6 @@ def _rapport_cotisations_wrapper(req):
         return JsonResponse({'detail': 'Droits insuffisants.'}, status=403)
 
     from datetime import datetime
-    from .rapport_export import export_rapport_excel, export_rapport_pdf
 
     fmt = req.GET.get('format', 'excel').lower()
     if fmt not in ('pdf', 'excel', 'xlsx'):
@@ -52,27 +51,26 @@ def _rapport_cotisations_wrapper(req):
     except (ValueError, TypeError):
         pass
 
-    buf = None
-    content_type = 'application/octet-stream'
+    if req.GET.get('asynchrone') in ('1', 'true'):
+        # Génération en arrière-plan : on retourne l'export à suivre / télécharger
+        from django.http import JsonResponse
+        from apps.rapports.views import creer_export
+        data, code = creer_export(user, 'cotisations', fmt, req.GET.dict())
+        return JsonResponse(data, status=code)
+
     filename = 'rapport_cotisations'
     if annee:
         filename += f'_an{annee}'
         if mois:
             filename += f'_m{mois}'
     filename += '_toutes' if not (annee or date_debut) else ''
-    if fmt in ('excel', 'xlsx'):
-        buf = export_rapport_excel(date_debut, date_fin, annee, mois)
-        content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        filename += '.xlsx'
-    elif fmt == 'pdf':
-        buf = export_rapport_pdf(date_debut, date_fin, annee, mois)
-        content_type = 'application/pdf'
-        filename += '.pdf'
 
-    if not buf:
+    # Servi par blocs depuis le cache des rapports (ETag / 304, régénéré si les cotisations changent)
+    from apps.rapports.cache import servir_rapport
+    from apps.rapports.registre import normaliser_format
+    resp = servir_rapport(req, 'cotisations', normaliser_format(fmt), req.GET, filename)
+    if resp is None:
         return HttpResponse('Erreur génération.', status=500)
-    resp = HttpResponse(buf.read(), content_type=content_type)
-    resp['Content-Disposition'] = f'attachment; filename="{filename}"'
     return resp
 
 
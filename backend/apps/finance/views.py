@@ -2,14 +2,28 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from django.db.models import Sum, Q
 from decimal import Decimal
 from apps.accounts.permissions import IsAdminOrJewrinFinance, has_admin_access
 
 from .models import CotisationMensuelle, LeveeFonds, Transaction, Don, ParametresFinanciers
+from .stats import CotisationStats
 from .serializers import CotisationMensuelleSerializer, LeveeFondsSerializer, TransactionSerializer, DonSerializer, ParametresFinanciersSerializer
 
 
+def _filtrer_periode(qs, request, champ):
+    """Filtre ?date_debut= / ?date_fin= (YYYY-MM-DD, inclus) sur `champ`. None si date invalide."""
+    from datetime import datetime
+    for param, lookup in (('date_debut', 'gte'), ('date_fin', 'lte')):
+        valeur = request.query_params.get(param)
+        if not valeur:
+            continue
+        try:
+            qs = qs.filter(**{f'{champ}__{lookup}': datetime.strptime(valeur, '%Y-%m-%d').date()})
+        except ValueError:
+            return None
+    return qs
+
+
 class CotisationMensuelleViewSet(viewsets.ModelViewSet):
     queryset = CotisationMensuelle.objects.all().order_by('-annee', '-mois')
     serializer_class = CotisationMensuelleSerializer
@@ -156,7 +170,7 @@ class CotisationMensuelleViewSet(viewsets.ModelViewSet):
         if instance.statut == 'payee' and not instance.date_paiement:
             from django.utils import timezone
             instance.date_paiement = timezone.now()
-            instance.save(update_fields=['date_paiement'])
+            instance.save(update_fields=['date_paiement', 'date_modification'])
 
     @action(detail=False, methods=['get'])
     def statistiques(self, request):
@@ -181,51 +195,41 @@ class CotisationMensuelleViewSet(viewsets.ModelViewSet):
         if membre_id:
             qs = qs.filter(membre_id=membre_id)
 
-        total_assignations = qs.count()
-
-        if total_assignations == 0:
-            return Response({
-                'total_assignations': 0,
-                'total_payees': 0,
-                'total_en_attente': 0,
-                'total_retard': 0,
-                'total_annulees': 0,
-                'pourcentage_payees': 0.0,
-                'montant_total_assigne': 0.0,
-                'montant_total_paye': 0.0,
-                'pourcentage_montant_paye': 0.0,
-            })
-
-        total_payees = qs.filter(statut='payee').count()
-        total_en_attente = qs.filter(statut='en_attente').count()
-        total_retard = qs.filter(statut='retard').count()
-        total_annulees = qs.filter(statut='annulee').count()
-
-        aggregates = qs.aggregate(
-            montant_total_assigne=Sum('montant'),
-            montant_total_paye=Sum('montant', filter=Q(statut='payee')),
-        )
-
-        montant_total_assigne = aggregates.get('montant_total_assigne') or Decimal('0')
-        montant_total_paye = aggregates.get('montant_total_paye') or Decimal('0')
+        stats = CotisationStats(qs).totaux()
+        total_assignations = stats['nb_total']
+        montant_total_assigne = stats['montant_total']
+        montant_total_paye = stats['montant_paye']
 
-        pourcentage_payees = (total_payees / total_assignations) * 100 if total_assignations > 0 else 0
+        pourcentage_payees = (stats['nb_payees'] / total_assignations) * 100 if total_assignations > 0 else 0
         pourcentage_montant_paye = (
             (montant_total_paye / montant_total_assigne) * 100 if montant_total_assigne > 0 else 0
         )
 
         return Response({
             'total_assignations': total_assignations,
-            'total_payees': total_payees,
-            'total_en_attente': total_en_attente,
-            'total_retard': total_retard,
-            'total_annulees': total_annulees,
+            'total_payees': stats['nb_payees'],
+            'total_en_attente': stats['nb_en_attente'],
+            'total_retard': stats['nb_retard'],
+            'total_annulees': stats['nb_annulees'],
             'pourcentage_payees': float(round(pourcentage_payees, 2)),
             'montant_total_assigne': float(montant_total_assigne),
             'montant_total_paye': float(montant_total_paye),
             'pourcentage_montant_paye': float(round(pourcentage_montant_paye, 2)),
         })
 
+    @action(detail=False, methods=['get'], url_path='export-csv')
+    def export_csv(self, request):
+        """
+        Export CSV (en flux) des cotisations visibles, avec les mêmes filtres que la liste
+        (?membre=&mois=&annee=&statut=) et ?date_debut=&date_fin= sur la date d'échéance.
+        """
+        from utils.csv_stream import reponse_csv
+        from .rapport_export import lignes_cotisations_csv
+        qs = _filtrer_periode(self.filter_queryset(self.get_queryset()), request, 'date_echeance')
+        if qs is None:
+            return Response({'detail': 'Dates invalides (format YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+        return reponse_csv(lignes_cotisations_csv(qs.order_by('annee', 'mois', 'id')), 'cotisations.csv')
+
     @action(detail=True, methods=['post'])
     def payer(self, request, pk=None):
         """Membre déclare un paiement (référence Wave/OM). Seul l'admin marque comme payée après vérification."""
@@ -238,7 +242,7 @@ class CotisationMensuelleViewSet(viewsets.ModelViewSet):
         mode_paiement = request.data.get('mode_paiement', 'wave')
         cotisation.reference_wave = reference_wave or cotisation.reference_wave
         cotisation.mode_paiement = mode_paiement
-        cotisation.save(update_fields=['reference_wave', 'mode_paiement'])
+        cotisation.save(update_fields=['reference_wave', 'mode_paiement', 'date_modification'])
         return Response(CotisationMensuelleSerializer(cotisation).data)
 
 
@@ -370,6 +374,19 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(membre=self.request.user)
         return qs
 
+    @action(detail=False, methods=['get'], url_path='export-csv')
+    def export_csv(self, request):
+        """
+        Export CSV (en flux) des transactions visibles, avec les mêmes filtres que la liste
+        (?type_transaction=&statut=&membre=) et ?date_debut=&date_fin= sur la date de transaction.
+        """
+        from utils.csv_stream import reponse_csv
+        from .rapport_export import lignes_transactions_csv
+        qs = _filtrer_periode(self.filter_queryset(self.get_queryset()), request, 'date_transaction__date')
+        if qs is None:
+            return Response({'detail': 'Dates invalides (format YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+        return reponse_csv(lignes_transactions_csv(qs.order_by('date_transaction', 'id')), 'transactions.csv')
+
 
 class DonViewSet(viewsets.ModelViewSet):
     queryset = Don.objects.all().order_by('-date_don')
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:19
+
+from django.db import migrations
+import utils.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informations', '0003_alter_newspost_titre_contenu'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='evenement',
+            name='image',
+            field=utils.images.ImageDeriveeField(blank=True, null=True, upload_to='evenements/'),
+        ),
+        migrations.AlterField(
+            model_name='galeriemedia',
+            name='fichier',
+            field=utils.images.FichierDeriveField(upload_to='galerie/'),
+        ),
+        migrations.AlterField(
+            model_name='newsimage',
+            name='image',
+            field=utils.images.ImageDeriveeField(upload_to='news/'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:57
+
+from django.db import migrations, models
+import utils.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('informations', '0004_images_derivees'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evenement',
+            name='image_largeur',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)", null=True),
+        ),
+        migrations.AddField(
+            model_name='galeriemedia',
+            name='fichier_largeur',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)", null=True),
+        ),
+        migrations.AddField(
+            model_name='newsimage',
+            name='image_largeur',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)", null=True),
+        ),
+        migrations.AlterField(
+            model_name='evenement',
+            name='image',
+            field=utils.images.ImageDeriveeField(blank=True, largeur_field='image_largeur', null=True, upload_to='evenements/'),
+        ),
+        migrations.AlterField(
+            model_name='galeriemedia',
+            name='fichier',
+            field=utils.images.FichierDeriveField(largeur_field='fichier_largeur', upload_to='galerie/'),
+        ),
+        migrations.AlterField(
+            model_name='newsimage',
+            name='image',
+            field=utils.images.ImageDeriveeField(largeur_field='image_largeur', upload_to='news/'),
+        ),
+    ]
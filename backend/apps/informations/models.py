@@ -1,5 +1,6 @@
 from django.db import models
 from apps.accounts.models import CustomUser
+from utils.images import FichierDeriveField, ImageDeriveeField
 
 
 class Groupe(models.Model):
@@ -38,7 +39,8 @@ class Evenement(models.Model):
     lieu = models.CharField(max_length=200)
     adresse_complete = models.TextField(blank=True)
     lien_visio = models.URLField(blank=True)
-    image = models.ImageField(upload_to='evenements/', null=True, blank=True)
+    image = ImageDeriveeField(upload_to='evenements/', null=True, blank=True, largeur_field='image_largeur')
+    image_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)")
     capacite_max = models.IntegerField(null=True, blank=True)
     cree_par = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='evenements_crees')
     date_creation = models.DateTimeField(auto_now_add=True)
@@ -136,7 +138,8 @@ class GalerieMedia(models.Model):
     titre = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     type_media = models.CharField(max_length=20, choices=TYPE_CHOICES)
-    fichier = models.FileField(upload_to='galerie/')
+    fichier = FichierDeriveField(upload_to='galerie/', largeur_field='fichier_largeur')
+    fichier_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)")
     evenement = models.ForeignKey(Evenement, on_delete=models.SET_NULL, null=True, blank=True, related_name='medias')
     upload_par = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     date_upload = models.DateTimeField(auto_now_add=True)
@@ -170,7 +173,8 @@ class NewsPost(models.Model):
 
 class NewsImage(models.Model):
     post = models.ForeignKey(NewsPost, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='news/')
+    image = ImageDeriveeField(upload_to='news/', largeur_field='image_largeur')
+    image_largeur = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Largeur de l'original (px), renseignée avec ses dérivés (srcset)")
     ordre = models.IntegerField(default=0)
 
     class Meta:
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from utils.images import DeriveField
 from .models import (
     Groupe, Evenement, ParticipationEvenement, Publication, Annonce, GalerieMedia,
     NewsPost, NewsImage, NewsLike, NewsBookmark, NewsComment,
@@ -15,6 +17,8 @@ class GroupeSerializer(serializers.ModelSerializer):
 class EvenementSerializer(serializers.ModelSerializer):
     type_evenement_display = serializers.CharField(source='get_type_evenement_display', read_only=True)
     cree_par_nom = serializers.CharField(source='cree_par.get_full_name', read_only=True)
+    image_thumb = DeriveField(source='image')
+    image_srcset = DeriveField(source='image', taille='srcset')
 
     class Meta:
         model = Evenement
@@ -48,6 +52,9 @@ class AnnonceSerializer(serializers.ModelSerializer):
 
 
 class GalerieMediaSerializer(serializers.ModelSerializer):
+    fichier_thumb = DeriveField(source='fichier')
+    fichier_srcset = DeriveField(source='fichier', taille='srcset')
+
     class Meta:
         model = GalerieMedia
         fields = '__all__'
@@ -55,9 +62,12 @@ class GalerieMediaSerializer(serializers.ModelSerializer):
 
 
 class NewsImageSerializer(serializers.ModelSerializer):
+    image_thumb = DeriveField(source='image')
+    image_srcset = DeriveField(source='image', taille='srcset')
+
     class Meta:
         model = NewsImage
-        fields = ['id', 'image', 'ordre']
+        fields = ['id', 'image', 'image_thumb', 'image_srcset', 'ordre']
 
 
 class NewsCommentSerializer(serializers.ModelSerializer):
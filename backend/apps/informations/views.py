@@ -9,7 +9,8 @@ from .models import (
     Groupe, Evenement, ParticipationEvenement, Publication, Annonce, GalerieMedia,
     NewsPost, NewsImage, NewsLike, NewsBookmark, NewsComment,
 )
-from apps.communication.push import send_push_to_user
+from apps.communication.push import enqueue_push_to_users
+from utils.compteurs import CompteurVuesMixin
 from .serializers import (
     GroupeSerializer, EvenementSerializer, ParticipationEvenementSerializer, PublicationSerializer, AnnonceSerializer, GalerieMediaSerializer,
     NewsPostSerializer, NewsCommentSerializer,
@@ -70,8 +71,8 @@ class EvenementViewSet(viewsets.ModelViewSet):
                     details.append(f"Lieu : {evt.lieu}")
                 if details:
                     texte += "\n\n" + " | ".join(details)
-            for m in membres:
-                send_push_to_user(m, texte, contexte='evenement')
+            # Mise en file : l'envoi est fait par la commande process_push_queue
+            enqueue_push_to_users(membres, texte, contexte='evenement')
 
     @action(detail=True, methods=['post'])
     def s_inscrire(self, request, pk=None):
@@ -90,7 +91,7 @@ class EvenementViewSet(viewsets.ModelViewSet):
         return Response(status=204)
 
 
-class PublicationViewSet(viewsets.ModelViewSet):
+class PublicationViewSet(CompteurVuesMixin, viewsets.ModelViewSet):
     queryset = Publication.objects.filter(est_publiee=True).order_by('-date_publication')
     serializer_class = PublicationSerializer
     filterset_fields = ['categorie', 'est_publiee']
@@ -130,7 +131,7 @@ class AnnonceViewSet(viewsets.ModelViewSet):
         serializer.save(auteur=self.request.user)
 
 
-class GalerieMediaViewSet(viewsets.ModelViewSet):
+class GalerieMediaViewSet(CompteurVuesMixin, viewsets.ModelViewSet):
     queryset = GalerieMedia.objects.all().order_by('-date_upload')
     serializer_class = GalerieMediaSerializer
     filterset_fields = ['type_media', 'evenement']
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import ExportRapport
+
+
+@admin.register(ExportRapport)
+class ExportRapportAdmin(admin.ModelAdmin):
+    list_display = ['type_rapport', 'format', 'statut', 'demande_par', 'taille', 'date_creation', 'date_expiration']
+    list_filter = ['statut', 'type_rapport', 'format']
+    raw_id_fields = ['demande_par']
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class RapportsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.rapports'
+    verbose_name = 'Rapports'
@@ -0,0 +1,143 @@
+"""
+Cache des rapports générés, adressé par contenu.
+
+La clé d'un rapport est l'empreinte SHA-256 de (type, format, paramètres, version des
+données). La version des données est lue sur les modèles dont dépend le rapport
+(nombre de lignes + dernier `date_modification`) : toute création, modification ou
+suppression change la version, donc la clé — l'ancien fichier n'est simplement plus
+demandé et finit purgé. La clé sert aussi d'ETag (réponse 304 sur If-None-Match).
+
+Les fichiers sont stockés sur le stockage par défaut (MEDIA_ROOT ou S3) sous
+`rapports/cache/<clé><extension>`, partagés entre les processus.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+
+from .registre import EXTENSIONS, TYPES_RAPPORT
+
+DOSSIER_CACHE = 'rapports/cache'
+
+
+def version_donnees(type_rapport):
+    """
+    Version des données d'un type de rapport : (nombre, dernière modification) de chaque
+    modèle. Une requête d'agrégat par modèle (index sur date_modification).
+    None si le type n'est pas mis en cache.
+    """
+    modeles = TYPES_RAPPORT.get(type_rapport, {}).get('modeles') or ()
+    if not modeles:
+        return None
+    version = []
+    for label in modeles:
+        agg = django_apps.get_model(label).objects.aggregate(n=Count('pk'), m=Max('date_modification'))
+        version.append([label, agg['n'], agg['m'].isoformat() if agg['m'] else None])
+    return version
+
+
+def cle_rapport(type_rapport, fmt, params, version):
+    brut = json.dumps(
+        {'type': type_rapport, 'format': fmt, 'parametres': params, 'version': version},
+        sort_keys=True,
+    )
+    return hashlib.sha256(brut.encode('utf-8')).hexdigest()
+
+
+def chemin_cache(cle, fmt):
+    return f'{DOSSIER_CACHE}/{cle}{EXTENSIONS[fmt][1]}'
+
+
+def obtenir_rapport(type_rapport, fmt, params, cle):
+    """
+    Chemin (stockage par défaut) du rapport de clé `cle`, généré et mis en cache s'il
+    est absent. None si la génération a échoué (dépendance manquante).
+    """
+    chemin = chemin_cache(cle, fmt)
+    if default_storage.exists(chemin):
+        return chemin
+    buf = TYPES_RAPPORT[type_rapport]['generer'](fmt, params)
+    if buf is None:
+        return None
+    try:
+        # Deux générations concurrentes de la même clé produisent le même contenu :
+        # le stockage renomme la seconde, qui sera purgée avec le reste du cache.
+        return default_storage.save(chemin, File(buf, name=chemin.rsplit('/', 1)[-1]))
+    finally:
+        buf.close()
+
+
+def servir_rapport(request, type_rapport, fmt, data, nom_fichier):
+    """
+    Réponse HTTP d'un rapport synchrone servi depuis le cache.
+    - If-None-Match égal à la clé courante : 304 sans relire ni régénérer le fichier
+    - sinon : fichier en cache (ou généré puis mis en cache), avec ETag ; les formats
+      déclarés en flux (CSV) absents du cache sont envoyés au fil de la génération
+    `nom_fichier` : nom sans extension proposé au téléchargement. Retourne None si la
+    génération a échoué. Lève ValueError si les paramètres sont invalides.
+    """
+    definition = TYPES_RAPPORT[type_rapport]
+    params = definition['parametres'](data)
+    content_type, ext = EXTENSIONS[fmt]
+    version = version_donnees(type_rapport)
+    if version is None:
+        # Type non mis en cache : génération directe
+        buf = definition['generer'](fmt, params)
+        if buf is None:
+            return None
+        return FileResponse(buf, as_attachment=True, filename=f'{nom_fichier}{ext}', content_type=content_type)
+
+    cle = cle_rapport(type_rapport, fmt, params, version)
+    etag = quote_etag(cle)
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and etag in parse_etags(if_none_match):
+        resp = HttpResponse(status=304)
+        resp['ETag'] = etag
+        return resp
+
+    flux = (definition.get('flux') or {}).get(fmt)
+    if flux and not default_storage.exists(chemin_cache(cle, fmt)):
+        # Format servi en flux : premier octet immédiat plutôt que génération complète
+        from utils.csv_stream import reponse_csv
+        resp = reponse_csv(flux(params), f'{nom_fichier}{ext}')
+    else:
+        chemin = obtenir_rapport(type_rapport, fmt, params, cle)
+        if chemin is None:
+            return None
+        resp = FileResponse(
+            default_storage.open(chemin, 'rb'), as_attachment=True,
+            filename=f'{nom_fichier}{ext}', content_type=content_type,
+        )
+    resp['ETag'] = etag
+    # Le client peut garder le fichier mais doit revalider (les données peuvent changer)
+    resp['Cache-Control'] = 'private, no-cache'
+    return resp
+
+
+def purger_cache(age_max=None):
+    """Supprime les fichiers du cache plus anciens que `age_max` (défaut EXPORT_RAPPORT_CACHE_TTL)."""
+    if age_max is None:
+        age_max = timedelta(seconds=getattr(settings, 'EXPORT_RAPPORT_CACHE_TTL', 7 * 24 * 3600))
+    limite = timezone.now() - age_max
+    n = 0
+    try:
+        _, fichiers = default_storage.listdir(DOSSIER_CACHE)
+    except (FileNotFoundError, NotImplementedError):
+        return 0
+    for nom in fichiers:
+        chemin = f'{DOSSIER_CACHE}/{nom}'
+        try:
+            if default_storage.get_modified_time(chemin) < limite:
+                default_storage.delete(chemin)
+                n += 1
+        except (FileNotFoundError, NotImplementedError):
+            continue
+    return n
@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.rapports.cache import purger_cache
+from apps.rapports.services import executer_export, purger_exports_expires, reserver_export
+from utils import pdf_parallele
+
+
+# Le cache des rapports est parcouru au plus une fois par intervalle
+INTERVALLE_PURGE_CACHE = 3600
+
+
+class Command(BaseCommand):
+    help = "Génère les rapports demandés en arrière-plan (PDF / Excel / CSV) et purge les fichiers expirés"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Traite les exports en attente puis s\'arrête (usage cron)')
+        parser.add_argument('--sleep', type=float, default=5,
+                            help='Attente en secondes lorsque la file est vide (défaut 5)')
+        parser.add_argument('--pdf-workers', type=int,
+                            default=getattr(settings, 'EXPORT_PDF_WORKERS_TACHES', 0),
+                            help='Processus de rendu des PDF volumineux (0 = nombre de CPU, 1 = séquentiel)')
+
+    def handle(self, *args, **options):
+        pdf_parallele.utiliser_processus(options['pdf_workers'])
+        nb_termines = nb_echecs = 0
+        derniere_purge_cache = 0
+        try:
+            while True:
+                export = reserver_export()
+                if export is None:
+                    nb_purges = purger_exports_expires()
+                    if nb_purges and options['verbosity'] > 1:
+                        self.stdout.write(f'{nb_purges} export(s) expiré(s) purgé(s).')
+                    if time.monotonic() - derniere_purge_cache >= INTERVALLE_PURGE_CACHE or options['once']:
+                        derniere_purge_cache = time.monotonic()
+                        nb_cache = purger_cache()
+                        if nb_cache and options['verbosity'] > 1:
+                            self.stdout.write(f'{nb_cache} rapport(s) en cache purgé(s).')
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                export = executer_export(export)
+                if export.statut == 'termine':
+                    nb_termines += 1
+                else:
+                    nb_echecs += 1
+                    self.stderr.write(f'Export #{export.pk} en échec : {export.erreur}')
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Export #{export.pk} ({export.type_rapport}/{export.format}) : {export.statut}')
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'{nb_termines} rapport(s) généré(s), {nb_echecs} en échec.'))
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportRapport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_rapport', models.CharField(max_length=50)),
+                ('format', models.CharField(choices=[('excel', 'Excel'), ('pdf', 'PDF'), ('csv', 'CSV')], max_length=10)),
+                ('parametres', models.JSONField(blank=True, default=dict)),
+                ('cle', models.CharField(db_index=True, help_text='Empreinte (type, format, paramètres)', max_length=64)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('echec', 'Échec'), ('expire', 'Expiré')], default='en_attente', max_length=20)),
+                ('fichier', models.FileField(blank=True, null=True, upload_to='rapports/%Y/%m/')),
+                ('nom_fichier', models.CharField(blank=True, max_length=255)),
+                ('taille', models.PositiveBigIntegerField(default=0)),
+                ('erreur', models.TextField(blank=True)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_debut', models.DateTimeField(blank=True, null=True)),
+                ('date_fin', models.DateTimeField(blank=True, null=True)),
+                ('date_expiration', models.DateTimeField(blank=True, null=True)),
+                ('demande_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exports_rapports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export de rapport',
+                'verbose_name_plural': 'Exports de rapports',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut', 'date_creation'], name='exportrapport_file_idx')],
+            },
+        ),
+    ]
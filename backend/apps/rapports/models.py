@@ -0,0 +1,57 @@
+from django.db import models
+from django.utils import timezone
+from apps.accounts.models import CustomUser
+
+
+class ExportRapport(models.Model):
+    """
+    Génération d'un rapport (PDF / Excel / CSV) en arrière-plan.
+    Créée par l'API, traitée par la commande `process_export_jobs` ; le fichier produit
+    est stocké sur le stockage par défaut (MEDIA_ROOT ou S3) et réutilisé tant qu'il
+    n'a pas expiré pour les mêmes paramètres (même `cle`).
+    """
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('echec', 'Échec'),
+        ('expire', 'Expiré'),
+    ]
+    FORMAT_CHOICES = [
+        ('excel', 'Excel'),
+        ('pdf', 'PDF'),
+        ('csv', 'CSV'),
+    ]
+
+    type_rapport = models.CharField(max_length=50)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    parametres = models.JSONField(default=dict, blank=True)
+    cle = models.CharField(max_length=64, db_index=True, help_text='Empreinte (type, format, paramètres)')
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_attente')
+    fichier = models.FileField(upload_to='rapports/%Y/%m/', null=True, blank=True)
+    nom_fichier = models.CharField(max_length=255, blank=True)
+    taille = models.PositiveBigIntegerField(default=0)
+    erreur = models.TextField(blank=True)
+    demande_par = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='exports_rapports')
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_debut = models.DateTimeField(null=True, blank=True)
+    date_fin = models.DateTimeField(null=True, blank=True)
+    date_expiration = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Export de rapport'
+        verbose_name_plural = 'Exports de rapports'
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['statut', 'date_creation'], name='exportrapport_file_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.type_rapport} ({self.format}) - {self.get_statut_display()}"
+
+    @property
+    def est_expire(self):
+        """Fichier expiré, qu'il ait déjà été purgé (statut 'expire') ou non."""
+        return self.statut == 'expire' or (
+            self.date_expiration is not None and self.date_expiration <= timezone.now()
+        )
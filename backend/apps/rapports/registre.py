@@ -0,0 +1,168 @@
+"""
+Types de rapports exportables en arrière-plan.
+
+Chaque type déclare :
+- rubrique : rubrique d'administration requise (voir has_admin_access)
+- formats : formats disponibles
+- parametres(data) : paramètres normalisés (dict JSON) à partir de la requête ; lève ValueError si invalides
+- nom_fichier(params) : nom du fichier sans extension
+- generer(fmt, params) : buffer / fichier du rapport (ou None si dépendance manquante)
+- modeles : modèles dont dépend le rapport (version des données du cache, voir cache.py) ;
+  vide = rapport non mis en cache
+- flux (optionnel) : {format: fonction(params) -> lignes} pour les formats servis en flux
+  (CSV) lorsqu'ils ne sont pas déjà en cache
+"""
+from datetime import datetime
+
+EXTENSIONS = {
+    'excel': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+    'pdf': ('application/pdf', '.pdf'),
+    'csv': ('text/csv; charset=utf-8', '.csv'),
+}
+
+
+def normaliser_format(fmt):
+    fmt = (fmt or 'excel').lower()
+    return 'excel' if fmt == 'xlsx' else fmt
+
+
+def _date_iso(value):
+    """'YYYY-MM-DD' valide ou None (même tolérance que les exports synchrones)."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d').date().isoformat()
+    except (ValueError, TypeError):
+        return None
+
+
+def _date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def _entier(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+# ─────────────────────── Conservatoire : rapport des séances ──────────────────────
+
+def _seances_parametres(data):
+    return {
+        'date_debut': _date_iso(data.get('date_debut')),
+        'date_fin': _date_iso(data.get('date_fin')),
+        'kourel_id': _entier(data.get('kourel_id')),
+    }
+
+
+def _seances_nom(params):
+    parts = ['rapport_seances']
+    if params['date_debut'] and params['date_fin']:
+        parts += [params['date_debut'], params['date_fin']]
+    else:
+        parts.append('toutes')
+    if params['kourel_id']:
+        parts.append(f"kourel{params['kourel_id']}")
+    return '_'.join(parts)
+
+
+def _seances_lignes_csv(params):
+    from apps.conservatoire.rapport_export import lignes_rapport_csv
+    return lignes_rapport_csv(_date(params['date_debut']), _date(params['date_fin']), kourel_id=params['kourel_id'])
+
+
+def _seances_generer(fmt, params):
+    from apps.conservatoire.rapport_export import export_rapport_excel, export_rapport_pdf, export_rapport_csv
+    fonction = {'excel': export_rapport_excel, 'pdf': export_rapport_pdf, 'csv': export_rapport_csv}[fmt]
+    return fonction(_date(params['date_debut']), _date(params['date_fin']), kourel_id=params['kourel_id'])
+
+
+# ─────────────────────── Conservatoire : fiche membres d'un kourel ─────────────────
+
+def _fiche_parametres(data):
+    kourel_id = _entier(data.get('kourel_id'))
+    if not kourel_id:
+        raise ValueError('kourel_id requis.')
+    from apps.conservatoire.models import Kourel
+    if not Kourel.objects.filter(pk=kourel_id).exists():
+        raise ValueError('Kourel introuvable.')
+    return {'kourel_id': kourel_id}
+
+
+def _fiche_nom(params):
+    from apps.conservatoire.models import Kourel
+    kourel = Kourel.objects.filter(pk=params['kourel_id']).only('nom').first()
+    return f"membres_{kourel.nom.replace(' ', '_')}" if kourel else f"membres_kourel{params['kourel_id']}"
+
+
+def _fiche_generer(fmt, params):
+    from apps.conservatoire.rapport_export import export_membres_kourel_excel, export_membres_kourel_pdf
+    fonction = {'excel': export_membres_kourel_excel, 'pdf': export_membres_kourel_pdf}[fmt]
+    return fonction(params['kourel_id'])
+
+
+# ─────────────────────────── Finance : rapport des cotisations ─────────────────────
+
+def _cotisations_parametres(data):
+    mois = _entier(data.get('mois'))
+    return {
+        'annee': _entier(data.get('annee')),
+        'mois': mois if mois and 1 <= mois <= 12 else None,
+        'date_debut': _date_iso(data.get('date_debut')),
+        'date_fin': _date_iso(data.get('date_fin')),
+    }
+
+
+def _cotisations_nom(params):
+    nom = 'rapport_cotisations'
+    if params['annee']:
+        nom += f"_an{params['annee']}"
+        if params['mois']:
+            nom += f"_m{params['mois']}"
+    nom += '_toutes' if not (params['annee'] or params['date_debut']) else ''
+    return nom
+
+
+def _cotisations_generer(fmt, params):
+    from apps.finance.rapport_export import export_rapport_excel, export_rapport_pdf
+    fonction = {'excel': export_rapport_excel, 'pdf': export_rapport_pdf}[fmt]
+    return fonction(_date(params['date_debut']), _date(params['date_fin']), params['annee'], params['mois'])
+
+
+TYPES_RAPPORT = {
+    'seances': {
+        'libelle': 'Rapport des séances de répétition',
+        'rubrique': 'conservatoire',
+        'formats': ('excel', 'pdf', 'csv'),
+        'parametres': _seances_parametres,
+        'nom_fichier': _seances_nom,
+        'generer': _seances_generer,
+        'flux': {'csv': _seances_lignes_csv},
+        # Kourel : noms, encadrement et membres (date_modification avancée sur m2m_changed) ;
+        # CustomUser : noms des membres et de l'encadrement
+        'modeles': (
+            'conservatoire.SeanceConservatoire', 'conservatoire.PresenceSeance',
+            'conservatoire.Kourel', 'accounts.CustomUser',
+        ),
+    },
+    'fiche_kourel': {
+        'libelle': 'Fiche des membres du kourel',
+        'rubrique': 'conservatoire',
+        'formats': ('excel', 'pdf'),
+        'parametres': _fiche_parametres,
+        'nom_fichier': _fiche_nom,
+        'generer': _fiche_generer,
+        'modeles': (),
+    },
+    'cotisations': {
+        'libelle': 'Rapport des cotisations',
+        'rubrique': 'finance',
+        'formats': ('excel', 'pdf'),
+        'parametres': _cotisations_parametres,
+        'nom_fichier': _cotisations_nom,
+        'generer': _cotisations_generer,
+        'modeles': ('finance.CotisationMensuelle', 'accounts.CustomUser'),
+    },
+}
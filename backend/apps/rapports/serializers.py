@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from .models import ExportRapport
+
+
+class ExportRapportSerializer(serializers.ModelSerializer):
+    statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+    url_telechargement = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportRapport
+        fields = [
+            'id', 'type_rapport', 'format', 'parametres', 'statut', 'statut_display',
+            'nom_fichier', 'taille', 'erreur', 'date_creation', 'date_debut', 'date_fin',
+            'date_expiration', 'url_telechargement',
+        ]
+        read_only_fields = fields
+
+    def get_url_telechargement(self, obj):
+        if obj.statut != 'termine' or obj.est_expire:
+            return None
+        return f'/api/rapports/exports/{obj.pk}/telecharger/'
@@ -0,0 +1,146 @@
+"""
+File des exports de rapports : création (avec réutilisation), exécution par le worker,
+notification du demandeur et purge des fichiers expirés.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import cache
+from .models import ExportRapport
+from .registre import EXTENSIONS, TYPES_RAPPORT
+
+# Un export resté "en_cours" plus longtemps (worker arrêté) est repris
+DUREE_RESERVATION = timedelta(minutes=30)
+
+
+def duree_conservation():
+    return timedelta(seconds=getattr(settings, 'EXPORT_RAPPORT_TTL', 3600))
+
+
+def calculer_cle(type_rapport, fmt, params):
+    """Clé de réutilisation : inclut la version des données pour les types mis en cache."""
+    version = cache.version_donnees(type_rapport)
+    if version is not None:
+        return cache.cle_rapport(type_rapport, fmt, params, version)
+    brut = json.dumps({'type': type_rapport, 'format': fmt, 'parametres': params}, sort_keys=True)
+    return hashlib.sha256(brut.encode('utf-8')).hexdigest()
+
+
+def demander_export(user, type_rapport, fmt, params):
+    """
+    Retourne (export, cree). Un export identique (mêmes paramètres et mêmes données)
+    en file, en cours ou terminé et non expiré est réutilisé tel quel ; sinon un nouvel
+    export est mis en file.
+    """
+    cle = calculer_cle(type_rapport, fmt, params)
+    maintenant = timezone.now()
+    existant = (
+        ExportRapport.objects.filter(cle=cle)
+        .filter(Q(statut__in=['en_attente', 'en_cours']) | Q(statut='termine', date_expiration__gt=maintenant))
+        .order_by('-date_creation')
+        .first()
+    )
+    if existant:
+        return existant, False
+    export = ExportRapport.objects.create(
+        type_rapport=type_rapport, format=fmt, parametres=params, cle=cle, demande_par=user,
+    )
+    return export, True
+
+
+def reserver_export():
+    """Réserve le plus ancien export en attente (ou abandonné par un worker)."""
+    maintenant = timezone.now()
+    with transaction.atomic():
+        export = (
+            ExportRapport.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(statut='en_attente') |
+                Q(statut='en_cours', date_debut__lt=maintenant - DUREE_RESERVATION)
+            )
+            .order_by('date_creation', 'id')
+            .first()
+        )
+        if export:
+            export.statut = 'en_cours'
+            export.date_debut = maintenant
+            export.save(update_fields=['statut', 'date_debut'])
+    return export
+
+
+def _notifier(export):
+    if not export.demande_par_id:
+        return
+    from apps.communication.models import Notification
+    libelle = TYPES_RAPPORT.get(export.type_rapport, {}).get('libelle', 'Rapport')
+    if export.statut == 'termine':
+        Notification.objects.create(
+            utilisateur_id=export.demande_par_id,
+            type_notification='succes',
+            titre='Rapport prêt',
+            message=f'{libelle} ({export.get_format_display()}) est prêt au téléchargement.',
+            lien=f'/api/rapports/exports/{export.pk}/telecharger/',
+        )
+    else:
+        Notification.objects.create(
+            utilisateur_id=export.demande_par_id,
+            type_notification='erreur',
+            titre='Échec du rapport',
+            message=f'{libelle} ({export.get_format_display()}) n\'a pas pu être généré.',
+        )
+
+
+def executer_export(export):
+    """Génère le fichier d'un export réservé, l'enregistre sur le stockage et notifie le demandeur."""
+    definition = TYPES_RAPPORT.get(export.type_rapport)
+    try:
+        if definition is None:
+            raise ValueError(f'Type de rapport inconnu : {export.type_rapport}')
+        version = cache.version_donnees(export.type_rapport)
+        if version is not None:
+            # Rapport déjà rendu pour ces données (export synchrone ou autre export) : copie
+            cle = cache.cle_rapport(export.type_rapport, export.format, export.parametres, version)
+            chemin = cache.obtenir_rapport(export.type_rapport, export.format, export.parametres, cle)
+            buf = default_storage.open(chemin, 'rb') if chemin else None
+        else:
+            buf = definition['generer'](export.format, export.parametres)
+        if buf is None:
+            raise RuntimeError('Erreur de génération. Vérifiez openpyxl et reportlab.')
+        nom = definition['nom_fichier'](export.parametres) + EXTENSIONS[export.format][1]
+        try:
+            export.fichier.save(nom, File(buf, name=nom), save=False)
+        finally:
+            buf.close()
+        export.nom_fichier = nom
+        export.taille = export.fichier.size
+        export.statut = 'termine'
+        export.erreur = ''
+        export.date_expiration = timezone.now() + duree_conservation()
+    except Exception as e:
+        export.statut = 'echec'
+        export.erreur = str(e)[:2000] or e.__class__.__name__
+    export.date_fin = timezone.now()
+    export.save()
+    _notifier(export)
+    return export
+
+
+def purger_exports_expires():
+    """Supprime les fichiers des exports expirés. Retourne le nombre d'exports purgés."""
+    expires = ExportRapport.objects.filter(statut='termine', date_expiration__lte=timezone.now())
+    n = 0
+    for export in expires.iterator():
+        if export.fichier:
+            export.fichier.delete(save=False)
+        export.statut = 'expire'
+        export.save(update_fields=['fichier', 'statut'])
+        n += 1
+    return n
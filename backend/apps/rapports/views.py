@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.http import FileResponse, HttpResponseRedirect
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apps.accounts.permissions import has_admin_access
+
+from .models import ExportRapport
+from .registre import EXTENSIONS, TYPES_RAPPORT, normaliser_format
+from .serializers import ExportRapportSerializer
+from .services import demander_export
+
+
+def creer_export(user, type_rapport, fmt, data):
+    """
+    Crée (ou réutilise) un export en arrière-plan. Retourne (données, code HTTP) :
+    202 si le rapport est en file / en cours, 200 s'il est déjà disponible.
+    Utilisé par l'API des exports et par les exports synchrones avec `?asynchrone=1`.
+    """
+    definition = TYPES_RAPPORT.get(type_rapport)
+    if definition is None:
+        return {'detail': 'Type de rapport inconnu.', 'types': list(TYPES_RAPPORT)}, status.HTTP_400_BAD_REQUEST
+    if not has_admin_access(user, definition['rubrique']):
+        return {'detail': 'Droits insuffisants.'}, status.HTTP_403_FORBIDDEN
+    fmt = normaliser_format(fmt)
+    if fmt not in definition['formats']:
+        return {'detail': f"Format non disponible. Formats : {', '.join(definition['formats'])}."}, status.HTTP_400_BAD_REQUEST
+    try:
+        params = definition['parametres'](data)
+    except ValueError as e:
+        return {'detail': str(e)}, status.HTTP_400_BAD_REQUEST
+    export, _ = demander_export(user, type_rapport, fmt, params)
+    code = status.HTTP_200_OK if export.statut == 'termine' else status.HTTP_202_ACCEPTED
+    return ExportRapportSerializer(export).data, code
+
+
+class ExportRapportViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Exports de rapports en arrière-plan.
+    POST {type_rapport, format, parametres} : crée l'export (ou réutilise un export identique récent).
+    GET <id>/ : suivi du statut ; GET <id>/telecharger/ : fichier produit.
+    La liste ne contient que les exports demandés par l'utilisateur.
+    """
+    queryset = ExportRapport.objects.none()
+    serializer_class = ExportRapportSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ['statut', 'type_rapport', 'format']
+
+    def get_queryset(self):
+        user = self.request.user
+        types = [t for t, d in TYPES_RAPPORT.items() if has_admin_access(user, d['rubrique'])]
+        qs = ExportRapport.objects.filter(type_rapport__in=types).order_by('-date_creation')
+        if self.action == 'list':
+            qs = qs.filter(demande_par=user)
+        return qs
+
+    def create(self, request, *args, **kwargs):
+        parametres = request.data.get('parametres') or {}
+        if not isinstance(parametres, dict):
+            return Response({'detail': 'parametres doit être un objet.'}, status=status.HTTP_400_BAD_REQUEST)
+        data, code = creer_export(request.user, request.data.get('type_rapport'), request.data.get('format'), parametres)
+        return Response(data, status=code)
+
+    @action(detail=False, methods=['get'])
+    def types(self, request):
+        """Types de rapports accessibles à l'utilisateur et leurs formats."""
+        return Response([
+            {'type_rapport': t, 'libelle': d['libelle'], 'formats': list(d['formats'])}
+            for t, d in TYPES_RAPPORT.items() if has_admin_access(request.user, d['rubrique'])
+        ])
+
+    @action(detail=True, methods=['get'])
+    def telecharger(self, request, pk=None):
+        export = self.get_object()
+        if export.est_expire:
+            # Expiré mais pas encore purgé (process_export_jobs) : plus servi non plus
+            return Response({'detail': 'Rapport expiré.', 'statut': 'expire'}, status=status.HTTP_410_GONE)
+        if export.statut != 'termine' or not export.fichier:
+            return Response(
+                {'detail': 'Rapport non disponible.', 'statut': export.statut},
+                status=status.HTTP_409_CONFLICT if export.statut in ('en_attente', 'en_cours') else status.HTTP_410_GONE,
+            )
+        if getattr(settings, 'USE_S3_MEDIA', False):
+            # URL signée S3 : le fichier ne transite pas par le serveur
+            return HttpResponseRedirect(export.fichier.url)
+        return FileResponse(
+            export.fichier.open('rb'), as_attachment=True, filename=export.nom_fichier,
+            content_type=EXTENSIONS[export.format][0],
+        )
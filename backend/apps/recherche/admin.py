@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import DocumentRecherche
+
+
+@admin.register(DocumentRecherche)
+class DocumentRechercheAdmin(admin.ModelAdmin):
+    list_display = ['titre', 'type_contenu', 'objet_id', 'categorie', 'public', 'date']
+    list_filter = ['type_contenu', 'public']
+    search_fields = ['titre']
+    exclude = ['contenu']
+    readonly_fields = ['type_contenu', 'objet_id', 'titre', 'tags', 'categorie', 'public', 'date']
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class RechercheConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.recherche'
+    verbose_name = 'Recherche'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (index tenu à jour à chaque écriture)
@@ -0,0 +1,241 @@
+"""
+Index de recherche plein texte : mise à jour des entrées (DocumentRecherche) et requêtes.
+
+Moteur selon la base :
+- SQLite : FTS5 (tokenizer unicode61 sans diacritiques), classement bm25 pondéré
+- PostgreSQL : tsvector généré + index GIN (configuration 'simple' : sans racinisation,
+  comme FTS5, mais sensible aux accents), classement ts_rank_cd
+- autre base, ou SQLite sans FTS5 : recherche par `icontains` sur le titre et le contenu,
+  sans classement (ordre chronologique)
+
+Les mots de la requête sont tous requis et recherchés comme préfixes (« ahmad » trouve
+« ahmadou »). Les extraits sont renvoyés échappés, les termes trouvés entourés de <mark>.
+"""
+import re
+from datetime import timezone as dt_timezone
+from functools import lru_cache
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.html import escape
+
+from .models import DocumentRecherche
+from .registre import TYPES_CONTENU
+
+TABLE = DocumentRecherche._meta.db_table
+TABLE_FTS = 'recherche_fts'
+
+MOTS_MAX = 10
+LOT_REINDEXATION = 200
+# Marqueurs des termes trouvés dans les extraits, remplacés par <mark> après échappement
+_DEBUT, _FIN = '\x02', '\x03'
+_MOT_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def type_du_modele(modele):
+    label = modele._meta.label
+    for type_contenu, definition in TYPES_CONTENU.items():
+        if definition['modele'] == label:
+            return type_contenu
+    return None
+
+
+# ───────────────────────────────── Indexation ───────────────────────────────
+
+def _donnees(type_contenu, objet):
+    donnees = TYPES_CONTENU[type_contenu]['document'](objet)
+    for champ in ('titre', 'tags', 'categorie'):
+        donnees[champ] = (donnees[champ] or '')[:DocumentRecherche._meta.get_field(champ).max_length]
+    return donnees
+
+
+def indexer(objet, type_contenu=None):
+    """Crée ou met à jour l'entrée d'index de `objet`."""
+    type_contenu = type_contenu or type_du_modele(type(objet))
+    DocumentRecherche.objects.update_or_create(
+        type_contenu=type_contenu, objet_id=objet.pk, defaults=_donnees(type_contenu, objet)
+    )
+
+
+def desindexer(type_contenu, pk):
+    DocumentRecherche.objects.filter(type_contenu=type_contenu, objet_id=pk).delete()
+
+
+def reindexer(types=None):
+    """
+    Reconstruit l'index des `types` (tous par défaut). Retourne le nombre d'entrées.
+    Une transaction par type : pendant la reconstruction les recherches voient l'index
+    précédent, et un échec le laisse intact.
+    """
+    total = 0
+    for type_contenu in types or TYPES_CONTENU:
+        definition = TYPES_CONTENU[type_contenu]
+        modele = django_apps.get_model(definition['modele'])
+        with transaction.atomic():
+            DocumentRecherche.objects.filter(type_contenu=type_contenu).delete()
+            lot = []
+            qs = modele.objects.select_related(*definition['select_related']).order_by('pk')
+            for objet in qs.iterator(chunk_size=LOT_REINDEXATION):
+                lot.append(DocumentRecherche(type_contenu=type_contenu, objet_id=objet.pk, **_donnees(type_contenu, objet)))
+                if len(lot) >= LOT_REINDEXATION:
+                    DocumentRecherche.objects.bulk_create(lot)
+                    total += len(lot)
+                    lot = []
+            if lot:
+                DocumentRecherche.objects.bulk_create(lot)
+                total += len(lot)
+    if moteur() == 'fts5':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {TABLE_FTS}({TABLE_FTS}) VALUES ('optimize')")
+    return total
+
+
+# ───────────────────────────────── Requêtes ─────────────────────────────────
+
+@lru_cache(maxsize=None)
+def _moteur(vendor, alias):
+    if vendor == 'postgresql':
+        return 'postgresql'
+    if vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            if TABLE_FTS in connection.introspection.table_names(cursor):
+                return 'fts5'
+    return 'simple'
+
+
+def moteur():
+    return _moteur(connection.vendor, connection.alias)
+
+
+def mots(q):
+    """Mots de la requête (au plus MOTS_MAX), en minuscules."""
+    return [m.lower() for m in _MOT_RE.findall(q or '')][:MOTS_MAX]
+
+
+def _extrait(texte):
+    if not texte:
+        return ''
+    return escape(texte).replace(_DEBUT, '<mark>').replace(_FIN, '</mark>')
+
+
+def _date_sqlite(valeur):
+    date = parse_datetime(valeur) if isinstance(valeur, str) else valeur
+    if date is not None and settings.USE_TZ and timezone.is_naive(date):
+        date = timezone.make_aware(date, dt_timezone.utc)
+    return date
+
+
+def _filtres(types, public_seulement, alias='d'):
+    sql, params = [], []
+    if public_seulement:
+        sql.append(f'{alias}.public = %s')
+        params.append(True)
+    if types:
+        sql.append(f"{alias}.type_contenu IN ({', '.join(['%s'] * len(types))})")
+        params.extend(types)
+    return ''.join(f' AND {s}' for s in sql), params
+
+
+def _fts5(termes, types, public_seulement, limite, decalage):
+    requete = ' '.join(f'"{t}"*' for t in termes)
+    filtre_public, params_public = _filtres(None, public_seulement)
+    filtre, params_filtre = _filtres(types, public_seulement)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT d.type_contenu, COUNT(*) FROM {TABLE_FTS} JOIN {TABLE} d ON d.id = {TABLE_FTS}.rowid "
+            f"WHERE {TABLE_FTS} MATCH %s{filtre_public} GROUP BY d.type_contenu",
+            [requete, *params_public],
+        )
+        facettes = dict(cursor.fetchall())
+        cursor.execute(
+            f"SELECT d.type_contenu, d.objet_id, d.titre, d.categorie, d.date, "
+            f"bm25({TABLE_FTS}, 10.0, 5.0, 1.0) AS rang, "
+            f"snippet({TABLE_FTS}, 2, %s, %s, '…', 16) "
+            f"FROM {TABLE_FTS} JOIN {TABLE} d ON d.id = {TABLE_FTS}.rowid "
+            f"WHERE {TABLE_FTS} MATCH %s{filtre} ORDER BY rang LIMIT %s OFFSET %s",
+            [_DEBUT, _FIN, requete, *params_filtre, limite, decalage],
+        )
+        # bm25 : plus petit = plus pertinent ; dates lues en texte (UTC) par SQLite
+        lignes = [(*ligne[:4], _date_sqlite(ligne[4]), -ligne[5], ligne[6]) for ligne in cursor.fetchall()]
+    return lignes, facettes
+
+
+def _postgresql(termes, types, public_seulement, limite, decalage):
+    requete = ' & '.join(f"'{t}':*" for t in termes)
+    options = f'StartSel={_DEBUT}, StopSel={_FIN}, MaxWords=30, MinWords=12, MaxFragments=1'
+    filtre_public, params_public = _filtres(None, public_seulement)
+    filtre, params_filtre = _filtres(types, public_seulement)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT d.type_contenu, COUNT(*) FROM {TABLE} d "
+            f"WHERE d.vecteur @@ to_tsquery('simple', %s){filtre_public} GROUP BY d.type_contenu",
+            [requete, *params_public],
+        )
+        facettes = dict(cursor.fetchall())
+        # ts_headline (coûteux) n'est calculé que pour la page retournée
+        cursor.execute(
+            f"SELECT r.type_contenu, r.objet_id, r.titre, r.categorie, r.date, r.rang, "
+            f"ts_headline('simple', d.contenu, to_tsquery('simple', %s), %s) "
+            f"FROM (SELECT d.id, d.type_contenu, d.objet_id, d.titre, d.categorie, d.date, "
+            f"ts_rank_cd(d.vecteur, to_tsquery('simple', %s)) AS rang FROM {TABLE} d "
+            f"WHERE d.vecteur @@ to_tsquery('simple', %s){filtre} "
+            f"ORDER BY rang DESC, d.id LIMIT %s OFFSET %s) r JOIN {TABLE} d ON d.id = r.id "
+            f"ORDER BY r.rang DESC, r.id",
+            [requete, options, requete, requete, *params_filtre, limite, decalage],
+        )
+        lignes = cursor.fetchall()
+    return lignes, facettes
+
+
+def _simple(termes, types, public_seulement, limite, decalage):
+    qs = DocumentRecherche.objects.all()
+    if public_seulement:
+        qs = qs.filter(public=True)
+    for t in termes:
+        qs = qs.filter(Q(titre__icontains=t) | Q(tags__icontains=t) | Q(contenu__icontains=t))
+    facettes = dict(qs.values_list('type_contenu').annotate(n=Count('id')).order_by())
+    if types:
+        qs = qs.filter(type_contenu__in=types)
+    lignes = [
+        (*ligne, 0.0, '')
+        for ligne in qs.order_by('-date', '-id').values_list(
+            'type_contenu', 'objet_id', 'titre', 'categorie', 'date'
+        )[decalage:decalage + limite]
+    ]
+    return lignes, facettes
+
+
+def rechercher(q, types=None, public_seulement=True, limite=20, decalage=0):
+    """
+    Recherche `q` dans l'index. `types` : types de contenu retenus (tous par défaut) ;
+    les facettes comptent les résultats de chaque type, indépendamment de ce filtre.
+    Retourne {count, resultats, facettes}.
+    """
+    termes = mots(q)
+    if not termes:
+        return {'count': 0, 'resultats': [], 'facettes': []}
+    recherche = {'fts5': _fts5, 'postgresql': _postgresql}.get(moteur(), _simple)
+    lignes, facettes = recherche(termes, types, public_seulement, limite, decalage)
+    return {
+        'count': sum(n for t, n in facettes.items() if not types or t in types),
+        'resultats': [
+            {
+                'type': type_contenu,
+                'id': objet_id,
+                'titre': titre,
+                'categorie': categorie,
+                'date': date,
+                'score': round(rang, 4),
+                'extrait': _extrait(extrait),
+            }
+            for type_contenu, objet_id, titre, categorie, date, rang, extrait in lignes
+        ],
+        'facettes': [
+            {'type': t, 'libelle': d['libelle'], 'count': facettes[t]}
+            for t, d in TYPES_CONTENU.items() if facettes.get(t)
+        ],
+    }
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recherche.index import reindexer
+from apps.recherche.registre import TYPES_CONTENU
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte (tous les contenus ou les types indiqués)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('types', nargs='*', help=f"Types de contenu ({', '.join(TYPES_CONTENU)})")
+
+    def handle(self, *args, **options):
+        inconnus = [t for t in options['types'] if t not in TYPES_CONTENU]
+        if inconnus:
+            raise CommandError(f"Type(s) inconnu(s) : {', '.join(inconnus)}")
+        total = reindexer(options['types'] or None)
+        self.stdout.write(self.style.SUCCESS(f'{total} contenu(s) indexé(s).'))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentRecherche',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_contenu', models.CharField(max_length=30)),
+                ('objet_id', models.PositiveBigIntegerField()),
+                ('titre', models.CharField(max_length=255)),
+                ('tags', models.CharField(blank=True, max_length=255)),
+                ('contenu', models.TextField(blank=True, help_text='Description, texte et texte extrait des PDF')),
+                ('categorie', models.CharField(blank=True, max_length=100)),
+                ('public', models.BooleanField(default=True, help_text='Visible des membres (sinon administrateurs seulement)')),
+                ('date', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Document indexé',
+                'verbose_name_plural': 'Documents indexés',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='documentrecherche',
+            constraint=models.UniqueConstraint(fields=('type_contenu', 'objet_id'), name='recherche_document_unique'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+"""
+Index plein texte sur recherche_documentrecherche, selon la base :
+- SQLite : table virtuelle FTS5 à contenu externe + triggers de synchronisation
+  (ignoré si SQLite est compilé sans FTS5 : la recherche utilise alors icontains)
+- PostgreSQL : colonne tsvector générée (titre A, tags B, contenu C) + index GIN
+puis indexation des contenus existants.
+"""
+from django.db import migrations
+from django.db.utils import OperationalError
+
+SQLITE = [
+    """CREATE VIRTUAL TABLE recherche_fts USING fts5(
+        titre, tags, contenu,
+        content='recherche_documentrecherche', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER recherche_fts_ai AFTER INSERT ON recherche_documentrecherche BEGIN
+        INSERT INTO recherche_fts(rowid, titre, tags, contenu) VALUES (new.id, new.titre, new.tags, new.contenu);
+    END""",
+    """CREATE TRIGGER recherche_fts_ad AFTER DELETE ON recherche_documentrecherche BEGIN
+        INSERT INTO recherche_fts(recherche_fts, rowid, titre, tags, contenu)
+            VALUES ('delete', old.id, old.titre, old.tags, old.contenu);
+    END""",
+    """CREATE TRIGGER recherche_fts_au AFTER UPDATE ON recherche_documentrecherche BEGIN
+        INSERT INTO recherche_fts(recherche_fts, rowid, titre, tags, contenu)
+            VALUES ('delete', old.id, old.titre, old.tags, old.contenu);
+        INSERT INTO recherche_fts(rowid, titre, tags, contenu) VALUES (new.id, new.titre, new.tags, new.contenu);
+    END""",
+]
+
+SQLITE_INVERSE = [
+    'DROP TRIGGER IF EXISTS recherche_fts_au',
+    'DROP TRIGGER IF EXISTS recherche_fts_ad',
+    'DROP TRIGGER IF EXISTS recherche_fts_ai',
+    'DROP TABLE IF EXISTS recherche_fts',
+]
+
+POSTGRESQL = [
+    """ALTER TABLE recherche_documentrecherche ADD COLUMN vecteur tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple'::regconfig, coalesce(titre, '')), 'A') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(tags, '')), 'B') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(contenu, '')), 'C')
+    ) STORED""",
+    'CREATE INDEX recherche_vecteur_gin ON recherche_documentrecherche USING GIN (vecteur)',
+]
+
+POSTGRESQL_INVERSE = [
+    'DROP INDEX IF EXISTS recherche_vecteur_gin',
+    'ALTER TABLE recherche_documentrecherche DROP COLUMN IF EXISTS vecteur',
+]
+
+
+def _executer(schema_editor, requetes):
+    for sql in requetes:
+        schema_editor.execute(sql)
+
+
+def creer_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _executer(schema_editor, POSTGRESQL)
+    elif vendor == 'sqlite':
+        try:
+            schema_editor.execute(SQLITE[0])
+        except OperationalError:
+            return  # FTS5 indisponible
+        _executer(schema_editor, SQLITE[1:])
+
+
+def supprimer_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _executer(schema_editor, POSTGRESQL_INVERSE)
+    elif vendor == 'sqlite':
+        _executer(schema_editor, SQLITE_INVERSE)
+
+
+def indexer_existant(apps, schema_editor):
+    from apps.recherche.registre import TYPES_CONTENU
+
+    DocumentRecherche = apps.get_model('recherche', 'DocumentRecherche')
+    for type_contenu, definition in TYPES_CONTENU.items():
+        modele = apps.get_model(definition['modele'])
+        lot = []
+        for objet in modele.objects.select_related(*definition['select_related']).iterator(chunk_size=200):
+            donnees = definition['document'](objet)
+            donnees.update(titre=(donnees['titre'] or '')[:255], tags=(donnees['tags'] or '')[:255],
+                           categorie=(donnees['categorie'] or '')[:100])
+            lot.append(DocumentRecherche(type_contenu=type_contenu, objet_id=objet.pk, **donnees))
+            if len(lot) >= 200:
+                DocumentRecherche.objects.bulk_create(lot)
+                lot = []
+        DocumentRecherche.objects.bulk_create(lot)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recherche', '0001_initial'),
+        ('bibliotheque', '0003_ingestion_pdf'),
+        ('conservatoire', '0014_ingestion_pdf'),
+        ('informations', '0003_alter_newspost_titre_contenu'),
+        ('culturelle', '0005_add_kamil_nb_lectures'),
+        ('communication', '0003_envoipush'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_index, supprimer_index),
+        migrations.RunPython(indexer_existant, migrations.RunPython.noop),
+    ]
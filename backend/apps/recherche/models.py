@@ -0,0 +1,34 @@
+from django.db import models
+
+
+class DocumentRecherche(models.Model):
+    """
+    Entrée de l'index de recherche plein texte : une ligne par contenu indexé (voir
+    registre.py), tenue à jour par les signaux de l'application.
+
+    L'index proprement dit est créé par la migration selon la base :
+    - SQLite : table virtuelle FTS5 `recherche_fts` (contenu externe = cette table),
+      alimentée par des triggers ;
+    - PostgreSQL : colonne générée `vecteur` (tsvector pondéré titre > tags > contenu)
+      et index GIN.
+    Ces objets ne sont pas décrits par le modèle : une migration qui reconstruirait la
+    table sous SQLite (modification de colonne) doit les recréer.
+    """
+    type_contenu = models.CharField(max_length=30)
+    objet_id = models.PositiveBigIntegerField()
+    titre = models.CharField(max_length=255)
+    tags = models.CharField(max_length=255, blank=True)
+    contenu = models.TextField(blank=True, help_text='Description, texte et texte extrait des PDF')
+    categorie = models.CharField(max_length=100, blank=True)
+    public = models.BooleanField(default=True, help_text='Visible des membres (sinon administrateurs seulement)')
+    date = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Document indexé'
+        verbose_name_plural = 'Documents indexés'
+        constraints = [
+            models.UniqueConstraint(fields=['type_contenu', 'objet_id'], name='recherche_document_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.type_contenu} #{self.objet_id} - {self.titre}"
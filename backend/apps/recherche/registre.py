@@ -0,0 +1,131 @@
+"""
+Contenus indexés par la recherche plein texte.
+
+Chaque type déclare :
+- modele : label du modèle
+- libelle : libellé de la facette
+- champs : champs du modèle repris dans l'index (un save(update_fields=...) qui n'en
+  touche aucun — compteurs, statut d'ingestion — ne réindexe pas)
+- select_related : relations lues par document() (réindexation complète)
+- document(objet) : {titre, tags, contenu, categorie, public, date} de l'entrée d'index
+"""
+from django.conf import settings
+from django.utils.html import strip_tags
+
+
+def _contenu(*morceaux):
+    """Textes concaténés, limités à RECHERCHE_CONTENU_MAX caractères."""
+    limite = getattr(settings, 'RECHERCHE_CONTENU_MAX', 200_000)
+    return '\n'.join(m for m in morceaux if m)[:limite]
+
+
+def _livre(livre):
+    return {
+        'titre': livre.nom,
+        'tags': '',
+        'contenu': _contenu(livre.description, livre.texte),
+        'categorie': livre.get_categorie_display(),
+        'public': True,
+        'date': livre.date_ajout,
+    }
+
+
+def _document(doc):
+    return {
+        'titre': doc.titre,
+        'tags': doc.tags,
+        'contenu': _contenu(doc.auteur, doc.description, doc.editeur, doc.texte),
+        'categorie': doc.get_type_document_display() if doc.type_document else '',
+        'public': True,
+        'date': doc.date_ajout,
+    }
+
+
+def _archive(archive):
+    return {
+        'titre': archive.titre,
+        'tags': archive.evenement,
+        'contenu': _contenu(archive.description, archive.contexte_historique, archive.texte, archive.source),
+        'categorie': archive.get_type_archive_display() if archive.type_archive else '',
+        'public': True,
+        'date': archive.date_archivage,
+    }
+
+
+def _publication(publication):
+    return {
+        'titre': publication.titre,
+        'tags': publication.tags,
+        'contenu': _contenu(strip_tags(publication.contenu)),
+        'categorie': publication.get_categorie_display(),
+        'public': publication.est_publiee,
+        'date': publication.date_publication,
+    }
+
+
+def _enseignement(enseignement):
+    return {
+        'titre': enseignement.titre,
+        'tags': enseignement.tags,
+        'contenu': _contenu(strip_tags(enseignement.contenu)),
+        'categorie': enseignement.get_categorie_display(),
+        'public': True,
+        'date': enseignement.date_publication,
+    }
+
+
+def _sujet(sujet):
+    return {
+        'titre': sujet.titre,
+        'tags': sujet.tags,
+        'contenu': _contenu(strip_tags(sujet.contenu)),
+        'categorie': sujet.categorie.nom if sujet.categorie_id else '',
+        'public': True,
+        'date': sujet.date_modification,
+    }
+
+
+TYPES_CONTENU = {
+    'livre': {
+        'modele': 'bibliotheque.LivreNumerique',
+        'libelle': 'Livres',
+        'champs': {'nom', 'description', 'texte', 'categorie'},
+        'select_related': (),
+        'document': _livre,
+    },
+    'document': {
+        'modele': 'conservatoire.DocumentNumerique',
+        'libelle': 'Documents',
+        'champs': {'titre', 'tags', 'auteur', 'description', 'editeur', 'texte', 'type_document'},
+        'select_related': (),
+        'document': _document,
+    },
+    'archive': {
+        'modele': 'conservatoire.ArchiveHistorique',
+        'libelle': 'Archives',
+        'champs': {'titre', 'evenement', 'description', 'contexte_historique', 'texte', 'source', 'type_archive'},
+        'select_related': (),
+        'document': _archive,
+    },
+    'publication': {
+        'modele': 'informations.Publication',
+        'libelle': 'Publications',
+        'champs': {'titre', 'tags', 'contenu', 'categorie', 'est_publiee'},
+        'select_related': (),
+        'document': _publication,
+    },
+    'enseignement': {
+        'modele': 'culturelle.Enseignement',
+        'libelle': 'Enseignements',
+        'champs': {'titre', 'tags', 'contenu', 'categorie'},
+        'select_related': (),
+        'document': _enseignement,
+    },
+    'sujet': {
+        'modele': 'communication.SujetForum',
+        'libelle': 'Sujets du forum',
+        'champs': {'titre', 'tags', 'contenu', 'categorie', 'date_modification'},
+        'select_related': ('categorie',),
+        'document': _sujet,
+    },
+}
@@ -0,0 +1,55 @@
+"""
+Index de recherche tenu à jour à chaque écriture des contenus indexés (registre.py), y
+compris depuis l'admin ; le texte extrait des PDF est indexé à la fin de leur ingestion.
+Les écritures par update() (compteurs, ingestion) ne passent pas par ces signaux.
+Une erreur d'indexation n'empêche pas l'enregistrement : elle est journalisée, l'index
+se reconstruit avec la commande `reindexer_recherche`.
+"""
+import logging
+
+from django.apps import apps as django_apps
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.ingestion_pdf import pdf_ingere
+
+from . import index
+from .registre import TYPES_CONTENU
+
+logger = logging.getLogger(__name__)
+
+
+def _indexer(type_contenu, objet):
+    try:
+        index.indexer(objet, type_contenu)
+    except Exception:
+        logger.exception("Indexation de %s #%s impossible", type_contenu, objet.pk)
+
+
+def _connecter(type_contenu, definition):
+    modele = django_apps.get_model(definition['modele'])
+
+    def enregistre(sender, instance, raw=False, update_fields=None, **kwargs):
+        if raw or (update_fields is not None and not definition['champs'] & set(update_fields)):
+            return
+        _indexer(type_contenu, instance)
+
+    def supprime(sender, instance, **kwargs):
+        try:
+            index.desindexer(type_contenu, instance.pk)
+        except Exception:
+            logger.exception("Désindexation de %s #%s impossible", type_contenu, instance.pk)
+
+    post_save.connect(enregistre, sender=modele, weak=False, dispatch_uid=f'recherche_{type_contenu}_save')
+    post_delete.connect(supprime, sender=modele, weak=False, dispatch_uid=f'recherche_{type_contenu}_delete')
+
+
+for _type, _definition in TYPES_CONTENU.items():
+    _connecter(_type, _definition)
+
+
+@receiver(pdf_ingere, dispatch_uid='recherche_pdf_ingere')
+def pdf_ingere_indexe(sender, instance, **kwargs):
+    type_contenu = index.type_du_modele(sender)
+    if type_contenu:
+        _indexer(type_contenu, instance)
@@ -0,0 +1,51 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .index import rechercher
+from .registre import TYPES_CONTENU
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+
+def _entier(valeur, defaut, minimum, maximum):
+    try:
+        return min(max(int(valeur), minimum), maximum)
+    except (TypeError, ValueError):
+        return defaut
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def recherche(request):
+    """
+    Recherche plein texte dans les livres, documents, archives, publications,
+    enseignements et sujets du forum.
+    GET ?q=...&type=livre,document&page=1&page_size=20
+    Résultats classés par pertinence ; `facettes` : nombre de résultats par type de contenu
+    (indépendamment du filtre `type`). Les publications non publiées ne sont visibles que
+    des administrateurs.
+    """
+    q = (request.query_params.get('q') or '').strip()
+    if not q:
+        return Response({'detail': 'Paramètre q requis.'}, status=400)
+    types = [t for t in (request.query_params.get('type') or '').split(',') if t]
+    inconnus = [t for t in types if t not in TYPES_CONTENU]
+    if inconnus:
+        return Response({'detail': 'Type de contenu inconnu.', 'types': list(TYPES_CONTENU)}, status=400)
+    page = _entier(request.query_params.get('page'), 1, 1, 1000)
+    page_size = _entier(request.query_params.get('page_size'), PAGE_SIZE, 1, MAX_PAGE_SIZE)
+
+    user = request.user
+    resultat = rechercher(
+        q, types=types, public_seulement=not (user.is_staff or user.role == 'admin'),
+        limite=page_size, decalage=(page - 1) * page_size,
+    )
+    return Response({
+        'count': resultat['count'],
+        'page': page,
+        'page_size': page_size,
+        'results': resultat['resultats'],
+        'facettes': resultat['facettes'],
+    })
@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from apps.accounts.permissions import IsAdminOrJewrinScientifique, has_admin_access
+from utils.compteurs import CompteurVuesMixin
 
 from .models import DomaineScientifique, Cours, ModuleCours, LeconCours, InscriptionCours, OuvrageScientifique, PublicationScientifique
 from .serializers import DomaineScientifiqueSerializer, CoursSerializer, ModuleCoursSerializer, LeconCoursSerializer, InscriptionCoursSerializer, OuvrageScientifiqueSerializer, PublicationScientifiqueSerializer
@@ -91,7 +92,7 @@ class OuvrageScientifiqueViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated()]
 
 
-class PublicationScientifiqueViewSet(viewsets.ModelViewSet):
+class PublicationScientifiqueViewSet(CompteurVuesMixin, viewsets.ModelViewSet):
     queryset = PublicationScientifique.objects.all().order_by('-annee')
     serializer_class = PublicationScientifiqueSerializer
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Televersement
+
+
+@admin.register(Televersement)
+class TeleversementAdmin(admin.ModelAdmin):
+    list_display = ['nom_fichier', 'cible', 'proprietaire', 'taille', 'recu', 'statut', 'stockage', 'date_modification']
+    list_filter = ['statut', 'cible', 'stockage']
+    search_fields = ['nom_fichier']
+    readonly_fields = [f.name for f in Televersement._meta.fields]
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class TeleversementsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.televersements'
+    verbose_name = 'Téléversements'
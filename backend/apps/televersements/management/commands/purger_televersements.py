@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.televersements.models import Televersement
+from apps.televersements.stockage import backend_de
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les téléversements abandonnés (sans bloc reçu depuis TELEVERSEMENTS_DUREE heures) "
+        "et leurs fichiers temporaires ou envois multipart S3"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--heures', type=int, default=None,
+                            help='Ancienneté minimale (défaut : TELEVERSEMENTS_DUREE)')
+
+    def handle(self, *args, **options):
+        heures = options['heures']
+        if heures is None:
+            heures = getattr(settings, 'TELEVERSEMENTS_DUREE', 48)
+        limite = timezone.now() - timedelta(hours=heures)
+        supprimes = 0
+        for televersement in Televersement.objects.filter(date_modification__lt=limite).iterator():
+            if televersement.statut != 'attache':
+                try:
+                    backend_de(televersement).supprimer(televersement)
+                except Exception as e:
+                    self.stderr.write(f'{televersement.pk} : {e}')
+                    continue
+            televersement.delete()
+            supprimes += 1
+        self.stdout.write(self.style.SUCCESS(f'{supprimes} téléversement(s) supprimé(s).'))
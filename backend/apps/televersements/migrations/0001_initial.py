@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Televersement',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('cible', models.CharField(max_length=30)),
+                ('nom_fichier', models.CharField(max_length=255)),
+                ('type_contenu', models.CharField(blank=True, max_length=100)),
+                ('taille', models.BigIntegerField()),
+                ('taille_bloc', models.PositiveIntegerField()),
+                ('recu', models.BigIntegerField(default=0, help_text='Octets reçus (position du prochain bloc)')),
+                ('sha256', models.CharField(blank=True, help_text='Somme SHA-256 attendue du fichier complet (hex)', max_length=64)),
+                ('statut', models.CharField(choices=[('en_cours', 'En cours'), ('termine', 'Terminé'), ('attache', 'Attaché')], db_index=True, default='en_cours', max_length=20)),
+                ('stockage', models.CharField(choices=[('disque', 'Disque'), ('s3', 'S3 (multipart)')], max_length=10)),
+                ('chemin', models.CharField(help_text='Fichier temporaire (nom dans le stockage)', max_length=500)),
+                ('upload_id', models.CharField(blank=True, help_text='Envoi multipart S3', max_length=255)),
+                ('parties', models.JSONField(blank=True, default=list, help_text='Parties S3 reçues (numéro, ETag, somme)')),
+                ('nom_final', models.CharField(blank=True, max_length=500)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_modification', models.DateTimeField(auto_now=True, db_index=True)),
+                ('proprietaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='televersements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Téléversement',
+                'verbose_name_plural': 'Téléversements',
+                'ordering': ['-date_creation'],
+            },
+        ),
+    ]
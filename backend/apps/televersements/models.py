@@ -0,0 +1,50 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class Televersement(models.Model):
+    """
+    Téléversement par blocs, reprenable : le client envoie le fichier bloc par bloc
+    (Upload-Offset), demande l'état (`recu`) après une coupure et reprend à cet octet.
+
+    Les blocs sont écrits dans un fichier temporaire du stockage (disque), ou envoyés
+    directement comme parties d'un envoi multipart S3. Une fois terminé, le fichier est
+    attaché à l'élément cible (voir registre.py) par déplacement, sans être relu.
+    """
+    STATUT_CHOICES = [
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('attache', 'Attaché'),
+    ]
+    STOCKAGE_CHOICES = [
+        ('disque', 'Disque'),
+        ('s3', 'S3 (multipart)'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    proprietaire = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='televersements')
+    cible = models.CharField(max_length=30)
+    nom_fichier = models.CharField(max_length=255)
+    type_contenu = models.CharField(max_length=100, blank=True)
+    taille = models.BigIntegerField()
+    taille_bloc = models.PositiveIntegerField()
+    recu = models.BigIntegerField(default=0, help_text='Octets reçus (position du prochain bloc)')
+    sha256 = models.CharField(max_length=64, blank=True, help_text='Somme SHA-256 attendue du fichier complet (hex)')
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_cours', db_index=True)
+    stockage = models.CharField(max_length=10, choices=STOCKAGE_CHOICES)
+    chemin = models.CharField(max_length=500, help_text='Fichier temporaire (nom dans le stockage)')
+    upload_id = models.CharField(max_length=255, blank=True, help_text='Envoi multipart S3')
+    parties = models.JSONField(default=list, blank=True, help_text='Parties S3 reçues (numéro, ETag, somme)')
+    nom_final = models.CharField(max_length=500, blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_modification = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Téléversement'
+        verbose_name_plural = 'Téléversements'
+        ordering = ['-date_creation']
+
+    def __str__(self):
+        return f"{self.nom_fichier} ({self.recu}/{self.taille})"
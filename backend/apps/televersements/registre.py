@@ -0,0 +1,43 @@
+"""
+Cibles des téléversements par blocs : champ fichier de l'élément auquel le fichier est
+attaché, permission requise pour téléverser (celle de la création de l'élément) et
+extensions acceptées (None : toutes).
+"""
+from django.apps import apps as django_apps
+
+from apps.accounts.permissions import (
+    IsAdminOrJewrinConservatoire, IsAdminOrJewrinCulturelle, IsAdminRoleOrStaff,
+)
+
+AUDIO = ('.mp3', '.m4a', '.aac', '.ogg', '.opus', '.oga', '.wav', '.flac', '.amr', '.3gp', '.webm')
+VIDEO = ('.mp4', '.m4v', '.mov', '.webm', '.mkv', '.avi', '.3gp')
+PDF = ('.pdf',)
+
+CIBLES = {
+    'audio': {
+        'modele': 'conservatoire.MediaAudio', 'champ': 'fichier_audio',
+        'permission': IsAdminOrJewrinConservatoire, 'extensions': AUDIO,
+    },
+    'video': {
+        'modele': 'conservatoire.MediaVideo', 'champ': 'fichier_video',
+        'permission': IsAdminOrJewrinConservatoire, 'extensions': VIDEO,
+    },
+    'document': {
+        'modele': 'conservatoire.DocumentNumerique', 'champ': 'fichier',
+        'permission': IsAdminOrJewrinConservatoire, 'extensions': None,
+    },
+    'livre': {
+        'modele': 'bibliotheque.LivreNumerique', 'champ': 'pdf',
+        'permission': IsAdminRoleOrStaff, 'extensions': PDF,
+    },
+    'chapitre_audio': {
+        'modele': 'culturelle.Chapitre', 'champ': 'contenu_audio',
+        'permission': IsAdminOrJewrinCulturelle, 'extensions': AUDIO,
+    },
+}
+
+
+def champ_cible(cible):
+    """Champ fichier (FileField) de la cible `cible`."""
+    definition = CIBLES[cible]
+    return django_apps.get_model(definition['modele'])._meta.get_field(definition['champ'])
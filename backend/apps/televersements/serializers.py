@@ -0,0 +1,162 @@
+import os
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from utils.ingestion_pdf import PDFIngere
+from .models import Televersement
+from .registre import CIBLES, champ_cible
+from .stockage import backend_de
+
+
+class TeleversementSerializer(serializers.ModelSerializer):
+    statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+
+    class Meta:
+        model = Televersement
+        fields = [
+            'id', 'cible', 'nom_fichier', 'type_contenu', 'taille', 'taille_bloc', 'recu',
+            'sha256', 'statut', 'statut_display', 'date_creation', 'date_modification',
+        ]
+        read_only_fields = ['taille_bloc', 'recu', 'statut', 'date_creation', 'date_modification']
+
+    def validate_cible(self, value):
+        if value not in CIBLES:
+            raise serializers.ValidationError(f"Cible inconnue (valeurs possibles : {', '.join(CIBLES)}).")
+        return value
+
+    def validate_taille(self, value):
+        maximum = getattr(settings, 'TELEVERSEMENTS_TAILLE_MAX', 2 * 1024 ** 3)
+        if value <= 0:
+            raise serializers.ValidationError('Fichier vide.')
+        if value > maximum:
+            raise serializers.ValidationError(f'Fichier trop volumineux (maximum {maximum // 1024 ** 2} Mo).')
+        return value
+
+    def validate_sha256(self, value):
+        value = (value or '').strip().lower()
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value)):
+            raise serializers.ValidationError('Somme SHA-256 attendue en hexadécimal (64 caractères).')
+        return value
+
+    def validate(self, data):
+        extensions = CIBLES[data['cible']]['extensions']
+        extension = os.path.splitext(data['nom_fichier'])[1].lower()
+        if extensions and extension not in extensions:
+            raise serializers.ValidationError(
+                {'nom_fichier': f"Extension non acceptée (acceptées : {', '.join(extensions)})."}
+            )
+        return data
+
+
+class TeleversementField(serializers.UUIDField):
+    """
+    Id d'un téléversement terminé de l'utilisateur, pour la cible `cible` : remplace le
+    fichier envoyé dans la requête (voir TeleversementMixin).
+    """
+
+    def __init__(self, cible, **kwargs):
+        self.cible = cible
+        self.champ = CIBLES[cible]['champ']
+        kwargs.setdefault('write_only', True)
+        kwargs.setdefault('required', False)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        pk = super().to_internal_value(data)
+        user = getattr(self.context.get('request'), 'user', None)
+        televersement = None
+        if user is not None and user.is_authenticated:
+            televersement = Televersement.objects.filter(
+                pk=pk, proprietaire=user, cible=self.cible, statut='termine',
+            ).first()
+        if televersement is None:
+            raise serializers.ValidationError('Téléversement introuvable ou non terminé.')
+        return televersement
+
+
+def attacher(televersement, instance, champ):
+    """
+    Déplace le fichier du téléversement à l'emplacement du champ `champ` de `instance`
+    (upload_to, nom libre dans le stockage). Retourne le nom à enregistrer dans le champ.
+    À appeler dans la transaction qui enregistre l'élément (voir TeleversementMixin) :
+    le passage à « attaché » est annulé avec elle, le fichier est remis par `remettre`.
+    """
+    with transaction.atomic():
+        televersement = Televersement.objects.select_for_update().get(pk=televersement.pk)
+        if televersement.statut != 'termine':
+            raise serializers.ValidationError({champ: ['Téléversement déjà utilisé.']})
+        field = champ_cible(televersement.cible)
+        nom = field.generate_filename(instance, televersement.nom_fichier)
+        nom = field.storage.get_available_name(nom, max_length=field.max_length)
+        backend_de(televersement).deplacer(televersement, nom)
+        televersement.statut = 'attache'
+        televersement.nom_final = nom
+        televersement.save(update_fields=['statut', 'nom_final', 'date_modification'])
+    return nom
+
+
+class TeleversementMixin:
+    """
+    ModelSerializer dont les fichiers peuvent provenir d'un téléversement par blocs :
+    pour chaque TeleversementField déclaré (ex. fichier_audio_televersement), le champ
+    fichier correspondant devient facultatif et reçoit, à l'enregistrement, le fichier
+    téléversé déplacé à son emplacement définitif.
+
+    Attache et enregistrement de l'élément forment une seule transaction : si
+    l'enregistrement échoue, les fichiers déplacés sont remis en place et les
+    téléversements redeviennent « terminés » (réutilisables).
+    """
+
+    def _champs_televersement(self):
+        return {nom: f for nom, f in self.fields.items() if isinstance(f, TeleversementField)}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for f in fields.values():
+            if isinstance(f, TeleversementField) and f.champ in fields:
+                fields[f.champ].required = False
+        return fields
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if self.instance is None:
+            for nom, f in self._champs_televersement().items():
+                if not attrs.get(nom) and not attrs.get(f.champ) and not self.Meta.model._meta.get_field(f.champ).blank:
+                    raise serializers.ValidationError({f.champ: ['Ce champ est obligatoire.']})
+        return attrs
+
+    def _attacher(self, instance, validated_data, deplaces):
+        for nom, f in self._champs_televersement().items():
+            televersement = validated_data.pop(nom, None)
+            if televersement is None:
+                continue
+            validated_data[f.champ] = attacher(televersement, instance, f.champ)
+            deplaces.append((televersement, validated_data[f.champ]))
+            if isinstance(instance, PDFIngere) and f.champ == instance.champ_pdf:
+                # Nouveau PDF : à (ré)ingérer (PDFIngere.save ne voit pas un fichier déjà en place)
+                validated_data.update(ingestion_statut='en_attente', ingestion_erreur='')
+
+    def _enregistrer(self, instance, validated_data, enregistrer):
+        """Attache les téléversements puis `enregistrer()` ; en cas d'échec, fichiers remis en place."""
+        deplaces = []
+        try:
+            with transaction.atomic():
+                self._attacher(instance, validated_data, deplaces)
+                return enregistrer()
+        except BaseException:
+            for televersement, nom in deplaces:
+                backend_de(televersement).remettre(televersement, nom)
+            raise
+
+    def create(self, validated_data):
+        modele = self.Meta.model
+        colonnes = {f.name for f in modele._meta.concrete_fields}
+        # Élément provisoire : upload_to peut dépendre des autres champs (nom, catégorie...)
+        provisoire = modele(**{k: v for k, v in validated_data.items() if k in colonnes})
+        return self._enregistrer(provisoire, validated_data, partial(super().create, validated_data))
+
+    def update(self, instance, validated_data):
+        return self._enregistrer(instance, validated_data, partial(super().update, instance, validated_data))
@@ -0,0 +1,205 @@
+"""
+Écriture des blocs d'un téléversement et attache du fichier terminé, selon le stockage
+du champ cible :
+- disque (stockage avec chemin local) : blocs écrits à leur position dans un fichier
+  temporaire du stockage, déplacé (os.replace) à son emplacement définitif ;
+- S3 : chaque bloc est une partie d'un envoi multipart (somme SHA-256 vérifiée aussi
+  par S3), l'objet terminé est copié côté serveur à son nom définitif.
+Dans les deux cas le fichier ne transite qu'une fois par le worker, bloc par bloc.
+"""
+import base64
+import hashlib
+import mimetypes
+import os
+import shutil
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from .registre import champ_cible
+
+LECTURE = 1024 * 1024
+# S3 : toutes les parties sauf la dernière font au moins 5 Mio
+TAILLE_PARTIE_MIN_S3 = 5 * 1024 * 1024
+
+
+class SommeIncorrecte(ValidationError):
+    pass
+
+
+def lire_bloc(flux, longueur, somme):
+    """
+    Lit exactement `longueur` octets de `flux` (corps de la requête) et vérifie leur
+    somme SHA-256 `somme` (octets, facultative). Retourne (bloc, somme en base64) ;
+    ValidationError si le corps est plus court, SommeIncorrecte si la somme diffère.
+    Seuls des blocs complets et vérifiés sont ensuite écrits (ecrire).
+    """
+    sha256 = hashlib.sha256()
+    morceaux = []
+    while longueur > 0:
+        morceau = flux.read(min(LECTURE, longueur))
+        if not morceau:
+            raise ValidationError('Bloc incomplet.')
+        longueur -= len(morceau)
+        sha256.update(morceau)
+        morceaux.append(morceau)
+    if somme and sha256.digest() != somme:
+        raise SommeIncorrecte('Somme de contrôle du bloc incorrecte.')
+    return b''.join(morceaux), base64.b64encode(sha256.digest()).decode('ascii')
+
+
+class Disque:
+    nom = 'disque'
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def taille_bloc(self):
+        return getattr(settings, 'TELEVERSEMENTS_TAILLE_BLOC', 5 * 1024 * 1024)
+
+    def initialiser(self, televersement):
+        chemin = self.storage.path(televersement.chemin)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        open(chemin, 'wb').close()
+
+    def ecrire(self, televersement, bloc, somme_b64):
+        """
+        Écrit le bloc à la position `recu`, sans tronquer : deux envois concurrents d'un
+        même bloc écrivent les mêmes octets au même endroit.
+        """
+        with open(self.storage.path(televersement.chemin), 'r+b') as f:
+            f.seek(televersement.recu)
+            f.write(bloc)
+
+    def terminer(self, televersement):
+        if not televersement.sha256:
+            return
+        sha256 = hashlib.sha256()
+        with open(self.storage.path(televersement.chemin), 'rb') as f:
+            for morceau in iter(lambda: f.read(LECTURE), b''):
+                sha256.update(morceau)
+        if sha256.hexdigest() != televersement.sha256:
+            raise SommeIncorrecte('Somme de contrôle du fichier incorrecte.')
+
+    def _deplacer(self, source, destination):
+        source, destination = self.storage.path(source), self.storage.path(destination)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        try:
+            os.replace(source, destination)
+        except OSError:
+            shutil.move(source, destination)  # autre système de fichiers
+        return destination
+
+    def deplacer(self, televersement, nom):
+        destination = self._deplacer(televersement.chemin, nom)
+        permissions = getattr(settings, 'FILE_UPLOAD_PERMISSIONS', None)
+        if permissions is not None:
+            os.chmod(destination, permissions)
+
+    def remettre(self, televersement, nom):
+        """Annule `deplacer` : le fichier `nom` redevient le fichier temporaire du téléversement."""
+        self._deplacer(nom, televersement.chemin)
+
+    def supprimer(self, televersement):
+        try:
+            os.remove(self.storage.path(televersement.chemin))
+        except FileNotFoundError:
+            pass
+
+
+class S3:
+    nom = 's3'
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @property
+    def client(self):
+        return self.storage.connection.meta.client
+
+    def _cle(self, nom):
+        from storages.utils import clean_name
+        return self.storage._normalize_name(clean_name(nom))
+
+    def taille_bloc(self):
+        return max(getattr(settings, 'TELEVERSEMENTS_TAILLE_BLOC', 5 * 1024 * 1024), TAILLE_PARTIE_MIN_S3)
+
+    def initialiser(self, televersement):
+        reponse = self.client.create_multipart_upload(
+            Bucket=self.storage.bucket_name, Key=self._cle(televersement.chemin),
+            ChecksumAlgorithm='SHA256',
+        )
+        televersement.upload_id = reponse['UploadId']
+
+    def ecrire(self, televersement, bloc, somme_b64):
+        """Envoie le bloc comme partie n° recu // taille_bloc + 1 (une partie renvoyée remplace la précédente)."""
+        numero = televersement.recu // televersement.taille_bloc + 1
+        try:
+            reponse = self.client.upload_part(
+                Bucket=self.storage.bucket_name, Key=self._cle(televersement.chemin),
+                UploadId=televersement.upload_id, PartNumber=numero, Body=bloc,
+                ChecksumSHA256=somme_b64,
+            )
+        except self.client.exceptions.NoSuchUpload:
+            raise FileNotFoundError(televersement.chemin)  # téléversement terminé ou abandonné entre-temps
+        televersement.parties = [p for p in televersement.parties if p['PartNumber'] != numero] + [
+            {'PartNumber': numero, 'ETag': reponse['ETag'], 'ChecksumSHA256': somme_b64}
+        ]
+
+    def terminer(self, televersement):
+        # Parties vérifiées une à une par S3 (ChecksumSHA256) ; la somme du fichier complet
+        # (SHA-256 de bout en bout) demanderait de le relire : non vérifiée ici
+        try:
+            self.client.complete_multipart_upload(
+                Bucket=self.storage.bucket_name, Key=self._cle(televersement.chemin),
+                UploadId=televersement.upload_id,
+                MultipartUpload={'Parts': sorted(televersement.parties, key=lambda p: p['PartNumber'])},
+            )
+        except self.client.exceptions.NoSuchUpload:
+            raise FileNotFoundError(televersement.chemin)  # déjà assemblé ou abandonné
+
+    def deplacer(self, televersement, nom):
+        parametres = dict(self.storage.get_object_parameters(nom))
+        parametres.setdefault(
+            'ContentType',
+            televersement.type_contenu or mimetypes.guess_type(nom)[0] or 'application/octet-stream',
+        )
+        # Copie côté serveur (multipart pour les gros fichiers), puis suppression du temporaire
+        self.storage.bucket.copy(
+            {'Bucket': self.storage.bucket_name, 'Key': self._cle(televersement.chemin)},
+            self._cle(nom), ExtraArgs=parametres,
+        )
+        self.client.delete_object(Bucket=self.storage.bucket_name, Key=self._cle(televersement.chemin))
+
+    def remettre(self, televersement, nom):
+        """Annule `deplacer` : l'objet `nom` redevient l'objet temporaire du téléversement."""
+        self.storage.bucket.copy(
+            {'Bucket': self.storage.bucket_name, 'Key': self._cle(nom)}, self._cle(televersement.chemin),
+        )
+        self.client.delete_object(Bucket=self.storage.bucket_name, Key=self._cle(nom))
+
+    def supprimer(self, televersement):
+        if televersement.statut == 'en_cours' and televersement.upload_id:
+            try:
+                self.client.abort_multipart_upload(
+                    Bucket=self.storage.bucket_name, Key=self._cle(televersement.chemin),
+                    UploadId=televersement.upload_id,
+                )
+            except self.client.exceptions.NoSuchUpload:
+                pass
+        else:
+            self.client.delete_object(Bucket=self.storage.bucket_name, Key=self._cle(televersement.chemin))
+
+
+def backend(storage):
+    """Disque si le stockage a des chemins locaux, sinon S3 (django-storages)."""
+    try:
+        storage.path('')
+    except NotImplementedError:
+        return S3(storage)
+    return Disque(storage)
+
+
+def backend_de(televersement):
+    storage = champ_cible(televersement.cible).storage
+    return S3(storage) if televersement.stockage == 's3' else Disque(storage)
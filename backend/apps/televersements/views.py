@@ -0,0 +1,158 @@
+"""
+API des téléversements par blocs (fichiers audio, vidéo, PDF volumineux) :
+
+    POST   /api/televersements/               {cible, nom_fichier, taille, type_contenu?, sha256?}
+    GET    /api/televersements/<id>/          état : `recu` = position du prochain bloc
+    PUT    /api/televersements/<id>/bloc/     corps brut ; en-têtes Upload-Offset (= recu)
+                                              et Upload-Checksum: sha256 <base64> (facultatif)
+    POST   /api/televersements/<id>/terminer/
+    DELETE /api/televersements/<id>/          abandon
+
+Chaque bloc fait `taille_bloc` octets (le dernier : le reste). Après une coupure, le client
+relit `recu` et reprend à cette position. Le fichier terminé est attaché en envoyant son id
+à la création (ou modification) de l'élément : <champ>_televersement (ex. fichier_audio_televersement).
+"""
+import base64
+import binascii
+import uuid
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import Televersement
+from .registre import CIBLES, champ_cible
+from .serializers import TeleversementSerializer
+from .stockage import SommeIncorrecte, backend, backend_de, lire_bloc
+
+
+def _somme(entete):
+    """Somme SHA-256 (octets) de l'en-tête Upload-Checksum « sha256 <base64> », ou None."""
+    if not entete:
+        return None
+    algorithme, _, valeur = entete.strip().partition(' ')
+    if algorithme.lower() != 'sha256':
+        raise DjangoValidationError('Upload-Checksum : seul sha256 est accepté.')
+    try:
+        somme = base64.b64decode(valeur.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        somme = b''
+    if len(somme) != 32:
+        raise DjangoValidationError('Upload-Checksum : somme sha256 en base64 attendue.')
+    return somme
+
+
+def _erreur(e):
+    return Response({'detail': ' '.join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _conflit(recu):
+    """409 : position du bloc différente de `recu` (None : téléversement supprimé entre-temps)."""
+    return Response(
+        {'detail': 'Position incorrecte.', 'recu': recu},
+        status=status.HTTP_409_CONFLICT, headers={'Upload-Offset': str(recu)} if recu is not None else None,
+    )
+
+
+class TeleversementViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    serializer_class = TeleversementSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Televersement.objects.filter(proprietaire=self.request.user)
+
+    def perform_create(self, serializer):
+        cible = serializer.validated_data['cible']
+        # Même droit que pour créer l'élément cible
+        if not CIBLES[cible]['permission']().has_permission(self.request, self):
+            raise PermissionDenied("Vous n'avez pas le droit d'ajouter ce type de fichier.")
+        stockage = backend(champ_cible(cible).storage)
+        pk = uuid.uuid4()
+        televersement = Televersement(
+            pk=pk, proprietaire=self.request.user, taille_bloc=stockage.taille_bloc(),
+            stockage=stockage.nom, chemin=f'televersements/{pk.hex}.part', **serializer.validated_data,
+        )
+        stockage.initialiser(televersement)
+        televersement.save(force_insert=True)
+        serializer.instance = televersement
+
+    def perform_destroy(self, instance):
+        if instance.statut != 'attache':
+            backend_de(instance).supprimer(instance)
+        instance.delete()
+
+    @action(detail=True, methods=['put'])
+    def bloc(self, request, pk=None):
+        """Ajoute le bloc suivant (corps brut de la requête) ; 409 avec `recu` si la position ne correspond pas."""
+        televersement = self.get_object()
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            longueur = int(request.headers.get('Content-Length') or 0)
+            somme = _somme(request.headers.get('Upload-Checksum'))
+        except ValueError:
+            return Response({'detail': 'En-têtes Upload-Offset et Content-Length requis.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        except DjangoValidationError as e:
+            return _erreur(e)
+
+        if televersement.statut != 'en_cours':
+            return Response({'detail': 'Téléversement déjà terminé.'}, status=status.HTTP_409_CONFLICT)
+        if offset != televersement.recu:
+            return _conflit(televersement.recu)
+        attendu = min(televersement.taille_bloc, televersement.taille - offset)
+        if longueur != attendu:
+            return Response({'detail': f'Bloc de {attendu} octets attendu.', 'recu': televersement.recu},
+                            status=status.HTTP_400_BAD_REQUEST)
+        # Lecture du corps (client parfois lent) et écriture sans verrou ni transaction ouverte
+        try:
+            bloc, somme_b64 = lire_bloc(request.stream, longueur, somme)
+        except DjangoValidationError as e:
+            return _erreur(e)
+        try:
+            backend_de(televersement).ecrire(televersement, bloc, somme_b64)
+        except FileNotFoundError:
+            return Response({'detail': 'Téléversement déjà terminé.'}, status=status.HTTP_409_CONFLICT)
+        # Avance de `recu` seulement s'il n'a pas bougé depuis la lecture : sinon un autre
+        # envoi du même bloc l'a déjà compté, celui-ci est ignoré
+        televersement.recu = offset + longueur
+        televersement.date_modification = timezone.now()
+        avance = Televersement.objects.filter(pk=televersement.pk, statut='en_cours', recu=offset).update(
+            recu=televersement.recu, parties=televersement.parties,
+            date_modification=televersement.date_modification,
+        )
+        if not avance:
+            return _conflit(Televersement.objects.filter(pk=televersement.pk).values_list('recu', flat=True).first())
+        return Response({'recu': televersement.recu}, headers={'Upload-Offset': str(televersement.recu)})
+
+    @action(detail=True, methods=['post'])
+    def terminer(self, request, pk=None):
+        """Clôt le téléversement une fois tous les octets reçus (somme du fichier vérifiée si fournie)."""
+        televersement = self.get_object()
+        if televersement.statut != 'en_cours':
+            return Response(self.get_serializer(televersement).data)
+        if televersement.recu != televersement.taille:
+            return Response(
+                {'detail': 'Téléversement incomplet.', 'recu': televersement.recu},
+                status=status.HTTP_409_CONFLICT,
+            )
+        # Relecture du fichier (somme SHA-256) ou assemblage S3 : sans verrou ni transaction ouverte
+        complet = Televersement.objects.filter(pk=televersement.pk, statut='en_cours', recu=televersement.taille)
+        try:
+            backend_de(televersement).terminer(televersement)
+        except SommeIncorrecte as e:
+            # Fichier corrompu : à renvoyer depuis le début
+            complet.update(recu=0, parties=[], date_modification=timezone.now())
+            return _erreur(e)
+        except FileNotFoundError:
+            pass  # terminé (ou abandonné) entre-temps par un autre appel : voir ci-dessous
+        else:
+            complet.update(statut='termine', date_modification=timezone.now())
+        televersement = Televersement.objects.filter(pk=televersement.pk).first()
+        if televersement is None or televersement.statut == 'en_cours':
+            return Response({'detail': 'Téléversement modifié entre-temps.'}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(televersement).data)
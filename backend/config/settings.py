@@ -31,6 +31,9 @@ INSTALLED_APPS = [
     'apps.scientifique',
     'apps.organisation',
     'apps.bibliotheque',
+    'apps.rapports',
+    'apps.recherche',
+    'apps.televersements',
 ]
 
 AUTH_USER_MODEL = 'accounts.CustomUser'
@@ -128,7 +131,8 @@ if USE_S3_MEDIA:
     # Les fichiers restent disponibles après redéploiement (Render, etc.)
     STORAGES = {
         'default': {
-            'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage',
+            # S3Boto3Storage + cache des URL signées (utils/stockage_s3.py)
+            'BACKEND': 'utils.stockage_s3.S3StockageMedias',
             'OPTIONS': {
                 'bucket_name': os.environ.get('AWS_STORAGE_BUCKET_NAME'),
                 'access_key': os.environ.get('AWS_ACCESS_KEY_ID'),
@@ -139,6 +143,7 @@ if USE_S3_MEDIA:
                 'location': os.environ.get('AWS_S3_MEDIA_LOCATION', 'media'),
                 'file_overwrite': False,
                 'querystring_auth': os.environ.get('AWS_QUERYSTRING_AUTH', 'true').lower() == 'true',
+                'querystring_expire': int(os.environ.get('AWS_QUERYSTRING_EXPIRE', '3600')),
             },
         },
         'staticfiles': {
@@ -164,11 +169,68 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 PUSH_ENABLED = os.environ.get('PUSH_ENABLED', 'False').lower() == 'true'
 PUSH_GATEWAY_URL = os.environ.get('PUSH_GATEWAY_URL', 'https://dbmgt-sxc2.onrender.com')
 PUSH_GATEWAY_TOKEN = os.environ.get('PUSH_GATEWAY_TOKEN', 'super_token_dbm_2025')
+# Endpoint d'envoi groupé de la passerelle (ex: https://.../send-batch) ; vide = un appel par membre
+PUSH_GATEWAY_BATCH_URL = os.environ.get('PUSH_GATEWAY_BATCH_URL', '')
+PUSH_GATEWAY_BATCH_SIZE = int(os.environ.get('PUSH_GATEWAY_BATCH_SIZE', '200'))
+# Client HTTP de la passerelle (pool keep-alive, délais en secondes)
+PUSH_HTTP_POOL_SIZE = int(os.environ.get('PUSH_HTTP_POOL_SIZE', '10'))
+PUSH_HTTP_CONNECT_TIMEOUT = float(os.environ.get('PUSH_HTTP_CONNECT_TIMEOUT', '5'))
+PUSH_HTTP_READ_TIMEOUT = float(os.environ.get('PUSH_HTTP_READ_TIMEOUT', '10'))
+# File d'envoi (commande process_push_queue)
+PUSH_QUEUE_CONCURRENCY = int(os.environ.get('PUSH_QUEUE_CONCURRENCY', '4'))
+PUSH_MAX_ATTEMPTS = int(os.environ.get('PUSH_MAX_ATTEMPTS', '5'))
+PUSH_RETRY_BASE_SECONDS = int(os.environ.get('PUSH_RETRY_BASE_SECONDS', '30'))
+
+# Exports de rapports en arrière-plan : durée de réutilisation du fichier généré (secondes)
+EXPORT_RAPPORT_TTL = int(os.environ.get('EXPORT_RAPPORT_TTL', '3600'))
+# Durée de conservation (s) des rapports rendus en cache (rapports/cache/), purgés par process_export_jobs
+EXPORT_RAPPORT_CACHE_TTL = int(os.environ.get('EXPORT_RAPPORT_CACHE_TTL', str(7 * 24 * 3600)))
+# Processus de rendu des rapports PDF volumineux (0 = nombre de CPU, 1 = rendu séquentiel) :
+# EXPORT_PDF_WORKERS dans les requêtes web (séquentiel par défaut : pas de fork depuis les
+# workers gunicorn), EXPORT_PDF_WORKERS_TACHES dans process_export_jobs
+EXPORT_PDF_WORKERS = int(os.environ.get('EXPORT_PDF_WORKERS', '1'))
+EXPORT_PDF_WORKERS_TACHES = int(os.environ.get('EXPORT_PDF_WORKERS_TACHES', '0'))
+
+# Envoi des PDF de la bibliothèque (utils/fichiers.py) : 'django' (flux Python, Range géré),
+# 'x-accel' (nginx : location interne FICHIERS_X_ACCEL_PREFIXE → MEDIA_ROOT) ou 'x-sendfile'
+FICHIERS_MODE_ENVOI = os.environ.get('FICHIERS_MODE_ENVOI', 'django')
+FICHIERS_X_ACCEL_PREFIXE = os.environ.get('FICHIERS_X_ACCEL_PREFIXE', '/media-protege/')
+# Durée de validité (s) des URL signées S3 vers lesquelles les lectures sont redirigées
+FICHIERS_URL_SIGNEE_DUREE = int(os.environ.get('FICHIERS_URL_SIGNEE_DUREE', '300'))
+
+# Médias S3 (utils/stockage_s3.py) : une URL signée est réutilisée jusqu'à MEDIAS_URL_MARGE s
+# avant son expiration (supérieure à IDENTITES_DUREE, qui garde les URL des photos en cache)
+MEDIAS_URL_MARGE = int(os.environ.get('MEDIAS_URL_MARGE', '600'))
+# URL publique (CDN) de la racine du bucket : fichiers MEDIAS_CDN_MOTIFS servis sans signature
+MEDIAS_CDN_URL = os.environ.get('MEDIAS_CDN_URL', '')
+MEDIAS_CDN_MOTIFS = [m.strip() for m in os.environ.get('MEDIAS_CDN_MOTIFS', '*/derives/*').split(',') if m.strip()]
+
+# Compteurs de vues / téléchargements (utils/compteurs.py) : écriture groupée toutes les
+# COMPTEURS_INTERVALLE secondes (0 = écriture immédiate) ou dès COMPTEURS_TAMPON_MAX entrées
+COMPTEURS_INTERVALLE = int(os.environ.get('COMPTEURS_INTERVALLE', '10'))
+COMPTEURS_TAMPON_MAX = int(os.environ.get('COMPTEURS_TAMPON_MAX', '1000'))
+
+# Ingestion des PDF (commande ingerer_pdfs) : texte extrait conservé (caractères), largeur des miniatures (px)
+INGESTION_TEXTE_MAX = int(os.environ.get('INGESTION_TEXTE_MAX', '500000'))
+INGESTION_MINIATURE_LARGEUR = int(os.environ.get('INGESTION_MINIATURE_LARGEUR', '300'))
+
+# Images dérivées (utils/images.py) : format des miniatures thumb / medium / large (webp ou jpeg)
+IMAGES_FORMAT_DERIVES = os.environ.get('IMAGES_FORMAT_DERIVES', 'webp')
+
+# Recherche plein texte (apps.recherche) : texte indexé par contenu (caractères)
+RECHERCHE_CONTENU_MAX = int(os.environ.get('RECHERCHE_CONTENU_MAX', '200000'))
 
 # Limite d'upload pour les PDF de la bibliothèque (10 Mo)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
 
+# Téléversements par blocs (apps/televersements) des fichiers audio, vidéo et PDF volumineux :
+# taille des blocs (S3 : 5 Mio minimum), taille maximale d'un fichier, abandon après
+# TELEVERSEMENTS_DUREE heures sans bloc reçu (commande purger_televersements)
+TELEVERSEMENTS_TAILLE_BLOC = int(os.environ.get('TELEVERSEMENTS_TAILLE_BLOC', str(5 * 1024 * 1024)))
+TELEVERSEMENTS_TAILLE_MAX = int(os.environ.get('TELEVERSEMENTS_TAILLE_MAX', str(2 * 1024 ** 3)))
+TELEVERSEMENTS_DUREE = int(os.environ.get('TELEVERSEMENTS_DUREE', '48'))
+
 # CORS
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 
@@ -207,3 +269,18 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+
+# Cache partagé entre les processus (Redis) si REDIS_URL est défini, sinon cache mémoire
+# propre à chaque processus (défaut Django)
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        },
+    }
+
+# Identités d'affichage des membres (apps/accounts/identites.py) : durée (s) dans le cache
+# partagé — inférieure à la validité des URL signées S3 des photos — et dans chaque processus
+IDENTITES_DUREE = int(os.environ.get('IDENTITES_DUREE', '300'))
+IDENTITES_DUREE_LOCALE = int(os.environ.get('IDENTITES_DUREE_LOCALE', '30'))
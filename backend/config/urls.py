@@ -25,6 +25,9 @@ urlpatterns = [
     path('api/', include('apps.scientifique.urls')),
     path('api/', include('apps.organisation.urls')),
     path('api/', include('apps.bibliotheque.urls')),
+    path('api/', include('apps.rapports.urls')),
+    path('api/', include('apps.recherche.urls')),
+    path('api/', include('apps.televersements.urls')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,157 @@
+"""
+Compteurs de consultation (vues, téléchargements, écoutes) des contenus.
+
+Un incrément n'écrit pas en base : il s'ajoute à un tampon du processus, vidé
+périodiquement (COMPTEURS_INTERVALLE secondes, par un minuteur en arrière-plan) ou dès
+qu'il dépasse COMPTEURS_TAMPON_MAX entrées, et à l'arrêt du processus. Le vidage fait,
+par modèle et par champ, un seul UPDATE ... SET champ = champ + CASE pk ... END : pas de
+lecture-modification-écriture, donc pas d'incrément perdu entre requêtes concurrentes.
+
+Lecture : valeur() / appliquer() ajoutent aux valeurs lues en base les incréments encore
+en attente dans le processus (valeurs approchées : chaque worker a son propre tampon).
+
+Avec COMPTEURS_INTERVALLE = 0, chaque incrément est écrit immédiatement (F()).
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Value, When
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# Champs compteurs autorisés, par modèle
+COMPTEURS = {
+    'bibliotheque.LivreNumerique': ('vues', 'telechargements'),
+    'conservatoire.DocumentNumerique': ('vues', 'telechargements'),
+    'conservatoire.MediaAudio': ('ecoutes',),
+    'conservatoire.MediaVideo': ('vues',),
+    'informations.Publication': ('vues',),
+    'informations.GalerieMedia': ('vues',),
+    'communication.SujetForum': ('vues',),
+    'culturelle.Enseignement': ('vues',),
+    'scientifique.OuvrageScientifique': ('telechargements',),
+    'scientifique.PublicationScientifique': ('vues',),
+}
+
+# {(label modèle, champ): {pk: incrément}}
+_tampon = defaultdict(lambda: defaultdict(int))
+_verrou = threading.Lock()
+_minuteur = None
+
+
+def _label(modele):
+    return modele._meta.label
+
+
+def _verifier(modele, champ):
+    if champ not in COMPTEURS.get(_label(modele), ()):
+        raise ValueError(f"{_label(modele)}.{champ} n'est pas un compteur déclaré.")
+
+
+def _intervalle():
+    return getattr(settings, 'COMPTEURS_INTERVALLE', 10)
+
+
+def incrementer(objet, champ, n=1):
+    """Ajoute `n` au compteur `champ` de `objet` (instance d'un modèle de COMPTEURS)."""
+    global _minuteur
+    modele = type(objet)
+    _verifier(modele, champ)
+    if _intervalle() <= 0:
+        modele.objects.filter(pk=objet.pk).update(**{champ: F(champ) + n})
+        return
+    with _verrou:
+        _tampon[(_label(modele), champ)][objet.pk] += n
+        plein = sum(len(v) for v in _tampon.values()) >= getattr(settings, 'COMPTEURS_TAMPON_MAX', 1000)
+        if _minuteur is None and not plein:
+            _minuteur = threading.Timer(_intervalle(), _vider_en_arriere_plan)
+            _minuteur.daemon = True
+            _minuteur.start()
+    if plein:
+        vider()
+
+
+def _vider_en_arriere_plan():
+    global _minuteur
+    with _verrou:
+        _minuteur = None
+    try:
+        vider()
+    finally:
+        # Connexions ouvertes par ce thread : fermées avec lui
+        connections.close_all()
+
+
+def vider():
+    """Écrit en base les incréments en attente. Retourne le nombre de lignes mises à jour."""
+    global _tampon
+    with _verrou:
+        a_ecrire, _tampon = _tampon, defaultdict(lambda: defaultdict(int))
+    total = 0
+    for (label, champ), increments in a_ecrire.items():
+        modele = django_apps.get_model(label)
+        try:
+            total += modele.objects.filter(pk__in=list(increments)).update(**{
+                champ: F(champ) + Case(
+                    *[When(pk=pk, then=Value(n)) for pk, n in increments.items()],
+                    default=Value(0), output_field=IntegerField(),
+                )
+            })
+        except Exception:
+            # Base indisponible : les incréments sont remis dans le tampon
+            logger.exception('Compteurs %s.%s non enregistrés', label, champ)
+            with _verrou:
+                for pk, n in increments.items():
+                    _tampon[(label, champ)][pk] += n
+    return total
+
+
+def en_attente(modele, pk, champ):
+    """Incrément du compteur non encore écrit en base (processus courant)."""
+    with _verrou:
+        return _tampon.get((_label(modele), champ), {}).get(pk, 0)
+
+
+def valeur(objet, champ):
+    """Valeur approchée en direct : valeur lue en base + incréments en attente."""
+    return getattr(objet, champ) + en_attente(type(objet), objet.pk, champ)
+
+
+def appliquer(objets):
+    """Ajoute aux instances `objets` (même modèle) leurs incréments en attente, avant sérialisation."""
+    objets = list(objets)
+    if not objets:
+        return objets
+    label = _label(type(objets[0]))
+    with _verrou:
+        for champ in COMPTEURS.get(label, ()):
+            increments = _tampon.get((label, champ))
+            if not increments:
+                continue
+            for objet in objets:
+                if objet.pk in increments:
+                    setattr(objet, champ, getattr(objet, champ) + increments[objet.pk])
+    return objets
+
+
+class CompteurVuesMixin:
+    """
+    ViewSet : la consultation d'un élément (retrieve) incrémente son compteur
+    `champ_compteur_vues` ; la réponse inclut les incréments en attente.
+    """
+    champ_compteur_vues = 'vues'
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        incrementer(instance, self.champ_compteur_vues)
+        appliquer([instance])
+        return Response(self.get_serializer(instance).data)
+
+
+atexit.register(vider)
@@ -0,0 +1,55 @@
+"""
+Exports CSV en flux : les lignes sont produites par un générateur (lecture en base par
+lots avec `.iterator()`), encodées par blocs et envoyées au fil de l'eau
+(StreamingHttpResponse). Premier octet immédiat, mémoire constante quel que soit le volume.
+
+Format commun des exports de l'application : séparateur ';', UTF-8 avec BOM (Excel).
+"""
+import csv
+import tempfile
+
+from django.http import StreamingHttpResponse
+
+DELIMITEUR = ';'
+BOM = '\ufeff'.encode('utf-8')
+# Lignes regroupées par bloc envoyé (évite un appel d'écriture réseau par ligne)
+LIGNES_PAR_BLOC = 500
+# Au-delà, le fichier produit par ecrire_csv passe sur disque
+SPOOL_MAX = 5 * 1024 * 1024
+
+
+class _Echo:
+    """Pseudo-fichier : csv.writer retourne directement la ligne formatée."""
+
+    def write(self, value):
+        return value
+
+
+def flux_csv(lignes, lignes_par_bloc=LIGNES_PAR_BLOC):
+    """Générateur de blocs d'octets CSV (BOM en tête) à partir d'un itérable de lignes."""
+    writer = csv.writer(_Echo(), delimiter=DELIMITEUR)
+    yield BOM
+    bloc = []
+    for ligne in lignes:
+        bloc.append(writer.writerow(ligne))
+        if len(bloc) >= lignes_par_bloc:
+            yield ''.join(bloc).encode('utf-8')
+            bloc = []
+    if bloc:
+        yield ''.join(bloc).encode('utf-8')
+
+
+def reponse_csv(lignes, nom_fichier):
+    """StreamingHttpResponse CSV en pièce jointe (`nom_fichier` avec extension)."""
+    resp = StreamingHttpResponse(flux_csv(lignes), content_type='text/csv; charset=utf-8')
+    resp['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+    return resp
+
+
+def ecrire_csv(lignes):
+    """CSV complet dans un fichier temporaire (mémoire bornée), positionné au début."""
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX)
+    for bloc in flux_csv(lignes):
+        out.write(bloc)
+    out.seek(0)
+    return out
@@ -0,0 +1,157 @@
+"""
+Envoi des fichiers du stockage (PDF de la bibliothèque) sans les charger en mémoire.
+
+- stockage distant (S3) : redirection vers une URL signée de courte durée
+  (FICHIERS_URL_SIGNEE_DUREE), le client télécharge directement depuis le stockage
+- FICHIERS_MODE_ENVOI = 'x-accel' (nginx) ou 'x-sendfile' (Apache, lighttpd) : le serveur
+  frontal envoie le fichier, le worker ne fait que vérifier les droits
+- sinon ('django') : FileResponse en flux, avec requêtes partielles (Range → 206) pour la
+  lecture progressive (PDF.js)
+
+ETag / Last-Modified sont calculés depuis la taille et la date du fichier ;
+If-None-Match / If-Modified-Since répondent 304 sans ouvrir le fichier.
+"""
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+
+_PLAGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _Tranche:
+    """Lecture limitée à `longueur` octets d'un fichier, à partir de `debut`."""
+
+    def __init__(self, fichier, debut, longueur):
+        self.fichier = fichier
+        self.restant = longueur
+        fichier.seek(debut)
+
+    def read(self, n=-1):
+        if self.restant <= 0:
+            return b''
+        n = self.restant if n is None or n < 0 else min(n, self.restant)
+        data = self.fichier.read(n)
+        self.restant -= len(data)
+        return data
+
+    def close(self):
+        self.fichier.close()
+
+
+def plage_demandee(entete, taille):
+    """
+    Plage (debut, fin) incluse demandée par l'en-tête Range, pour un fichier de `taille`
+    octets. None : en-tête absent ou ignoré (plusieurs plages, syntaxe invalide) → fichier
+    entier. False : plage hors du fichier (416).
+    """
+    m = _PLAGE_RE.match((entete or '').strip())
+    if not m or m.groups() == ('', ''):
+        return None
+    debut, fin = m.groups()
+    if not debut:
+        # bytes=-N : les N derniers octets
+        n = int(fin)
+        return (max(0, taille - n), taille - 1) if n and taille else False
+    debut = int(debut)
+    if fin and int(fin) < debut:
+        return None
+    if debut >= taille:
+        return False
+    return debut, (min(int(fin), taille - 1) if fin else taille - 1)
+
+
+def premiere_requete(request):
+    """Vrai si la requête n'est pas une suite de lecture partielle (pour les compteurs)."""
+    entete = request.headers.get('Range')
+    return request.method == 'GET' and (not entete or entete.replace(' ', '').startswith('bytes=0-'))
+
+
+def _url_distante(storage, nom, filename, as_attachment, content_type):
+    disposition = content_disposition_header(as_attachment, filename)
+    try:
+        # S3 (django-storages) : URL signée avec en-têtes de réponse imposés
+        return storage.url(nom, parameters={
+            'ResponseContentType': content_type,
+            'ResponseContentDisposition': disposition,
+        }, expire=getattr(settings, 'FICHIERS_URL_SIGNEE_DUREE', 300))
+    except TypeError:
+        return storage.url(nom)
+
+
+def servir_fichier(request, fichier, filename, as_attachment=False, content_type='application/pdf'):
+    """
+    Réponse HTTP pour le FieldFile `fichier`. `filename` : nom proposé au client.
+    Lève Http404 si le fichier est absent.
+    """
+    if not fichier or not fichier.name:
+        raise Http404("Fichier non disponible.")
+    storage, nom = fichier.storage, fichier.name
+
+    try:
+        chemin = storage.path(nom)
+    except NotImplementedError:
+        return HttpResponseRedirect(_url_distante(storage, nom, filename, as_attachment, content_type))
+
+    try:
+        stat = os.stat(chemin)
+    except FileNotFoundError:
+        raise Http404(
+            "Fichier introuvable sur le serveur. En hébergement cloud, les fichiers peuvent être perdus après un redéploiement. Veuillez supprimer ce livre et le réajouter avec le PDF."
+        )
+    except OSError as e:
+        raise Http404(f"Fichier non accessible: {e!s}")
+    if not stat.st_size:
+        raise Http404("Fichier vide.")
+
+    taille = stat.st_size
+    etag = quote_etag(f'{taille:x}-{stat.st_mtime_ns:x}')
+    last_modified = int(stat.st_mtime)
+    conditionnelle = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditionnelle is not None:
+        return conditionnelle
+
+    mode = getattr(settings, 'FICHIERS_MODE_ENVOI', 'django')
+    if mode in ('x-accel', 'x-sendfile'):
+        resp = HttpResponse(content_type=content_type)
+        if mode == 'x-accel':
+            # URI interne nginx (décodée par nginx) : noms de fichiers non ASCII possibles
+            resp['X-Accel-Redirect'] = getattr(settings, 'FICHIERS_X_ACCEL_PREFIXE', '/media-protege/') + quote(nom)
+        else:
+            resp['X-Sendfile'] = chemin
+        resp['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    else:
+        plage = plage_demandee(request.headers.get('Range'), taille)
+        if_range = request.headers.get('If-Range')
+        if plage and if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+            # Fichier modifié depuis la première lecture : renvoyer le fichier entier
+            plage = None
+        if plage is False:
+            resp = HttpResponse(status=416)
+            resp['Content-Range'] = f'bytes */{taille}'
+            return resp
+        try:
+            f = open(chemin, 'rb')
+        except OSError as e:
+            raise Http404(f"Fichier non accessible: {e!s}")
+        if plage:
+            debut, fin = plage
+            resp = FileResponse(
+                _Tranche(f, debut, fin - debut + 1), status=206,
+                as_attachment=as_attachment, filename=filename, content_type=content_type,
+            )
+            resp['Content-Range'] = f'bytes {debut}-{fin}/{taille}'
+            resp['Content-Length'] = fin - debut + 1
+        else:
+            resp = FileResponse(f, as_attachment=as_attachment, filename=filename, content_type=content_type)
+        resp['Accept-Ranges'] = 'bytes'
+
+    resp['ETag'] = etag
+    resp['Last-Modified'] = http_date(last_modified)
+    # Réponse propre à l'utilisateur ; revalidation (304) à chaque ouverture
+    resp['Cache-Control'] = 'private, no-cache'
+    return resp
@@ -0,0 +1,277 @@
+"""
+Images dérivées (miniatures) des photos et images déposées.
+
+Chaque image d'un champ ImageDeriveeField / FichierDeriveField est déclinée en
+IMAGES_TAILLES (largeur en px, hauteur proportionnelle) au format IMAGES_FORMAT_DERIVES
+(webp ou jpeg), sans métadonnées EXIF (position GPS, appareil...) et orientée d'après
+l'EXIF d'origine :
+
+    photos_membres/abc.jpg → photos_membres/derives/abc_jpg_thumb.webp, abc_jpg_medium.webp, abc_jpg_large.webp
+
+(l'extension de l'original fait partie du nom : abc.jpg et abc.png ont des dérivés distincts)
+
+Aucun dérivé n'est plus large que l'original (jamais agrandi) : les tailles plus étroites
+que l'original sont produites à leur largeur, la première taille au moins aussi large
+à celle de l'original, les suivantes pas du tout (voir largeurs_derives).
+
+Les dérivés sont générés après l'enregistrement d'un nouveau fichier (fin de transaction),
+et pour les fichiers existants par la commande `generer_derives_images`. Leur chemin se
+déduit du nom de l'original : les sérialiseurs exposent leurs URL (<champ>_thumb,
+<champ>_srcset) sans accès au stockage. La largeur de l'original (largeur_field du
+champ, ex. photo_largeur) est lue dans l'en-tête du fichier à son enregistrement, ou
+par `generer_derives_images` pour les fichiers existants : le srcset ne liste que les
+dérivés produits, avec leur largeur réelle (« 640w »). Largeur inconnue (fichier pas
+encore traité par la commande) : pas de srcset. Les URL restent données si la génération
+a échoué ; le client garde l'original en secours (onerror de l'image → URL de l'original).
+"""
+import logging
+import os
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+TAILLES = {'thumb': 160, 'medium': 640, 'large': 1280}
+EXTENSIONS_IMAGES = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+QUALITE = {'webp': 80, 'jpeg': 82}
+
+
+def tailles():
+    return getattr(settings, 'IMAGES_TAILLES', TAILLES)
+
+
+def format_derives():
+    return getattr(settings, 'IMAGES_FORMAT_DERIVES', 'webp')
+
+
+def est_image(nom):
+    return os.path.splitext(nom or '')[1].lower() in EXTENSIONS_IMAGES
+
+
+def chemin_derive(nom, taille):
+    """Chemin (dans le stockage) du dérivé `taille` de l'image `nom`."""
+    dossier, fichier = posixpath.split(nom)
+    base, ext = posixpath.splitext(fichier)
+    if ext:
+        base = f'{base}_{ext[1:]}'
+    extension = 'jpg' if format_derives() == 'jpeg' else format_derives()
+    return posixpath.join(dossier, 'derives', f'{base}_{taille}.{extension}')
+
+
+# ───────────────────────────────── Génération ───────────────────────────────
+
+def largeurs_derives(largeur):
+    """
+    {taille: largeur réelle} des dérivés d'une image de `largeur` px (après orientation) :
+    tailles plus étroites à leur largeur, puis la première au moins aussi large que
+    l'original, à la largeur de l'original ; les suivantes n'existent pas.
+    """
+    largeurs = {}
+    for taille, cote in sorted(tailles().items(), key=lambda t: t[1]):
+        largeurs[taille] = min(cote, largeur)
+        if cote >= largeur:
+            break
+    return largeurs
+
+
+def _largeur_orientee(image):
+    """Largeur de l'image PIL une fois orientée (EXIF 5 à 8 : rotation d'un quart de tour)."""
+    from PIL import ExifTags
+
+    return image.height if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8) else image.width
+
+
+def largeur_image(fichier):
+    """Largeur (orientée) de l'image `fichier` (fichier ouvert), lue dans son en-tête ; None si illisible."""
+    from PIL import Image
+
+    position = fichier.tell()
+    try:
+        fichier.seek(0)
+        with Image.open(fichier) as image:
+            return _largeur_orientee(image)
+    except Exception:
+        return None
+    finally:
+        fichier.seek(position)
+
+
+def _ouvrir(storage, nom, cote_max):
+    from PIL import Image, ImageOps
+
+    with storage.open(nom, 'rb') as f:
+        image = Image.open(f)
+        largeur = _largeur_orientee(image)
+        # JPEG : décodage directement à une échelle réduite (1/2, 1/4, 1/8), bien plus rapide
+        image.draft('RGB', (cote_max, cote_max))
+        image.load()
+    icc = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+    transparente = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if format_derives() == 'jpeg':
+        if transparente:
+            # JPEG sans transparence : image posée sur fond blanc
+            image = image.convert('RGBA')
+            fond = Image.new('RGB', image.size, 'white')
+            fond.paste(image, mask=image.getchannel('A'))
+            image = fond
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if transparente else 'RGB')
+    return image, icc, largeur
+
+
+def generer_derives(storage, nom):
+    """
+    Génère (ou remplace) les dérivés de l'image `nom` (voir largeurs_derives) et supprime
+    ceux des tailles qui n'ont plus lieu d'être. Retourne (largeur de l'original,
+    {taille: (chemin, (largeur, hauteur))}) ; (None, {}) si `nom` n'est pas une image.
+    """
+    from PIL import Image
+
+    if not est_image(nom):
+        return None, {}
+    fmt = format_derives()
+    image, icc, largeur_originale = _ouvrir(storage, nom, max(tailles().values()))
+    largeurs = largeurs_derives(largeur_originale)
+    derives = {}
+    # Du plus grand au plus petit : chaque réduction part de la précédente
+    for taille, _ in sorted(tailles().items(), key=lambda t: -t[1]):
+        chemin = chemin_derive(nom, taille)
+        if storage.exists(chemin):
+            storage.delete(chemin)
+        if taille not in largeurs:
+            continue
+        largeur = largeurs[taille]
+        dimensions = (largeur, max(1, round(image.height * largeur / image.width)))
+        if dimensions != image.size:
+            image = image.resize(dimensions, Image.LANCZOS)
+        out = BytesIO()
+        options = {'quality': QUALITE.get(fmt, 80), 'icc_profile': icc}
+        if fmt == 'webp':
+            options['method'] = 4
+        else:
+            options.update(optimize=True, progressive=True)
+        # Pas d'argument exif : les métadonnées de l'original ne sont pas recopiées
+        image.save(out, fmt.upper(), **options)
+        derives[taille] = (storage.save(chemin, ContentFile(out.getvalue())), dimensions)
+    return largeur_originale, derives
+
+
+def generer_et_enregistrer(modele, champ, nom):
+    """
+    Dérivés du fichier `nom` du champ `champ` (DerivesMixin) de `modele`, puis largeur de
+    l'original enregistrée sur les lignes qui le référencent. Retourne la largeur.
+    """
+    largeur, _ = generer_derives(champ.storage, nom)
+    if largeur and champ.largeur_field:
+        modele._default_manager.filter(**{champ.attname: nom}).update(**{champ.largeur_field: largeur})
+    return largeur
+
+
+def _generer_apres_commit(modele, champ, nom):
+    try:
+        generer_et_enregistrer(modele, champ, nom)
+    except Exception:
+        logger.exception("Dérivés de l'image %s non générés", nom)
+
+
+class DerivesMixin:
+    """
+    Champ fichier dont les nouveaux fichiers (images) sont déclinés en dérivés.
+    largeur_field : champ entier du modèle recevant la largeur de l'original (comme
+    width_field d'ImageField) : les dérivés existants s'en déduisent (largeurs_derives).
+    """
+
+    def __init__(self, *args, largeur_field=None, **kwargs):
+        self.largeur_field = largeur_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.largeur_field:
+            kwargs['largeur_field'] = self.largeur_field
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        fichier = getattr(model_instance, self.attname)
+        nouveau = bool(fichier) and not fichier._committed
+        if nouveau and self.largeur_field:
+            # Lue avant l'écriture du fichier ; largeur_field est déclaré après ce champ
+            setattr(model_instance, self.largeur_field, largeur_image(fichier) if est_image(fichier.name) else None)
+        fichier = super().pre_save(model_instance, add)
+        if nouveau and est_image(fichier.name):
+            modele, nom = type(model_instance), fichier.name
+            transaction.on_commit(lambda: _generer_apres_commit(modele, self, nom))
+        return fichier
+
+
+class ImageDeriveeField(DerivesMixin, models.ImageField):
+    pass
+
+
+class FichierDeriveField(DerivesMixin, models.FileField):
+    """FileField pouvant contenir une image (galerie : images, vidéos, audio)."""
+
+
+# ───────────────────────────────── URL ──────────────────────────────────────
+
+def largeur_originale(fichier):
+    """Largeur enregistrée de l'original du FieldFile `fichier` (largeur_field), ou None."""
+    champ_largeur = getattr(fichier.field, 'largeur_field', None)
+    return getattr(fichier.instance, champ_largeur, None) if champ_largeur else None
+
+
+def url_derive(fichier, taille, request=None):
+    """
+    URL du dérivé `taille` du FieldFile `fichier`, ou None (pas de fichier / pas une image).
+    Taille non produite (original plus étroit) : URL du plus grand dérivé existant.
+    """
+    if not fichier or not est_image(fichier.name):
+        return None
+    largeur = largeur_originale(fichier)
+    if largeur:
+        largeurs = largeurs_derives(largeur)
+        if taille not in largeurs:
+            taille = max(largeurs, key=largeurs.get)
+    url = fichier.storage.url(chemin_derive(fichier.name, taille))
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def srcset(fichier, request=None):
+    """
+    Attribut srcset (« url 160w, url 640w, ... ») des dérivés existants du FieldFile
+    `fichier`, avec leur largeur réelle ; à compléter côté client par l'attribut sizes.
+    None tant que la largeur de l'original n'est pas connue (voir l'en-tête du module).
+    """
+    if not fichier or not est_image(fichier.name):
+        return None
+    largeur = largeur_originale(fichier)
+    if not largeur:
+        return None
+    return ', '.join(
+        f'{url_derive(fichier, taille, request)} {largeur_derive}w'
+        for taille, largeur_derive in sorted(largeurs_derives(largeur).items(), key=lambda t: t[1])
+    )
+
+
+class DeriveField(serializers.ReadOnlyField):
+    """
+    URL d'un dérivé (taille='thumb', 'medium', 'large') ou srcset (taille='srcset') de
+    l'image `source` ; absolue si la requête est dans le contexte (comme ImageField).
+    """
+
+    def __init__(self, taille='thumb', **kwargs):
+        self.taille = taille
+        super().__init__(**kwargs)
+
+    def to_representation(self, fichier):
+        request = self.context.get('request')
+        if self.taille == 'srcset':
+            return srcset(fichier, request)
+        return url_derive(fichier, self.taille, request)
@@ -0,0 +1,249 @@
+"""
+Ingestion des PDF déposés (livres de la bibliothèque, documents du conservatoire), hors
+du cycle de la requête : l'upload marque l'élément « en attente », la commande
+`ingerer_pdfs` en extrait ensuite
+
+- le nombre de pages et les métadonnées (titre, auteur, ...) — pypdf
+- le texte brut (recherche), limité à INGESTION_TEXTE_MAX caractères
+- une miniature de couverture (JPEG, INGESTION_MINIATURE_LARGEUR px de large) enregistrée
+  à côté du fichier : rendu de la première page par `pdftoppm` (poppler) s'il est
+  installé, sinon plus grande image de la première page (PDF scannés)
+
+Les listes affichent les miniatures (quelques Ko) au lieu de télécharger chaque PDF.
+Le signal `pdf_ingere` (sender : modèle, instance) est émis après chaque ingestion
+réussie (indexation du texte par la recherche).
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+# Modèles ingérés (héritent de PDFIngere)
+MODELES = ('bibliotheque.LivreNumerique', 'conservatoire.DocumentNumerique')
+
+# Valeurs de remplissage de certains générateurs (ReportLab...), non conservées
+METADONNEES_VIDES = {'(anonymous)', '(unspecified)', 'untitled', 'unknown'}
+
+# Un élément resté "en_cours" plus longtemps (worker arrêté) est repris
+DUREE_RESERVATION = timedelta(minutes=30)
+
+pdf_ingere = Signal()
+
+
+class PDFIngere(models.Model):
+    """
+    Champs renseignés par l'ingestion. Le modèle concret indique son champ fichier dans
+    `champ_pdf` ; tout nouveau fichier remet l'élément en file d'ingestion.
+    """
+    STATUT_INGESTION_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('echec', 'Échec'),
+    ]
+
+    champ_pdf = 'pdf'
+
+    nombre_pages = models.IntegerField(null=True, blank=True)
+    metadonnees = models.JSONField(default=dict, blank=True)
+    texte = models.TextField(blank=True, help_text='Texte extrait du PDF (recherche)')
+    miniature = models.ImageField(upload_to='miniatures/', null=True, blank=True)
+    ingestion_statut = models.CharField(
+        max_length=20, choices=STATUT_INGESTION_CHOICES, default='en_attente', db_index=True,
+    )
+    ingestion_erreur = models.TextField(blank=True)
+    date_ingestion = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        fichier = getattr(self, self.champ_pdf)
+        if fichier and not fichier._committed:
+            # Nouveau fichier déposé : à (ré)ingérer par le worker
+            self.ingestion_statut = 'en_attente'
+            self.ingestion_erreur = ''
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'ingestion_statut', 'ingestion_erreur'}
+        super().save(*args, **kwargs)
+
+
+# ───────────────────────────────── Extraction ───────────────────────────────
+
+def analyser_pdf(chemin):
+    """{nombre_pages, metadonnees, texte} du PDF local `chemin` (pypdf)."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(chemin)
+    if reader.is_encrypted and not reader.decrypt(''):
+        raise ValueError('PDF protégé par mot de passe.')
+
+    meta = reader.metadata or {}
+    metadonnees = {
+        cle: str(valeur).strip()
+        for cle, valeur in (
+            ('titre', meta.get('/Title')), ('auteur', meta.get('/Author')),
+            ('sujet', meta.get('/Subject')), ('mots_cles', meta.get('/Keywords')),
+            ('createur', meta.get('/Creator')), ('producteur', meta.get('/Producer')),
+            ('date_creation', meta.get('/CreationDate')),
+        )
+        if valeur and str(valeur).strip() and str(valeur).strip().lower() not in METADONNEES_VIDES
+    }
+    metadonnees['taille'] = os.path.getsize(chemin)
+
+    limite = getattr(settings, 'INGESTION_TEXTE_MAX', 500_000)
+    morceaux, longueur = [], 0
+    for page in reader.pages:
+        if longueur >= limite:
+            break
+        try:
+            texte = page.extract_text() or ''
+        except Exception:
+            continue
+        morceaux.append(texte)
+        longueur += len(texte)
+    texte = '\n'.join(morceaux)[:limite].replace('\x00', '')
+
+    return {'nombre_pages': len(reader.pages), 'metadonnees': metadonnees, 'texte': texte}
+
+
+def _rendu_premiere_page(chemin, largeur):
+    """Première page rendue par pdftoppm (JPEG), ou None si poppler est absent."""
+    pdftoppm = shutil.which('pdftoppm')
+    if not pdftoppm:
+        return None
+    with tempfile.TemporaryDirectory() as dossier:
+        sortie = os.path.join(dossier, 'page')
+        try:
+            subprocess.run(
+                [pdftoppm, '-f', '1', '-l', '1', '-singlefile', '-jpeg', '-scale-to-x', str(largeur),
+                 '-scale-to-y', '-1', chemin, sortie],
+                check=True, timeout=60, capture_output=True,
+            )
+        except (subprocess.SubprocessError, OSError):
+            return None
+        with open(sortie + '.jpg', 'rb') as f:
+            return f.read()
+
+
+def _image_premiere_page(chemin):
+    """Plus grande image de la première page (PDF scannés), ou None."""
+    from pypdf import PdfReader
+
+    try:
+        page = PdfReader(chemin).pages[0]
+        images = list(page.images)
+    except Exception:
+        return None
+    if not images:
+        return None
+    return max(images, key=lambda img: len(img.data)).data
+
+
+def generer_miniature(chemin):
+    """Miniature JPEG (octets) de la couverture du PDF local `chemin`, ou None."""
+    from PIL import Image
+
+    largeur = getattr(settings, 'INGESTION_MINIATURE_LARGEUR', 300)
+    source = _rendu_premiere_page(chemin, largeur) or _image_premiere_page(chemin)
+    if not source:
+        return None
+    try:
+        image = Image.open(BytesIO(source))
+        image.thumbnail((largeur, largeur * 2))
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        out = BytesIO()
+        image.save(out, 'JPEG', quality=75, optimize=True, progressive=True)
+        return out.getvalue()
+    except Exception:
+        return None
+
+
+def _copie_locale(fichier):
+    """Copie du fichier du stockage (local ou S3) dans un fichier temporaire ; retourne son chemin."""
+    tmp = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+    with tmp, fichier.storage.open(fichier.name, 'rb') as src:
+        shutil.copyfileobj(src, tmp, 1024 * 1024)
+    return tmp.name
+
+
+# ───────────────────────────────── File ─────────────────────────────────────
+
+def reserver():
+    """Réserve le plus ancien élément en attente (ou abandonné), tous modèles confondus."""
+    maintenant = timezone.now()
+    filtre = Q(ingestion_statut='en_attente') | Q(
+        ingestion_statut='en_cours', date_ingestion__lt=maintenant - DUREE_RESERVATION
+    )
+    for label in MODELES:
+        modele = django_apps.get_model(label)
+        with transaction.atomic():
+            objet = modele.objects.select_for_update(skip_locked=True).filter(filtre).order_by('pk').first()
+            if objet:
+                modele.objects.filter(pk=objet.pk).update(ingestion_statut='en_cours', date_ingestion=maintenant)
+                objet.ingestion_statut = 'en_cours'
+                return objet
+    return None
+
+
+def ingerer(objet):
+    """Ingère le PDF de `objet` et enregistre le résultat (statut termine ou echec)."""
+    fichier = getattr(objet, objet.champ_pdf)
+    champs = ['ingestion_statut', 'ingestion_erreur', 'date_ingestion']
+    chemin = ancienne = nouvelle = None
+    try:
+        if not fichier or not fichier.name:
+            raise ValueError('Aucun fichier.')
+        chemin = _copie_locale(fichier)
+        resultat = analyser_pdf(chemin)
+        for champ, valeur in resultat.items():
+            setattr(objet, champ, valeur)
+        champs += list(resultat)
+
+        miniature = generer_miniature(chemin)
+        if miniature:
+            ancienne = objet.miniature.name if objet.miniature else None
+            nom = os.path.splitext(fichier.name)[0] + '_miniature.jpg'
+            nouvelle = objet.miniature.name = fichier.storage.save(nom, ContentFile(miniature))
+            champs.append('miniature')
+        objet.ingestion_statut, objet.ingestion_erreur = 'termine', ''
+    except Exception as e:
+        objet.ingestion_statut, objet.ingestion_erreur = 'echec', str(e) or e.__class__.__name__
+    finally:
+        if chemin:
+            os.unlink(chemin)
+    objet.date_ingestion = timezone.now()
+    # update() : pas de save() du modèle (qui remettrait l'élément en file) ; sans effet si
+    # un nouveau fichier a été déposé entre-temps (l'élément est de nouveau en attente)
+    enregistre = type(objet).objects.filter(pk=objet.pk, ingestion_statut='en_cours').update(
+        **{c: getattr(objet, c) for c in champs}
+    )
+    # Miniature remplacée supprimée une fois le résultat enregistré ; résultat ignoré :
+    # c'est la miniature tout juste écrite qui n'est référencée nulle part
+    if nouvelle and not enregistre:
+        fichier.storage.delete(nouvelle)
+    elif nouvelle and ancienne and ancienne != nouvelle:
+        fichier.storage.delete(ancienne)
+    if enregistre and objet.ingestion_statut == 'termine':
+        pdf_ingere.send(sender=type(objet), instance=objet)
+    return objet
+
+
+def relancer_echecs():
+    """Remet en file les éléments en échec. Retourne leur nombre."""
+    return sum(
+        django_apps.get_model(label).objects.filter(ingestion_statut='echec').update(ingestion_statut='en_attente')
+        for label in MODELES
+    )
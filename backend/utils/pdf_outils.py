@@ -0,0 +1,265 @@
+"""
+Boîte à outils de rendu PDF (ReportLab) commune aux exports finance et conservatoire.
+
+Ce qui ne dépend pas du contenu d'un rapport est préparé une seule fois par processus :
+feuille de styles, logo décodé, commandes des styles de tableaux. L'en-tête de la Daara
+(logo, nom, filet) et le pied de page « Page i / N » sont dessinés sur le canvas par les
+modèles de page de DocumentRapport, au lieu d'être ajoutés au flux de chaque rapport.
+
+Les rapports utilisent les polices standard PDF (Helvetica) : aucune police à enregistrer.
+
+    from utils import pdf_outils
+    elements = pdf_outils.titre_rapport('Rapport des cotisations', periode)
+    ...
+    buf = BytesIO(pdf_outils.rendre(elements))
+"""
+from functools import lru_cache
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate, Paragraph, Spacer, TableStyle
+
+from .pdf_header import DAARA_NOM, DAARA_SOUS_TITRE, get_logo_path
+
+VERT = colors.HexColor('#2D5F3F')
+VERT_FONCE = colors.HexColor('#1E4029')
+OR = colors.HexColor('#C9A961')
+CLAIR = colors.HexColor('#F4EAD5')
+CREME = colors.HexColor('#FAF3E0')
+ROUGE = colors.HexColor('#CC3333')
+ORANGE = colors.HexColor('#E6A817')
+
+MARGES = (2*cm, 2*cm, 2*cm, 2*cm)  # gauche, droite, haut, bas
+# Hauteur réservée en haut de la première page pour l'en-tête dessiné
+HAUTEUR_ENTETE = 3.4*cm
+PIED_POLICE = ('Helvetica', 8)
+PIED_HAUTEUR = 28  # points depuis le bas de page (~1 cm)
+
+
+# ───────────────────────────── Caches par processus ─────────────────────────
+
+@lru_cache(maxsize=1)
+def styles():
+    """Styles de paragraphe partagés (ne pas modifier les objets retournés)."""
+    base = getSampleStyleSheet()
+    return {
+        'normal': base['Normal'],
+        'heading1': base['Heading1'],
+        'heading2': base['Heading2'],
+        'h1': ParagraphStyle('H1', parent=base['Heading1'], textColor=VERT, fontSize=16, spaceAfter=4),
+        'h2': ParagraphStyle('H2', parent=base['Heading2'], textColor=VERT, fontSize=12, spaceAfter=4),
+        'h1_fiche': ParagraphStyle('H1Fiche', parent=base['Heading1'], textColor=VERT, fontSize=15),
+        'h2_fiche': ParagraphStyle('H2Fiche', parent=base['Heading2'], textColor=VERT, fontSize=11),
+        'small': ParagraphStyle('Small', parent=base['Normal'], fontSize=8),
+    }
+
+
+@lru_cache(maxsize=1)
+def logo():
+    """Logo décodé (ImageReader), ou None s'il est absent ou illisible."""
+    chemin = get_logo_path()
+    if not chemin:
+        return None
+    try:
+        image = ImageReader(chemin)
+        image.getRGBData()  # décodage unique, conservé par l'ImageReader
+        return image
+    except Exception:
+        return None
+
+
+# ───────────────────────────── Styles de tableaux ───────────────────────────
+
+_TABLEAU = (
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 7),
+    ('TOPPADDING', (0, 0), (-1, 0), 7),
+    ('GRID', (0, 0), (-1, -1), 0.4, colors.grey),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('TOPPADDING', (0, 1), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+)
+
+_TABLEAU_SIMPLE = (
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+)
+
+_FICHE = (
+    ('BACKGROUND', (0, 0), (0, -1), CLAIR),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('GRID', (0, 0), (-1, -1), 0.4, colors.grey),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('TOPPADDING', (0, 0), (-1, -1), 5),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+)
+
+_LISTE = (
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('GRID', (0, 0), (-1, -1), 0.4, colors.grey),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+)
+
+_ENTETE_SEANCE = (
+    ('BACKGROUND', (0, 0), (-1, 0), VERT),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, 1), (-1, 1), CLAIR),
+    ('BACKGROUND', (0, 2), (-1, 2), OR),
+    ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, 3), (-1, 3), CREME),
+    ('GRID', (0, 0), (-1, -1), 0.4, colors.grey),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+)
+
+
+def style_tableau(entete=VERT, zebre=CLAIR):
+    """Tableau à en-tête coloré et lignes alternées (nouvel objet : .add() autorisé)."""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), entete),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, zebre]),
+        *_TABLEAU,
+    ])
+
+
+def style_tableau_simple(entete=VERT, taille_entete=None):
+    """Tableau sobre : en-tête coloré et grille."""
+    commandes = [('BACKGROUND', (0, 0), (-1, 0), entete), *_TABLEAU_SIMPLE]
+    if taille_entete:
+        commandes.append(('FONTSIZE', (0, 0), (-1, 0), taille_entete))
+    return TableStyle(commandes)
+
+
+def style_fiche():
+    """Tableau libellé / valeur (libellés en gras sur fond clair)."""
+    return TableStyle(_FICHE)
+
+
+def style_liste(entete=OR, zebre=CLAIR):
+    """Liste dense à lignes alternées, en-tête en gras sur fond `entete`."""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), entete),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, zebre]),
+        *_LISTE,
+    ])
+
+
+def style_entete_seance():
+    """Bloc d'en-tête d'une séance : deux paires de lignes titre / valeurs."""
+    return TableStyle(_ENTETE_SEANCE)
+
+
+# ───────────────────────────── Mise en page ─────────────────────────────────
+
+def titre_rapport(titre, periode):
+    """Titre et période du rapport, sous l'en-tête de la Daara."""
+    s = styles()
+    return [
+        Paragraph(f"<b>{titre}</b>", s['heading1']),
+        Paragraph(f"Période : {periode}", s['normal']),
+        Spacer(1, 0.5*cm),
+    ]
+
+
+def _dessiner_entete(canvas, doc):
+    """En-tête de la Daara en haut de la première page : logo, nom, sous-titre, filet doré."""
+    canvas.saveState()
+    gauche = doc.leftMargin
+    haut = doc.pagesize[1] - doc.topMargin
+    x_texte = gauche
+    image = logo()
+    if image is not None:
+        canvas.drawImage(image, gauche + 0.25*cm, haut - 2.5*cm, width=2.5*cm, height=2.5*cm, mask='auto')
+        x_texte = gauche + 3*cm
+    milieu = haut - 1.25*cm
+    canvas.setFillColor(VERT)
+    canvas.setFont('Helvetica-Bold', 14)
+    canvas.drawString(x_texte, milieu + 2, DAARA_NOM)
+    canvas.setFillColor(VERT_FONCE)
+    canvas.setFont('Helvetica', 9)
+    canvas.drawString(x_texte, milieu - 11, DAARA_SOUS_TITRE)
+    canvas.setStrokeColor(OR)
+    canvas.setLineWidth(1)
+    y = haut - 2.9*cm
+    canvas.line(gauche, y, doc.pagesize[0] - doc.rightMargin, y)
+    canvas.restoreState()
+
+
+def dessiner_pied(canvas, numero, total, largeur):
+    canvas.setFont(*PIED_POLICE)
+    canvas.setFillGray(0.4)
+    canvas.drawCentredString(largeur / 2, PIED_HAUTEUR, f'Page {numero} / {total}')
+
+
+class CanvasNumerote(Canvas):
+    """
+    Canvas qui ajoute « Page i / N » en pied de chaque page (argument `canvasmaker` de
+    doc.build) : le total n'est connu qu'à la fin, les pages sont donc dessinées au save().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pages = []
+
+    def showPage(self):
+        self._pages.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        total = len(self._pages)
+        for i, etat in enumerate(self._pages, 1):
+            self.__dict__.update(etat)
+            dessiner_pied(self, i, total, self._pagesize[0])
+            super().showPage()
+        super().save()
+
+
+class DocumentRapport(BaseDocTemplate):
+    """
+    Document A4 des rapports. Avec `entete`, la première page réserve HAUTEUR_ENTETE
+    en haut du cadre et y dessine l'en-tête de la Daara ; les pages suivantes
+    utilisent tout le cadre.
+    """
+
+    def __init__(self, fichier, entete=True, marges=MARGES, pagesize=A4, **kwargs):
+        gauche, droite, haut, bas = marges
+        super().__init__(
+            fichier, pagesize=pagesize,
+            leftMargin=gauche, rightMargin=droite, topMargin=haut, bottomMargin=bas, **kwargs
+        )
+
+        def cadre(reserve):
+            return Frame(self.leftMargin, self.bottomMargin, self.width, self.height - reserve, id='normal')
+
+        suite = PageTemplate(id='suite', frames=[cadre(0)])
+        if entete:
+            premiere = PageTemplate(
+                id='premiere', frames=[cadre(HAUTEUR_ENTETE)],
+                onPage=_dessiner_entete, autoNextPageTemplate='suite',
+            )
+            self.addPageTemplates([premiere, suite])
+        else:
+            self.addPageTemplates([suite])
+
+
+def rendre(elements, entete=True, numeroter=True, marges=MARGES):
+    """Met en page `elements` dans un DocumentRapport ; retourne les octets du PDF."""
+    buf = BytesIO()
+    doc = DocumentRapport(buf, entete=entete, marges=marges)
+    if numeroter:
+        doc.build(elements, canvasmaker=CanvasNumerote)
+    else:
+        doc.build(elements)
+    return buf.getvalue()
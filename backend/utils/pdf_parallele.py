@@ -0,0 +1,101 @@
+"""
+Rendu PDF en parallèle : un rapport est découpé en sections indépendantes, chaque section
+est rendue (ReportLab, lié au CPU) dans un processus séparé, puis les PDF obtenus sont
+concaténés et numérotés « Page i / N » sur l'ensemble du document (même pied de page
+que le rendu séquentiel, voir pdf_outils.CanvasNumerote).
+
+La fonction de rendu reçoit une section (données simples, sérialisables) et retourne les
+octets du PDF ; elle ne doit pas accéder à la base : les données sont lues au préalable
+par le processus appelant.
+
+parallele_disponible() est faux si pypdf n'est pas installé ou si le système ne sait pas
+créer de processus par fork : l'appelant rend alors le rapport en séquentiel.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+
+
+# Nombre de processus fixé pour tout le processus courant (process_export_jobs), sinon None
+_processus_travailleur = None
+
+
+def utiliser_processus(n):
+    """
+    Fixe le nombre de processus de rendu du processus courant (0 = nombre de CPU) : appelé
+    par le worker process_export_jobs ; les requêtes web gardent EXPORT_PDF_WORKERS.
+    """
+    global _processus_travailleur
+    _processus_travailleur = n
+
+
+def nb_processus(demande=None):
+    """
+    Nombre de processus de rendu : `demande`, sinon celui du worker (utiliser_processus),
+    sinon EXPORT_PDF_WORKERS (1 par défaut : rendu séquentiel) ; 0 = nombre de CPU.
+    """
+    n = demande
+    if n is None:
+        n = _processus_travailleur
+    if n is None:
+        n = getattr(settings, 'EXPORT_PDF_WORKERS', 1)
+    return n if n > 0 else (os.cpu_count() or 1)
+
+
+def parallele_disponible():
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def rendre_sections(fonction, sections, processus=None):
+    """
+    Rend `sections` avec `fonction` (fonction de module, appelée dans les processus fils)
+    et retourne la liste des PDF (octets) dans l'ordre des sections.
+    """
+    processus = min(nb_processus(processus), len(sections))
+    if processus <= 1:
+        return [fonction(s) for s in sections]
+    contexte = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=processus, mp_context=contexte) as pool:
+        return list(pool.map(fonction, sections))
+
+
+def fusionner(pdfs, numeroter=True):
+    """Concatène des PDF (octets) et numérote les pages sur l'ensemble. Retourne un BytesIO."""
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for contenu in pdfs:
+        writer.append(PdfReader(BytesIO(contenu)))
+
+    if numeroter:
+        from reportlab.pdfgen.canvas import Canvas
+        from utils.pdf_outils import dessiner_pied
+
+        total = len(writer.pages)
+        calque = BytesIO()
+        c = Canvas(calque)
+        for i, page in enumerate(writer.pages, 1):
+            largeur, hauteur = float(page.mediabox.width), float(page.mediabox.height)
+            c.setPageSize((largeur, hauteur))
+            dessiner_pied(c, i, total, largeur)
+            c.showPage()
+        c.save()
+        calque.seek(0)
+        for page, pied in zip(writer.pages, PdfReader(calque).pages):
+            page.merge_page(pied)
+            page.compress_content_streams()
+
+    # Polices et ressources communes à plusieurs sections : une seule copie dans le fichier
+    writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+
+    out = BytesIO()
+    writer.write(out)
+    out.seek(0)
+    return out
@@ -0,0 +1,75 @@
+"""
+Stockage S3 des médias (USE_S3_MEDIA) avec cache des URL signées.
+
+Avec AWS_QUERYSTRING_AUTH, chaque `.url` d'un FileField / ImageField signe l'URL (HMAC) :
+dans une liste de membres, d'albums ou d'actualités, la signature devient l'essentiel du
+temps de réponse. Ici l'URL signée d'un fichier est réutilisée, dans le processus, jusqu'à
+MEDIAS_URL_MARGE secondes avant son expiration (AWS_QUERYSTRING_EXPIRE) : le client
+reçoit toujours une URL valable au moins MEDIAS_URL_MARGE secondes.
+
+MEDIAS_CDN_URL : les fichiers dont le chemin correspond à MEDIAS_CDN_MOTIFS (par défaut les
+dérivés d'images, */derives/*) sont servis sans signature depuis cette URL publique
+(CDN devant le bucket, dont seuls ces chemins sont publics).
+
+Les URL à paramètres (en-têtes de réponse imposés, utils/fichiers.py) ne sont pas mises en cache.
+"""
+import fnmatch
+import threading
+import time
+
+from django.conf import settings
+from django.utils.encoding import filepath_to_uri
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+
+URLS_MAX = 50000
+
+
+class S3StockageMedias(S3Storage):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._urls = {}  # (nom, durée) -> (réutilisable jusqu'à, url)
+        self._verrou = threading.Lock()
+
+    def _signee(self):
+        # Sans signature (bucket public, ou domaine personnalisé sans signataire CloudFront)
+        # l'URL est construite sans calcul : rien à mettre en cache
+        return self.querystring_auth and (not self.custom_domain or self.cloudfront_signer)
+
+    def _url_cdn(self, name):
+        cdn = getattr(settings, 'MEDIAS_CDN_URL', '')
+        if not cdn:
+            return None
+        nom = clean_name(name)
+        if not any(fnmatch.fnmatchcase(nom, motif) for motif in getattr(settings, 'MEDIAS_CDN_MOTIFS', ['*/derives/*'])):
+            return None
+        return f"{cdn.rstrip('/')}/{filepath_to_uri(self._normalize_name(nom))}"
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        if parameters or http_method:
+            return super().url(name, parameters, expire, http_method)
+        url = self._url_cdn(name)
+        if url is not None:
+            return url
+        if not self._signee():
+            return super().url(name, expire=expire)
+
+        duree = self.querystring_expire if expire is None else expire
+        cle = (name, duree)
+        maintenant = time.monotonic()
+        with self._verrou:
+            entree = self._urls.get(cle)
+        if entree is not None and entree[0] > maintenant:
+            return entree[1]
+
+        url = super().url(name, expire=duree)
+        reutilisable = duree - getattr(settings, 'MEDIAS_URL_MARGE', 600)
+        if reutilisable > 0:
+            with self._verrou:
+                if len(self._urls) >= URLS_MAX:
+                    self._urls = {k: v for k, v in self._urls.items() if v[0] > maintenant}
+                    if len(self._urls) >= URLS_MAX:
+                        self._urls.clear()
+                self._urls[cle] = (maintenant + reutilisable, url)
+        return url
@@ -1,6 +1,10 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
 from flask import Flask, request, jsonify
 
 app = Flask(__name__)
@@ -12,11 +16,67 @@ WASENDER_API_URL = os.getenv("WASENDER_API_URL", "https://api.wasenderapi.com/ap
 # Sécurité entre DBM et la passerelle
 GATEWAY_TOKEN = os.getenv("GATEWAY_TOKEN")  # doit matcher PUSH_GATEWAY_TOKEN côté DBM
 
+# Envois groupés (/send-batch)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))  # appels Wasender simultanés
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))  # destinataires max par appel
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))  # 0 = pas de limite
+WASENDER_TIMEOUT = float(os.getenv("WASENDER_TIMEOUT", "10"))
+
+# Session partagée : connexions keep-alive réutilisées vers Wasender
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max(1, BATCH_CONCURRENCY)))
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=max(1, BATCH_CONCURRENCY)))
+
+
+class _RateLimiter:
+  """Espace les appels sortants d'au moins 1/rate seconde (partagé entre les threads)."""
+
+  def __init__(self, rate: float):
+    self.intervalle = 1.0 / rate if rate > 0 else 0.0
+    self._prochain = 0.0
+    self._lock = threading.Lock()
+
+  def attendre(self):
+    if not self.intervalle:
+      return
+    with self._lock:
+      maintenant = time.monotonic()
+      depart = max(maintenant, self._prochain)
+      self._prochain = depart + self.intervalle
+    if depart > maintenant:
+      time.sleep(depart - maintenant)
+
+
+_limiteur = _RateLimiter(RATE_LIMIT_PER_SECOND)
+
+
+def _authorized() -> bool:
+  return not GATEWAY_TOKEN or request.headers.get("Authorization") == f"Bearer {GATEWAY_TOKEN}"
+
+
+def _send_one(to: str, message: str):
+  """Appel Wasender pour un destinataire. Retourne (status HTTP, réponse JSON ou erreur)."""
+  headers = {
+    "Authorization": f"Bearer {WASENDER_API_KEY}",
+    "Content-Type": "application/json",
+  }
+  payload = {
+    "to": to,
+    "text": message[:4000],
+  }
+  _limiteur.attendre()
+  r = _session.post(WASENDER_API_URL, json=payload, headers=headers, timeout=WASENDER_TIMEOUT)
+  try:
+    body = r.json()
+  except ValueError:
+    body = {"raw": r.text[:500]}
+  return r.status_code, body
+
 
 @app.post("/send")
 def send():
   # 1) Vérifier que l'appel vient bien du backend DBM
-  if GATEWAY_TOKEN and request.headers.get("Authorization") != f"Bearer {GATEWAY_TOKEN}":
+  if not _authorized():
     return jsonify({"error": "Unauthorized"}), 401
 
   # 2) Récupérer le payload envoyé par DBM
@@ -29,24 +89,56 @@ def send():
   if not WASENDER_API_KEY:
     return jsonify({"error": "WASENDER_API_KEY non configuré"}), 500
 
-  # 3) Construire l'appel vers WasenderApi (texte simple)
-  headers = {
-    "Authorization": f"Bearer {WASENDER_API_KEY}",
-    "Content-Type": "application/json",
-  }
-  payload = {
-    "to": to,
-    "text": message[:4000],
-  }
-
+  # 3) Appel vers WasenderApi (texte simple)
   try:
-    r = requests.post(WASENDER_API_URL, json=payload, headers=headers, timeout=10)
+    status, body = _send_one(to, message)
     # WasenderApi renvoie un JSON avec success / data / msgId, etc.
-    return jsonify({"status": r.status_code, "wasender_response": r.json()}), r.status_code
+    return jsonify({"status": status, "wasender_response": body}), status
   except Exception as e:
     return jsonify({"error": str(e)}), 500
 
 
+def _envoyer_item(item):
+  resultat = {"id": item.get("id"), "to": item.get("to")}
+  to = item.get("to")
+  message = item.get("message") or ""
+  if not to or not message:
+    return {**resultat, "ok": False, "status": 400, "error": "to/message requis"}
+  try:
+    status, body = _send_one(to, message)
+  except Exception as e:
+    return {**resultat, "ok": False, "status": None, "error": str(e)}
+  ok = 200 <= status < 300
+  return {**resultat, "ok": ok, "status": status, "wasender_response": body,
+          "error": "" if ok else f"HTTP {status}"}
+
+
+@app.post("/send-batch")
+def send_batch():
+  """
+  Envoi groupé : {"items": [{"to": ..., "message": ..., "id": ...}, ...]}.
+  Les appels Wasender sont parallélisés (BATCH_CONCURRENCY) et limités en débit
+  (RATE_LIMIT_PER_SECOND). Retourne un résultat par destinataire, dans l'ordre reçu.
+  """
+  if not _authorized():
+    return jsonify({"error": "Unauthorized"}), 401
+
+  data = request.get_json(force=True) or {}
+  items = data.get("items")
+  if not isinstance(items, list) or not items:
+    return jsonify({"error": "items requis (liste non vide)"}), 400
+  if len(items) > BATCH_MAX_ITEMS:
+    return jsonify({"error": f"{BATCH_MAX_ITEMS} destinataires maximum par appel"}), 400
+  if not WASENDER_API_KEY:
+    return jsonify({"error": "WASENDER_API_KEY non configuré"}), 500
+
+  items = [i if isinstance(i, dict) else {} for i in items]
+  with ThreadPoolExecutor(max_workers=max(1, min(BATCH_CONCURRENCY, len(items)))) as pool:
+    results = list(pool.map(_envoyer_item, items))
+  sent = sum(1 for r in results if r["ok"])
+  return jsonify({"sent": sent, "failed": len(results) - sent, "results": results}), 200
+
+
 if __name__ == "__main__":
   app.run(host="0.0.0.0", port=int(os.getenv("PORT", 8000)))
 